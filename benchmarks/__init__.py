@@ -0,0 +1,7 @@
+"""
+Benchmarks of grimoire
+
+The benchmarks are run as modules from the repository root, for example:
+
+    python -m benchmarks.scale_benchmark --output results.json
+"""
@@ -0,0 +1,106 @@
+"""
+Benchmark of the memory usage of the documents
+
+Run from the repository root:
+
+    python -m benchmarks.memory_benchmark
+"""
+
+import json
+import timeit
+import tracemalloc
+
+from grimoire.context import Context
+from grimoire.document import Document
+from grimoire.documenttable import DocumentTable
+
+
+DOCUMENT_COUNT = 200000
+DOCUMENT_TYPES = ['pdf', 'txt', 'png', 'jpg', 'djvu', 'epub', 'html', 'url']
+
+
+class LegacyDocument(object):
+    """The document representation before the slots, with an instance dictionary"""
+
+    def __init__(self, id, name, type, path):
+        self._id = id
+        self._name = name
+        self._type = type
+        self._path = path
+
+    @property
+    def id(self):
+        return self._id
+
+
+def create_log_lines():
+    """
+    Create the log records of the documents, which are decoded like during a replay.
+    :return: list of JSON strings
+    """
+    lines = []
+    for document_id in range(1, DOCUMENT_COUNT + 1):
+        document_type = DOCUMENT_TYPES[document_id % len(DOCUMENT_TYPES)]
+        name = 'doc_{}.{}'.format(document_id, document_type)
+        lines.append(json.dumps({
+            'method': 'create_document',
+            'id': document_id,
+            'name': name,
+            'type': document_type,
+            'path': 'library/{}/{}'.format(document_id % 100, name)
+        }))
+    return lines
+
+
+def measure_documents(lines, document_class, documents):
+    """
+    Measure the allocated memory of the decoded documents.
+    :param lines: the log records of the documents
+    :param document_class: the class which represents a document
+    :param documents: the empty storage of the documents, a dictionary or a DocumentTable
+    :return: the allocated bytes per document
+    """
+    tracemalloc.start()
+    for line in lines:
+        operation = json.loads(line)
+        documents[operation['id']] = document_class(operation['id'], operation['name'], operation['type'], operation['path'])
+    allocated_size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return allocated_size / len(documents)
+
+
+def measure_context(lines, document_table=None):
+    """
+    Measure the allocated memory of a context which replays the document records.
+    :param lines: the log records of the documents
+    :param document_table: the document storage of the context, a dictionary when it is None
+    :return: the context and the allocated bytes per document
+    """
+    tracemalloc.start()
+    context = Context(document_table)
+    for line in lines:
+        operation = json.loads(line)
+        operation.pop('method')
+        context.create_document(**operation)
+    allocated_size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return context, allocated_size / context.count_documents()
+
+
+def main():
+    lines = create_log_lines()
+    print('documents: {}'.format(DOCUMENT_COUNT))
+    print('{:>28} {:>16}'.format('representation', 'bytes/document'))
+    print('{:>28} {:>16.1f}'.format('dictionary (before)', measure_documents(lines, LegacyDocument, {})))
+    print('{:>28} {:>16.1f}'.format('slots and interning (after)', measure_documents(lines, Document, {})))
+    print('{:>28} {:>16.1f}'.format('document table', measure_documents(lines, Document, DocumentTable())))
+    print()
+    print('{:>28} {:>16} {:>16}'.format('context storage', 'bytes/document', 'paths [ms]'))
+    for storage_name, document_table in [('dictionary', None), ('document table', DocumentTable())]:
+        context, document_size = measure_context(lines, document_table)
+        path_time = min(timeit.repeat(context.collect_document_paths, number=1, repeat=5))
+        print('{:>28} {:>16.1f} {:>16.3f}'.format(storage_name, document_size, path_time * 1000))
+
+
+if __name__ == '__main__':
+    main()
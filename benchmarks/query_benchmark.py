@@ -0,0 +1,89 @@
+"""
+Benchmark of deep boolean queries
+
+Run from the repository root:
+
+    python -m benchmarks.query_benchmark
+"""
+
+import random
+import timeit
+
+from grimoire.context import Context
+from grimoire.query import AndQuery, NotQuery, OrQuery, TagQuery
+
+
+DOCUMENT_COUNT = 100000
+TAG_COUNT = 1000
+TAGS_PER_DOCUMENT = 8
+QUERY_DEPTHS = [2, 4, 8, 16, 32]
+REPEAT = 5
+
+
+def create_context(random_generator):
+    """
+    Create a random context for the benchmark.
+    :param random_generator: a seeded random.Random object
+    :return: a `Context` object
+    """
+    context = Context()
+    for tag_id in range(1, TAG_COUNT + 1):
+        context.create_tag(tag_id, 'tag_{}'.format(tag_id))
+    for document_id in range(1, DOCUMENT_COUNT + 1):
+        context.create_document(document_id, 'doc_{}'.format(document_id), 'pdf', 'doc_{}.pdf'.format(document_id))
+        for tag_id in random_generator.sample(range(1, TAG_COUNT // 10 + 1), TAGS_PER_DOCUMENT // 2):
+            context.create_relation(document_id, tag_id)
+        for tag_id in random_generator.sample(range(1, TAG_COUNT + 1), TAGS_PER_DOCUMENT // 2):
+            if not context.has_relation(document_id, tag_id):
+                context.create_relation(document_id, tag_id)
+    return context
+
+
+def create_query(random_generator, depth):
+    """
+    Create a random query with the given expression tree depth.
+    :param random_generator: a seeded random.Random object
+    :param depth: the depth of the expression tree
+    :return: a Query object
+    """
+    if depth <= 1:
+        return TagQuery('tag_{}'.format(random_generator.randint(1, TAG_COUNT // 10)))
+    operands = [create_query(random_generator, depth - 1), create_query(random_generator, 1)]
+    if depth % 3 == 0:
+        operands[1] = NotQuery(operands[1])
+    if depth % 2 == 0:
+        return OrQuery(operands)
+    return AndQuery(operands)
+
+
+def match_document(context, document_id, query):
+    """Evaluate the query for a single document as a predicate for comparison."""
+    if isinstance(query, TagQuery):
+        return context.has_relation(document_id, context.find_tag_id(query.name))
+    if isinstance(query, NotQuery):
+        return not match_document(context, document_id, query.operand)
+    if isinstance(query, AndQuery):
+        return all(match_document(context, document_id, operand) for operand in query.operands)
+    return any(match_document(context, document_id, operand) for operand in query.operands)
+
+
+def main():
+    random_generator = random.Random(42)
+    context = create_context(random_generator)
+    print('documents: {}, tags: {}, relations: {}'.format(
+        context.count_documents(), context.count_tags(), context.count_relations()))
+    print('{:>6} {:>10} {:>14} {:>14}'.format('depth', 'results', 'postings [ms]', 'predicate [ms]'))
+    for depth in QUERY_DEPTHS:
+        query = create_query(random_generator, depth)
+        document_ids = context.find_document_ids_by_query(query)
+        postings_time = min(timeit.repeat(
+            lambda: context.find_document_ids_by_query(query), number=1, repeat=REPEAT))
+        predicate_time = min(timeit.repeat(
+            lambda: [document_id for document_id in context.get_all_document_ids()
+                     if match_document(context, document_id, query)], number=1, repeat=1))
+        print('{:>6} {:>10} {:>14.3f} {:>14.3f}'.format(
+            depth, len(document_ids), postings_time * 1000, predicate_time * 1000))
+
+
+if __name__ == '__main__':
+    main()
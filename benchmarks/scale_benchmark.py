@@ -0,0 +1,211 @@
+"""
+Benchmark of the database, the storage and the scope at scale
+
+Run from the repository root:
+
+    python -m benchmarks.scale_benchmark --documents 100000 --output results.json
+
+The results are written as JSON, so the runs of different commits can be compared.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.workload import Workload, create_file_tree
+from grimoire.database import Database
+from grimoire.scheduler import RenderState
+from grimoire.scope import Scope
+from grimoire.storage import Storage
+
+
+QUERY_WIDTHS = [1, 2, 4, 8]
+FALLBACK_DOCUMENT_LIMIT = 50
+SIMILAR_TAG_FRAGMENT_LENGTH = 3
+
+
+def measure(function, arguments_list):
+    """
+    Call the function once for each argument tuple and summarize the elapsed times.
+    :param function: the measured function
+    :param arguments_list: list of argument tuples
+    :return: dictionary of the call count and the min, median and max times in milliseconds
+    """
+    times = []
+    for arguments in arguments_list:
+        start_time = time.perf_counter()
+        function(*arguments)
+        times.append((time.perf_counter() - start_time) * 1000)
+    return summarize(times)
+
+
+def summarize(times):
+    """
+    Summarize the measured times.
+    :param times: list of times in milliseconds
+    :return: dictionary of the count and the min, median and max times in milliseconds
+    """
+    return {
+        'count': len(times),
+        'min_ms': min(times),
+        'median_ms': statistics.median(times),
+        'max_ms': max(times)
+    }
+
+
+def render_views(scope):
+    """
+    Run the scope queries of the importer views after a click, with the shared state of a render.
+    :param scope: the rendered Scope
+    :return: the number of the listed documents
+    """
+    state = RenderState(scope)
+    selection_document_ids = state.get_selection_document_ids()
+    concept_only_document_ids = state.get_concept_only_document_ids()
+    if not concept_only_document_ids:
+        state.get_fallback_documents(FALLBACK_DOCUMENT_LIMIT)
+    if state.has_document_selection():
+        state.get_selection_only_tags()
+    state.get_concept_tags()
+    state.get_concept_query()
+    return len(selection_document_ids) + len(concept_only_document_ids)
+
+
+def benchmark_replay(log_path, repeat):
+    return measure(lambda: Database(log_path), [()] * repeat)
+
+
+def benchmark_document_queries(database, workload, repeat):
+    return {
+        str(width): measure(database.find_document_ids, [(workload.sample_tag_ids(width),) for _ in range(repeat)])
+        for width in QUERY_WIDTHS
+    }
+
+
+def benchmark_tag_queries(database, workload, repeat):
+    return {
+        str(width): measure(database.find_tag_ids, [(workload.sample_document_ids(width),) for _ in range(repeat)])
+        for width in QUERY_WIDTHS
+    }
+
+
+def benchmark_similar_tags(database, workload, repeat):
+    fragments = []
+    for tag_id in workload.sample_tag_ids(repeat):
+        fragments.append((workload.get_tag_name(tag_id)[:SIMILAR_TAG_FRAGMENT_LENGTH],))
+    return measure(database.find_similar_tags, fragments)
+
+
+def benchmark_storage(storage_path, file_count, repeat):
+    create_file_tree(storage_path, file_count)
+    storage = Storage(storage_path)
+    return measure(storage.collect_file_paths, [()] * repeat)
+
+
+def benchmark_clicks(database, workload, repeat):
+    """
+    Measure the click paths of the importer on the scope, each followed by the rendering queries.
+    The clicks do not modify the database.
+    """
+    scope = Scope(database)
+    times = {'add_tag': [], 'select_document': [], 'deselect_document': [], 'remove_tag': [], 'go_home': []}
+
+    def click(name, function, *arguments):
+        start_time = time.perf_counter()
+        function(*arguments)
+        render_views(scope)
+        times[name].append((time.perf_counter() - start_time) * 1000)
+
+    for _ in range(repeat):
+        tag_ids = workload.sample_tag_ids(2)
+        for tag_id in tag_ids:
+            click('add_tag', scope.add_tag, tag_id)
+        document_ids = scope.get_concept_only_document_ids() or workload.sample_document_ids(1)
+        click('select_document', scope.toggle_document_selection, document_ids[0])
+        click('deselect_document', scope.toggle_document_selection, document_ids[0])
+        click('remove_tag', scope.remove_tag, tag_ids[-1])
+        click('go_home', go_home, scope)
+    return {name: summarize(values) for name, values in times.items()}
+
+
+def go_home(scope):
+    scope.deselect_all_documents()
+    scope.remove_all_tags()
+    scope.clear_concept_query()
+
+
+def find_commit():
+    """Find the current git commit of the repository, or None outside of a repository."""
+    try:
+        output = subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.decode().strip()
+
+
+def run(arguments):
+    """
+    Run all benchmarks.
+    :param arguments: the parsed command line arguments
+    :return: dictionary of the environment, the parameters and the results
+    """
+    workload = Workload(arguments.documents, arguments.tags, arguments.relations, arguments.exponent, arguments.seed)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory_path:
+        log_path = os.path.join(directory_path, 'grimoire.log')
+        workload.write_log(log_path)
+        results['replay'] = benchmark_replay(log_path, arguments.replay_repeat)
+        database = Database(log_path)
+        results['find_document_ids'] = benchmark_document_queries(database, workload, arguments.repeat)
+        results['find_tag_ids'] = benchmark_tag_queries(database, workload, arguments.repeat)
+        results['find_similar_tags'] = benchmark_similar_tags(database, workload, arguments.repeat)
+        results['collect_file_paths'] = benchmark_storage(
+            os.path.join(directory_path, 'storage'), arguments.files, arguments.replay_repeat)
+        results['scope_clicks'] = benchmark_clicks(database, workload, arguments.repeat)
+    return {
+        'commit': find_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {
+            'documents': arguments.documents,
+            'tags': arguments.tags,
+            'relations': workload.relation_count,
+            'exponent': arguments.exponent,
+            'seed': arguments.seed,
+            'files': arguments.files,
+            'repeat': arguments.repeat,
+            'replay_repeat': arguments.replay_repeat
+        },
+        'results': results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark grimoire on a synthetic workload.')
+    parser.add_argument('--documents', type=int, default=20000, help='the number of the documents')
+    parser.add_argument('--tags', type=int, default=2000, help='the number of the tags')
+    parser.add_argument('--relations', type=int, default=100000, help='the number of the relations')
+    parser.add_argument('--exponent', type=float, default=1.0, help='the exponent of the Zipf distribution')
+    parser.add_argument('--seed', type=int, default=42, help='the seed of the workload')
+    parser.add_argument('--files', type=int, default=20000, help='the number of the files in the storage')
+    parser.add_argument('--repeat', type=int, default=20, help='the number of the measured queries')
+    parser.add_argument('--replay-repeat', type=int, default=3, help='the number of the replays and storage walks')
+    parser.add_argument('--output', help='the path of the JSON result file, the standard output by default')
+    arguments = parser.parse_args()
+    report = run(arguments)
+    if arguments.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        with open(arguments.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""
+Seeded synthetic workloads for the benchmarks
+"""
+
+import bisect
+import itertools
+import json
+import os
+import random
+
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ne', 'ru', 'sa', 'ti', 'vo', 'ze', 'py', 'th', 'on', 'ba', 'se', 'da', 'ta']
+DOCUMENT_TYPES = ['pdf', 'pdf', 'pdf', 'txt', 'txt', 'png', 'jpg', 'djvu', 'epub', 'url']
+DIRECTORY_COUNT = 100
+
+
+class Workload(object):
+    """Documents, tags and relations, where the tag popularity follows a Zipf distribution"""
+
+    def __init__(self, document_count=10000, tag_count=1000, relation_count=50000, exponent=1.0, seed=42):
+        """
+        Generate the workload.
+        The tags are ranked by their identifiers, so the first tag is the most popular one.
+        :param document_count: the number of the documents
+        :param tag_count: the number of the tags
+        :param relation_count: the number of the distinct document-tag pairs, at most the tenth of all pairs
+        :param exponent: the exponent of the Zipf distribution of the tags
+        :param seed: the seed of the random generator
+        :return: None
+        :raises ValueError: for non-positive counts or too many relations
+        """
+        if document_count <= 0 or tag_count <= 0:
+            raise ValueError('The document and the tag counts should be positive!')
+        if relation_count > document_count * tag_count // 10:
+            raise ValueError('Too many relations for the sampling of distinct pairs!')
+        self._random = random.Random(seed)
+        self._document_count = document_count
+        self._tag_count = tag_count
+        self._tag_cum_weights = list(itertools.accumulate(1.0 / rank ** exponent for rank in range(1, tag_count + 1)))
+        self._tag_names = self._generate_tag_names()
+        self._relations = self._generate_relations(relation_count)
+
+    @property
+    def document_count(self):
+        return self._document_count
+
+    @property
+    def tag_count(self):
+        return self._tag_count
+
+    @property
+    def relation_count(self):
+        return len(self._relations)
+
+    def get_tag_name(self, tag_id):
+        """
+        Get the generated name of the tag.
+        :param tag_id: the identifier of the tag from 1
+        :return: the name as a string
+        """
+        return self._tag_names[tag_id - 1]
+
+    def iterate_operations(self):
+        """
+        Iterate over the operations which create the workload in log format.
+        :return: generator of operation dictionaries
+        """
+        for document_id in range(1, self._document_count + 1):
+            document_type = DOCUMENT_TYPES[document_id % len(DOCUMENT_TYPES)]
+            name = 'doc_{}.{}'.format(document_id, document_type)
+            yield {
+                'method': 'create_document',
+                'id': document_id,
+                'name': name,
+                'type': document_type,
+                'path': 'dir_{}/{}'.format(document_id % DIRECTORY_COUNT, name)
+            }
+        for tag_id in range(1, self._tag_count + 1):
+            yield {'method': 'create_tag', 'id': tag_id, 'name': self.get_tag_name(tag_id)}
+        for document_id, tag_id in self._relations:
+            yield {'method': 'create_relation', 'document_id': document_id, 'tag_id': tag_id}
+
+    def write_log(self, path):
+        """
+        Write the workload as a log file which can be loaded by a Database.
+        :param path: the path of the log file
+        :return: None
+        """
+        with open(path, 'w') as log_file:
+            for operation in self.iterate_operations():
+                operation['timestamp'] = '2020-01-01 00:00:00.000000'
+                log_file.write(json.dumps(operation))
+                log_file.write('\n')
+
+    def sample_tag_ids(self, width):
+        """
+        Sample distinct tags by their popularity.
+        :param width: the number of the tags
+        :return: list of tag identifiers
+        """
+        width = min(width, self._tag_count)
+        tag_ids = set()
+        while len(tag_ids) < width:
+            tag_ids.add(self._sample_tag_id())
+        return sorted(tag_ids)
+
+    def sample_document_ids(self, width):
+        """
+        Sample distinct documents uniformly.
+        :param width: the number of the documents
+        :return: list of document identifiers
+        """
+        return sorted(self._random.sample(range(1, self._document_count + 1), min(width, self._document_count)))
+
+    def _sample_tag_id(self):
+        value = self._random.random() * self._tag_cum_weights[-1]
+        return min(bisect.bisect_right(self._tag_cum_weights, value), self._tag_count - 1) + 1
+
+    def _generate_tag_names(self):
+        names = []
+        used_names = set()
+        for _ in range(self._tag_count):
+            name = ''.join(self._random.choice(SYLLABLES) for _ in range(self._random.randint(2, 4)))
+            while name in used_names:
+                name += self._random.choice(SYLLABLES)
+            used_names.add(name)
+            names.append(name)
+        return names
+
+    def _generate_relations(self, relation_count):
+        relations = set()
+        while len(relations) < relation_count:
+            document_id = self._random.randint(1, self._document_count)
+            relations.add((document_id, self._sample_tag_id()))
+        return sorted(relations)
+
+
+def create_file_tree(path, file_count, files_per_directory=100, seed=42):
+    """
+    Create empty files in a two level directory tree for the storage benchmarks.
+    :param path: the root directory, which is created when it is missing
+    :param file_count: the number of the created files
+    :param files_per_directory: the number of files in a leaf directory
+    :param seed: the seed of the random file extensions
+    :return: None
+    """
+    random_generator = random.Random(seed)
+    for index in range(file_count):
+        directory_index = index // files_per_directory
+        directory_path = os.path.join(path, 'group_{}'.format(directory_index // 10), 'dir_{}'.format(directory_index))
+        if index % files_per_directory == 0:
+            os.makedirs(directory_path, exist_ok=True)
+        extension = random_generator.choice(DOCUMENT_TYPES)
+        with open(os.path.join(directory_path, 'file_{}.{}'.format(index, extension)), 'w'):
+            pass
@@ -0,0 +1,180 @@
+"""
+Dictionary with copy-on-write snapshots
+"""
+
+import sys
+
+
+CHUNK_BITS = 10
+HASH_CHUNK_MASK = 255
+
+
+def get_chunk_index(key):
+    """
+    Get the index of the chunk of the key.
+    The consecutive integer keys are stored in the same chunk, the other keys are distributed by their hashes.
+    :param key: a hashable key
+    :return: an integer value
+    """
+    if key.__class__ is int:
+        return key >> CHUNK_BITS
+    return hash(key) & HASH_CHUNK_MASK
+
+
+class ChunkedMap(object):
+    """
+    Dictionary which is split into chunks, so a snapshot can share the chunks with the map.
+    Taking a snapshot needs constant time. After a snapshot, the map copies the index of the chunks
+    at its first change, and a chunk at its first change.
+    The mutable values, like the posting sets, should be changed through `get_mutable`,
+    which copies the values shared with the snapshots at their first change.
+    The snapshots are read-only, so they can be read from other threads while the map changes.
+    """
+
+    __slots__ = ('_chunks', '_length', '_is_shared', '_owned_chunk_indices', '_owned_value_keys', '_is_frozen')
+
+    def __init__(self, items=()):
+        """
+        Create a map.
+        :param items: iterable of the initial (key, value) pairs
+        :return: None
+        """
+        self._chunks = {}
+        self._length = 0
+        self._is_shared = False
+        self._owned_chunk_indices = None
+        self._owned_value_keys = None
+        self._is_frozen = False
+        for key, value in items:
+            self[key] = value
+
+    def snapshot(self):
+        """
+        Create a read-only map with the current items.
+        :return: a frozen ChunkedMap object
+        """
+        if self._is_frozen:
+            return self
+        snapshot = ChunkedMap()
+        snapshot._chunks = self._chunks
+        snapshot._length = self._length
+        snapshot._is_frozen = True
+        self._is_shared = True
+        self._owned_chunk_indices = set()
+        self._owned_value_keys = set()
+        return snapshot
+
+    def is_frozen(self):
+        """
+        Check that the map is a read-only snapshot.
+        :return: True for the snapshots, else False
+        """
+        return self._is_frozen
+
+    def __len__(self):
+        return self._length
+
+    def __contains__(self, key):
+        chunk = self._chunks.get(get_chunk_index(key))
+        return chunk is not None and key in chunk
+
+    def __iter__(self):
+        for chunk in list(self._chunks.values()):
+            yield from chunk
+
+    def __getitem__(self, key):
+        chunk = self._chunks.get(get_chunk_index(key))
+        if chunk is None:
+            raise KeyError(key)
+        return chunk[key]
+
+    def get(self, key, default=None):
+        chunk = self._chunks.get(get_chunk_index(key))
+        if chunk is None:
+            return default
+        return chunk.get(key, default)
+
+    def keys(self):
+        return iter(self)
+
+    def values(self):
+        for chunk in list(self._chunks.values()):
+            yield from chunk.values()
+
+    def items(self):
+        for chunk in list(self._chunks.values()):
+            yield from chunk.items()
+
+    def __setitem__(self, key, value):
+        chunk = self._get_writable_chunk(get_chunk_index(key))
+        if key not in chunk:
+            self._length += 1
+        chunk[key] = value
+
+    def __delitem__(self, key):
+        self.pop(key)
+
+    def pop(self, key, *default):
+        """
+        Remove the key and get its value.
+        :param key: the removed key
+        :param default: the optional resulted value of a missing key
+        :return: the value of the key
+        :raises KeyError: for missing key without default
+        :raises ValueError: for snapshots
+        """
+        chunk_index = get_chunk_index(key)
+        chunk = self._chunks.get(chunk_index)
+        if chunk is None or key not in chunk:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        chunk = self._get_writable_chunk(chunk_index)
+        value = chunk.pop(key)
+        self._length -= 1
+        if not chunk:
+            del self._chunks[chunk_index]
+        if self._owned_value_keys is not None:
+            self._owned_value_keys.discard(key)
+        return value
+
+    def get_mutable(self, key):
+        """
+        Get a value which can be changed in place without changing the snapshots.
+        :param key: the key of an existing value with a `copy` method
+        :return: the value
+        :raises KeyError: for missing key
+        :raises ValueError: for snapshots
+        """
+        if self._is_frozen:
+            raise ValueError('The snapshot is read-only!')
+        value = self[key]
+        if self._owned_value_keys is None or key in self._owned_value_keys:
+            return value
+        value = value.copy()
+        self[key] = value
+        self._owned_value_keys.add(key)
+        return value
+
+    def calc_memory_usage(self):
+        """
+        Calculate the size of the chunks without the keys and the values.
+        :return: the size in bytes
+        """
+        return sys.getsizeof(self._chunks) + sum(sys.getsizeof(chunk) for chunk in self._chunks.values())
+
+    def _get_writable_chunk(self, chunk_index):
+        if self._is_frozen:
+            raise ValueError('The snapshot is read-only!')
+        if self._owned_chunk_indices is not None and chunk_index not in self._owned_chunk_indices:
+            if self._is_shared:
+                self._chunks = dict(self._chunks)
+                self._is_shared = False
+            chunk = self._chunks.get(chunk_index)
+            if chunk is not None:
+                self._chunks[chunk_index] = dict(chunk)
+            self._owned_chunk_indices.add(chunk_index)
+        chunk = self._chunks.get(chunk_index)
+        if chunk is None:
+            chunk = self._chunks[chunk_index] = {}
+        return chunk
@@ -2,17 +2,37 @@
 Context of documents and tags
 """
 
+import heapq
+import itertools
+import math
+import sys
+
+from grimoire.chunkedmap import ChunkedMap
 from grimoire.document import Document
+from grimoire.documenttable import DocumentTable
+from grimoire.planner import QueryPlanner
 from grimoire.tag import Tag
 
 
+MEMORY_SAMPLE_SIZE = 1000
+
+
 class Context(object):
     """Represents an in-memory data structure for contexts"""
 
-    def __init__(self):
-        self._documents = {}
-        self._tags = {}
-        self._relations = set()
+    def __init__(self, document_table=None):
+        """
+        Construct an empty context.
+        :param document_table: an empty DocumentTable for the columnar storage of the documents,
+            a ChunkedMap is used when it is None, which is copied on write by the snapshots
+        :return: None
+        """
+        self._documents = ChunkedMap() if document_table is None else document_table
+        self._tags = ChunkedMap()
+        self._tag_ids_by_name = ChunkedMap()
+        self._document_tag_ids = ChunkedMap()
+        self._tag_document_ids = ChunkedMap()
+        self._relation_count = 0
 
     def create_document(self, id, name, type, path):
         """Create a new document."""
@@ -20,6 +40,7 @@ class Context(object):
             raise ValueError('Invalid document identifier!')
         document = Document(id, name, type, path)
         self._documents[id] = document
+        self._document_tag_ids[id] = set()
         return document
 
     def get_document(self, id):
@@ -29,8 +50,14 @@ class Context(object):
         except KeyError:
             raise ValueError('Invalid document identifier!')
 
+    def get_documents(self, document_ids):
+        """Get the documents in the order of the given identifiers."""
+        return [self.get_document(document_id) for document_id in document_ids]
+
     def collect_document_paths(self):
         """Get the paths of the documents."""
+        if isinstance(self._documents, DocumentTable):
+            return set(self._documents.iterate_paths())
         paths = set()
         for _, document in self._documents.items():
             paths.add(document.path)
@@ -41,15 +68,74 @@ class Context(object):
         return [self.get_document(document_id) for document_id in self.find_document_ids(tag_ids)]
 
     def find_document_ids(self, tag_ids):
-        """Find the document identifiers which are related to the given tags."""
-        document_ids = []
-        for document_id in self._documents:
-            for tag_id in tag_ids:
-                if (document_id, tag_id) not in self._relations:
-                    break
-            else:
-                document_ids.append(document_id)
-        return document_ids
+        """Find the document identifiers which are related to the given tags in ascending order."""
+        document_ids = self.plan_document_query(tag_ids).execute()
+        if document_ids is None:
+            return sorted(self._documents)
+        return sorted(document_ids)
+
+    def plan_document_query(self, tag_ids):
+        """Plan the intersection of the tag postings from the rarest tag."""
+        planner = QueryPlanner(self._tag_document_ids, len(self._documents))
+        return planner.create_plan(tag_ids)
+
+    def explain(self, tag_ids):
+        """Execute the document query of the tags and get the measured plan."""
+        plan = self.plan_document_query(tag_ids)
+        plan.execute(measure=True)
+        return plan
+
+    def rank_document_ids(self, tag_ids, limit=20, weighted=False):
+        """
+        Rank the documents by the number of the matching tags.
+        The scores are accumulated along the tag postings, so only the tagged documents are visited.
+        :param tag_ids: the identifiers of the query tags
+        :param limit: the maximal number of the resulted documents
+        :param weighted: weight the tags by their rarity instead of counting them
+        :return: list of (document identifier, score) pairs in descending score order
+        """
+        document_count = len(self._documents)
+        scores = {}
+        for tag_id in set(tag_ids):
+            posting = self._tag_document_ids.get(tag_id)
+            if not posting:
+                continue
+            weight = 1.0
+            if weighted:
+                weight = math.log(1.0 + document_count / len(posting))
+            for document_id in posting:
+                scores[document_id] = scores.get(document_id, 0.0) + weight
+        return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+
+    def find_documents_by_query(self, query):
+        """Find the documents which match the boolean query."""
+        return [self.get_document(document_id) for document_id in self.find_document_ids_by_query(query)]
+
+    def find_document_ids_by_query(self, query):
+        """Find the document identifiers which match the boolean query in ascending order."""
+        return sorted(query.evaluate(self))
+
+    def get_all_document_ids(self):
+        """Get the set of all document identifiers."""
+        return set(self._documents)
+
+    def has_document(self, id):
+        """Check that the document exists."""
+        return id in self._documents
+
+    def get_document_tag_ids(self, document_id):
+        """Get the identifiers of the tags of the document. The resulted set must not be modified."""
+        try:
+            return self._document_tag_ids[document_id]
+        except KeyError:
+            raise ValueError('Invalid document identifier!')
+
+    def get_tag_document_ids(self, tag_id):
+        """Get the identifiers of the documents of the tag. The resulted set must not be modified."""
+        try:
+            return self._tag_document_ids[tag_id]
+        except KeyError:
+            raise ValueError('Invalid tag identifier!')
 
     def update_document(self, id, name=None, type=None, path=None):
         """Update the document."""
@@ -63,17 +149,15 @@ class Context(object):
             new_type = type
         if path is not None:
             new_path = path
-        self._documents[id] = Document(id, new_name, new_type, new_path)
+        if (new_name, new_type, new_path) != (document.name, document.type, document.path):
+            self._documents[id] = Document(id, new_name, new_type, new_path)
 
     def destroy_document(self, id):
         """Remove the document from the context."""
         if id in self._documents:
-            removable_relations = []
-            for relation in self._relations:
-                if relation[0] == id:
-                    removable_relations.append(relation)
-            for relation in removable_relations:
-                self._relations.remove(relation)
+            for tag_id in self._document_tag_ids.pop(id):
+                self._tag_document_ids.get_mutable(tag_id).remove(id)
+                self._relation_count -= 1
             self._documents.pop(id)
         else:
             raise ValueError('Invalid document identifier!')
@@ -86,11 +170,12 @@ class Context(object):
         """Create a new tag."""
         if id in self._tags:
             raise ValueError('Invalid tag identifier!')
-        for _, tag in self._tags.items():
-            if tag.name == name:
-                raise ValueError('The tag name already exist!')
+        if name in self._tag_ids_by_name:
+            raise ValueError('The tag name already exist!')
         tag = Tag(id, name)
         self._tags[id] = tag
+        self._tag_ids_by_name[name] = id
+        self._tag_document_ids[id] = set()
         return tag
 
     def get_tag(self, id):
@@ -100,47 +185,51 @@ class Context(object):
         except KeyError:
             raise ValueError('Invalid tag identifier!')
 
+    def has_tag(self, id):
+        """Check that the tag exists."""
+        return id in self._tags
+
+    def get_all_tag_ids(self):
+        """Get the set of all tag identifiers."""
+        return set(self._tags)
+
     def find_tag_id(self, name):
         """Find the tag identifier from the name."""
-        for tag_id, tag in self._tags.items():
-            if tag.name == name:
-                return tag_id
-        raise ValueError('Invalid tag name!')
+        try:
+            return self._tag_ids_by_name[name]
+        except KeyError:
+            raise ValueError('Invalid tag name!')
 
     def find_tags(self, document_ids):
         """Find tags which are related to the given documents."""
         return [self.get_tag(tag_id) for tag_id in self.find_tag_ids(document_ids)]
 
     def find_tag_ids(self, document_ids):
-        """Find tag identifiers which are related to the given documents."""
-        tag_ids = []
-        for tag_id in self._tags:
-            for document_id in document_ids:
-                if (document_id, tag_id) not in self._relations:
-                    break
-            else:
-                tag_ids.append(tag_id)
-        return tag_ids
+        """Find tag identifiers which are related to the given documents in ascending order."""
+        planner = QueryPlanner(self._document_tag_ids, len(self._tags))
+        tag_ids = planner.create_plan(document_ids).execute()
+        if tag_ids is None:
+            return sorted(self._tags)
+        return sorted(tag_ids)
 
     def update_tag(self, id, name):
         """Update the tag."""
         if id not in self._tags:
             raise ValueError('Invalid tag identifier!')
-        for _, tag in self._tags.items():
-            if tag.name == name:
-                raise ValueError('The tag name already exist!')
-        self._tags[id] = Tag(id, name)
+        if name in self._tag_ids_by_name:
+            raise ValueError('The tag name already exist!')
+        tag = Tag(id, name)
+        del self._tag_ids_by_name[self._tags[id].name]
+        self._tags[id] = tag
+        self._tag_ids_by_name[name] = id
 
     def destroy_tag(self, id):
         """Remove the tag from the context."""
         if id in self._tags:
-            removable_relations = []
-            for relation in self._relations:
-                if relation[1] == id:
-                    removable_relations.append(relation)
-            for relation in removable_relations:
-                self._relations.remove(relation)
-            self._tags.pop(id)
+            for document_id in self._tag_document_ids.pop(id):
+                self._document_tag_ids.get_mutable(document_id).remove(id)
+                self._relation_count -= 1
+            del self._tag_ids_by_name[self._tags.pop(id).name]
         else:
             raise ValueError('Invalid tag identifier!')
 
@@ -154,18 +243,83 @@ class Context(object):
             raise ValueError('Invalid document identifier!')
         if tag_id not in self._tags:
             raise ValueError('Invalid tag identifier!')
-        self._relations.add((document_id, tag_id))
+        if tag_id not in self._document_tag_ids[document_id]:
+            self._document_tag_ids.get_mutable(document_id).add(tag_id)
+            self._tag_document_ids.get_mutable(tag_id).add(document_id)
+            self._relation_count += 1
 
     def destroy_relation(self, document_id, tag_id):
         """Remove the relation between the document and the tag."""
-        relation = (document_id, tag_id)
-        if relation not in self._relations:
+        if tag_id not in self._document_tag_ids.get(document_id, ()):
             raise ValueError('The destroyable relation does not exists!')
-        self._relations.remove(relation)
+        self._document_tag_ids.get_mutable(document_id).remove(tag_id)
+        self._tag_document_ids.get_mutable(tag_id).remove(document_id)
+        self._relation_count -= 1
+
+    def has_relation(self, document_id, tag_id):
+        """Check that the document is related to the tag."""
+        return tag_id in self._document_tag_ids.get(document_id, ())
 
     def count_relations(self):
         """Count the relations in the database."""
-        return len(self._relations)
+        return self._relation_count
+
+    def restore_id_counters(self, last_document_id, last_tag_id):
+        """
+        Restore the high-water marks of the identifiers from a log header.
+        The context does not generate identifiers, so it ignores them.
+        :param last_document_id: the largest document identifier which has ever been used
+        :param last_tag_id: the largest tag identifier which has ever been used
+        :return: None
+        """
+        pass
+
+    def snapshot(self):
+        """
+        Create a read-only view of the current state in constant time.
+        The snapshot shares the storage with the context, which copies the shared parts at their first change,
+        so the later changes of the context are not visible in the snapshot.
+        The snapshot can be queried from other threads without locking.
+        :return: a ContextSnapshot object
+        """
+        snapshot = ContextSnapshot.__new__(ContextSnapshot)
+        self._share_state(snapshot)
+        return snapshot
+
+    def memory_stats(self, sample_size=MEMORY_SAMPLE_SIZE):
+        """
+        Estimate the memory usage of the documents, the tags, the relations and the tag name index.
+        The elements are measured on an evenly spaced sample, and their sizes are scaled to the element count.
+        The integer identifiers and the interned document types are not counted.
+        :param sample_size: the maximal number of the measured elements of a container
+        :return: dictionary of the estimated bytes by parts and their sum as 'total'
+        """
+        if isinstance(self._documents, DocumentTable):
+            string_size = self._documents.calc_string_memory_usage()
+            stats = {
+                'documents': self._documents.calc_memory_usage() - string_size,
+                'document_strings': string_size
+            }
+        else:
+            document_count = len(self._documents)
+            stats = {
+                'documents': self._documents.calc_memory_usage() + estimate_size(
+                    self._documents.values(), document_count, sys.getsizeof, sample_size),
+                'document_strings': estimate_size(
+                    self._documents.values(), document_count, calc_document_string_size, sample_size)
+            }
+        stats['tags'] = self._tags.calc_memory_usage() + estimate_size(
+            self._tags.values(), len(self._tags), sys.getsizeof, sample_size)
+        stats['tag_strings'] = estimate_size(
+            self._tags.values(), len(self._tags), lambda tag: sys.getsizeof(tag.name), sample_size)
+        stats['relations'] = (
+            self._document_tag_ids.calc_memory_usage() + self._tag_document_ids.calc_memory_usage()
+            + estimate_size(self._document_tag_ids.values(), len(self._document_tag_ids), sys.getsizeof, sample_size)
+            + estimate_size(self._tag_document_ids.values(), len(self._tag_document_ids), sys.getsizeof, sample_size)
+        )
+        stats['tag_name_index'] = self._tag_ids_by_name.calc_memory_usage()
+        stats['total'] = sum(stats.values())
+        return stats
 
     def calc_last_document_id(self):
         """
@@ -188,3 +342,76 @@ class Context(object):
             if tag_id > last_id:
                 last_id = tag_id
         return last_id
+
+    def _share_state(self, snapshot):
+        snapshot._documents = self._documents.snapshot()
+        snapshot._tags = self._tags.snapshot()
+        snapshot._tag_ids_by_name = self._tag_ids_by_name.snapshot()
+        snapshot._document_tag_ids = self._document_tag_ids.snapshot()
+        snapshot._tag_document_ids = self._tag_document_ids.snapshot()
+        snapshot._relation_count = self._relation_count
+
+
+class ContextSnapshot(Context):
+    """
+    Read-only view of a context at the time of its snapshot.
+    The changing methods raise ValueError with the arguments of both the Context and the Database methods.
+    """
+
+    def __init__(self):
+        raise ValueError('The snapshots should be created by the snapshot method of a context!')
+
+    def snapshot(self):
+        """The snapshot does not change, so it is its own snapshot."""
+        return self
+
+    def create_document(self, *args, **kwargs):
+        raise ValueError('The snapshot is read-only!')
+
+    def update_document(self, *args, **kwargs):
+        raise ValueError('The snapshot is read-only!')
+
+    def destroy_document(self, *args, **kwargs):
+        raise ValueError('The snapshot is read-only!')
+
+    def create_tag(self, *args, **kwargs):
+        raise ValueError('The snapshot is read-only!')
+
+    def update_tag(self, *args, **kwargs):
+        raise ValueError('The snapshot is read-only!')
+
+    def destroy_tag(self, *args, **kwargs):
+        raise ValueError('The snapshot is read-only!')
+
+    def create_relation(self, *args, **kwargs):
+        raise ValueError('The snapshot is read-only!')
+
+    def destroy_relation(self, *args, **kwargs):
+        raise ValueError('The snapshot is read-only!')
+
+    def restore_id_counters(self, *args, **kwargs):
+        raise ValueError('The snapshot is read-only!')
+
+
+def estimate_size(values, count, size_function, sample_size=MEMORY_SAMPLE_SIZE):
+    """
+    Estimate the total size of the values from an evenly spaced sample.
+    :param values: iterable of the values
+    :param count: the number of the values
+    :param size_function: function which calculates the size of a value in bytes
+    :param sample_size: the maximal number of the measured values
+    :return: the estimated size in bytes
+    """
+    if count == 0:
+        return 0
+    step = max(count // sample_size, 1)
+    sample = list(itertools.islice(values, 0, None, step))[:sample_size]
+    return sum(map(size_function, sample)) * count // len(sample)
+
+
+def calc_document_string_size(document):
+    """Calculate the size of the name and the path strings of the document."""
+    size = sys.getsizeof(document.name)
+    if document.path is not document.name:
+        size += sys.getsizeof(document.path)
+    return size
@@ -0,0 +1,223 @@
+"""
+Tag co-occurrence matrix
+"""
+
+import heapq
+import sys
+
+from grimoire.chunkedmap import ChunkedMap
+
+
+class Cooccurrence(object):
+    """
+    Sparse, symmetric matrix of the tag pair document counts.
+    The rows are stored in a ChunkedMap, so a snapshot of the matrix shares the unchanged rows.
+    """
+
+    def __init__(self, max_pairs=1000000):
+        """
+        Construct an empty co-occurrence matrix.
+        :param max_pairs: the maximal number of the stored tag pairs
+        :return: None
+        """
+        if max_pairs < 1:
+            raise ValueError('The maximal number of pairs should be positive!')
+        self._counts = ChunkedMap()
+        self._pair_count = 0
+        self._max_pairs = max_pairs
+        self._is_exact = True
+
+    @property
+    def max_pairs(self):
+        return self._max_pairs
+
+    def is_exact(self):
+        """
+        Check that no pair has been dropped because of the memory limit.
+        :return: True, when all of the counts are exact, else False
+        """
+        return self._is_exact
+
+    def clear(self):
+        """
+        Remove all counts from the matrix.
+        :return: None
+        """
+        self._counts = ChunkedMap()
+        self._pair_count = 0
+        self._is_exact = True
+
+    def snapshot(self):
+        """
+        Create a read-only matrix with the current counts in constant time.
+        :return: a Cooccurrence object
+        """
+        snapshot = Cooccurrence(self._max_pairs)
+        snapshot._counts = self._counts.snapshot()
+        snapshot._pair_count = self._pair_count
+        snapshot._is_exact = self._is_exact
+        return snapshot
+
+    def rebuild(self, document_tag_ids):
+        """
+        Rebuild the matrix from the tags of the documents.
+        :param document_tag_ids: iterable of the tag identifier sets of the documents
+        :return: None
+        """
+        self.clear()
+        counts = {}
+        for tag_ids in document_tag_ids:
+            for tag_id in tag_ids:
+                row = counts.get(tag_id)
+                if row is None:
+                    row = counts[tag_id] = {}
+                for other_tag_id in tag_ids:
+                    if other_tag_id != tag_id:
+                        row[other_tag_id] = row.get(other_tag_id, 0) + 1
+        self._counts = ChunkedMap(counts.items())
+        self._pair_count = sum(len(row) for row in counts.values()) // 2
+        if self._pair_count > self._max_pairs:
+            self._prune()
+
+    def add_tag(self, tag_id, other_tag_ids):
+        """
+        Count a new document tag against the other tags of the document.
+        :param tag_id: the identifier of the added tag
+        :param other_tag_ids: the identifiers of the other tags of the document
+        :return: None
+        """
+        for other_tag_id in other_tag_ids:
+            if other_tag_id != tag_id:
+                self._increment(tag_id, other_tag_id)
+        if self._pair_count > self._max_pairs:
+            self._prune()
+
+    def remove_tag(self, tag_id, other_tag_ids):
+        """
+        Uncount a removed document tag against the other tags of the document.
+        :param tag_id: the identifier of the removed tag
+        :param other_tag_ids: the identifiers of the remaining tags of the document
+        :return: None
+        """
+        for other_tag_id in other_tag_ids:
+            if other_tag_id != tag_id:
+                self._decrement(tag_id, other_tag_id)
+
+    def remove_document(self, tag_ids):
+        """
+        Uncount all tag pairs of a removed document.
+        :param tag_ids: the tag identifiers of the removed document
+        :return: None
+        """
+        tag_ids = list(tag_ids)
+        for index, tag_id in enumerate(tag_ids):
+            for other_tag_id in tag_ids[index + 1:]:
+                self._decrement(tag_id, other_tag_id)
+
+    def drop_tag(self, tag_id):
+        """
+        Remove all counts of the tag.
+        :param tag_id: the identifier of the destroyed tag
+        :return: None
+        """
+        row = self._counts.pop(tag_id, {})
+        for other_tag_id in row:
+            other_row = self._counts.get_mutable(other_tag_id)
+            del other_row[tag_id]
+            if not other_row:
+                del self._counts[other_tag_id]
+        self._pair_count -= len(row)
+
+    def count(self, tag_id, other_tag_id):
+        """
+        Count the documents which have both of the tags.
+        :param tag_id: the identifier of the first tag
+        :param other_tag_id: the identifier of the second tag
+        :return: a non-negative integer value
+        """
+        return self._counts.get(tag_id, {}).get(other_tag_id, 0)
+
+    def find_top_tag_ids(self, tag_ids, limit=20):
+        """
+        Find the tags which co-occur most frequently with the given tags.
+        The score of a tag is the sum of its counts with the given tags.
+        :param tag_ids: the identifiers of the query tags
+        :param limit: the maximal number of the resulted tags
+        :return: list of (tag identifier, score) pairs in descending score order
+        """
+        query_tag_ids = set(tag_ids)
+        scores = {}
+        for tag_id in query_tag_ids:
+            for other_tag_id, count in self._counts.get(tag_id, {}).items():
+                if other_tag_id not in query_tag_ids:
+                    scores[other_tag_id] = scores.get(other_tag_id, 0) + count
+        return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+
+    def count_pairs(self):
+        """
+        Count the stored tag pairs.
+        :return: a non-negative integer value
+        """
+        return self._pair_count
+
+    def calc_memory_usage(self):
+        """
+        Estimate the memory usage of the matrix.
+        The keys and values are small integers, so only the containers are counted.
+        :return: the estimated size in bytes
+        """
+        size = self._counts.calc_memory_usage()
+        for row in self._counts.values():
+            size += sys.getsizeof(row)
+        return size
+
+    def _increment(self, tag_id, other_tag_id):
+        row = self._get_mutable_row(tag_id)
+        count = row.get(other_tag_id, 0)
+        if count == 0:
+            self._pair_count += 1
+        row[other_tag_id] = count + 1
+        self._get_mutable_row(other_tag_id)[tag_id] = count + 1
+
+    def _decrement(self, tag_id, other_tag_id):
+        row = self._counts.get(tag_id)
+        if row is None or other_tag_id not in row:
+            return
+        count = row[other_tag_id] - 1
+        row = self._counts.get_mutable(tag_id)
+        other_row = self._counts.get_mutable(other_tag_id)
+        if count > 0:
+            row[other_tag_id] = count
+            other_row[tag_id] = count
+        else:
+            del row[other_tag_id]
+            del other_row[tag_id]
+            if not row:
+                del self._counts[tag_id]
+            if not other_row:
+                del self._counts[other_tag_id]
+            self._pair_count -= 1
+
+    def _prune(self):
+        """Drop the least frequent pairs until the matrix fits into three quarters of the limit."""
+        target = self._max_pairs * 3 // 4
+        threshold = 1
+        while self._pair_count > target:
+            for tag_id in list(self._counts):
+                if tag_id not in self._counts:
+                    continue
+                row = self._counts.get_mutable(tag_id)
+                for other_tag_id in [key for key, count in row.items() if count <= threshold]:
+                    if tag_id < other_tag_id:
+                        self._pair_count -= 1
+                    del row[other_tag_id]
+                if not row:
+                    del self._counts[tag_id]
+            threshold += 1
+        self._is_exact = False
+
+    def _get_mutable_row(self, tag_id):
+        if tag_id in self._counts:
+            return self._counts.get_mutable(tag_id)
+        row = self._counts[tag_id] = {}
+        return row
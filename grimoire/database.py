@@ -2,22 +2,38 @@
 Simple in-memory database implementation for tagging
 """
 
-from grimoire.context import Context
+from grimoire.context import MEMORY_SAMPLE_SIZE, Context, ContextSnapshot
+from grimoire.cooccurrence import Cooccurrence
+from grimoire.fuzzy import SymmetricDeleteIndex
 from grimoire.logger import Logger
 
 
+MAX_TAG_NAME_DISTANCE = 2
+
+
 class Database(Context):
     """Database for tagging"""
 
-    def __init__(self, path='/tmp/grimoire.log'):
-        super(Database, self).__init__()
+    def __init__(self, path='/tmp/grimoire.log', max_cooccurrence_pairs=1000000, progress=None, document_table=None):
+        """
+        Load the database from the log file.
+        :param path: the path of the log file
+        :param max_cooccurrence_pairs: the maximal number of the stored tag pairs
+        :param progress: function which is called with the read and the total byte counts of the log during the load
+        :param document_table: an empty DocumentTable for the columnar storage of the documents
+        :return: None
+        """
+        super(Database, self).__init__(document_table)
         self._logger = Logger(path)
         self._logger.disable_logging()
         self._last_document_id = 0
         self._last_tag_id = 0
-        self._logger.restore_context(self)
-        self._last_document_id = self.calc_last_document_id()
-        self._last_tag_id = self.calc_last_tag_id()
+        self._cooccurrence = Cooccurrence(max_cooccurrence_pairs)
+        self._tag_name_index = None
+        self._is_restoring = True
+        self._logger.restore_context(self, progress)
+        self._is_restoring = False
+        self._rebuild_cooccurrence()
         self._logger.enable_logging()
 
     def generate_document_id(self):
@@ -36,6 +52,53 @@ class Database(Context):
         self._last_tag_id += 1
         return self._last_tag_id
 
+    def restore_id_counters(self, last_document_id, last_tag_id):
+        """
+        Raise the identifier counters to the given high-water marks.
+        The identifiers of the destroyed objects are never generated again.
+        :param last_document_id: the largest document identifier which has ever been used
+        :param last_tag_id: the largest tag identifier which has ever been used
+        :return: None
+        """
+        super(Database, self).restore_id_counters(last_document_id, last_tag_id)
+        self._last_document_id = max(self._last_document_id, last_document_id)
+        self._last_tag_id = max(self._last_tag_id, last_tag_id)
+        self.save_operation('restore_id_counters', last_document_id=last_document_id, last_tag_id=last_tag_id)
+
+    def get_id_counters(self):
+        """
+        Get the high-water marks of the identifiers.
+        :return: (last document identifier, last tag identifier) pair
+        """
+        return self._last_document_id, self._last_tag_id
+
+    def compact_log(self):
+        """
+        Replace the log file with the operations which create the current state.
+        The compacted log starts with the identifier counters as header.
+        :return: None
+        """
+        operations = [{
+            'method': 'restore_id_counters',
+            'last_document_id': self._last_document_id,
+            'last_tag_id': self._last_tag_id
+        }]
+        for document_id in sorted(self.get_all_document_ids()):
+            document = self.get_document(document_id)
+            operations.append({
+                'method': 'create_document',
+                'id': document.id,
+                'name': document.name,
+                'type': document.type,
+                'path': document.path
+            })
+        for tag in self.find_tags([]):
+            operations.append({'method': 'create_tag', 'id': tag.id, 'name': tag.name})
+        for document_id in sorted(self.get_all_document_ids()):
+            for tag_id in sorted(self.get_document_tag_ids(document_id)):
+                operations.append({'method': 'create_relation', 'document_id': document_id, 'tag_id': tag_id})
+        self._logger.rewrite(operations)
+
     def save_operation(self, method, **arguments):
         """
         Save the operation to file via the logger.
@@ -51,8 +114,10 @@ class Database(Context):
         Create a new document for the database.
         :return: the created document object
         """
-        document_id = self.generate_document_id()
-        arguments['id'] = document_id
+        if self._is_restoring and 'id' in arguments:
+            self._last_document_id = max(self._last_document_id, arguments['id'])
+        else:
+            arguments['id'] = self.generate_document_id()
         document = super(Database, self).create_document(**arguments)
         self.save_operation('create_document', **arguments)
         return document
@@ -70,7 +135,12 @@ class Database(Context):
         Destroy the given document.
         :return: None
         """
+        tag_ids = set()
+        if self.has_document(arguments.get('id')):
+            tag_ids = set(self.get_document_tag_ids(arguments['id']))
         super(Database, self).destroy_document(**arguments)
+        if not self._is_restoring:
+            self._cooccurrence.remove_document(tag_ids)
         self.save_operation('destroy_document', **arguments)
 
     def create_tag(self, **arguments):
@@ -78,9 +148,13 @@ class Database(Context):
         Create a new tag.
         :return: None
         """
-        tag_id = self.generate_tag_id()
-        arguments['id'] = tag_id
+        if self._is_restoring and 'id' in arguments:
+            self._last_tag_id = max(self._last_tag_id, arguments['id'])
+        else:
+            arguments['id'] = self.generate_tag_id()
         tag = super(Database, self).create_tag(**arguments)
+        if self._tag_name_index is not None:
+            self._tag_name_index.add(tag.name)
         self.save_operation('create_tag', **arguments)
         return tag
 
@@ -89,7 +163,11 @@ class Database(Context):
         Update an existing tag.
         :return: None
         """
+        old_name = self.get_tag(arguments['id']).name if self.has_tag(arguments.get('id')) else None
         super(Database, self).update_tag(**arguments)
+        if self._tag_name_index is not None:
+            self._tag_name_index.remove(old_name)
+            self._tag_name_index.add(arguments['name'])
         self.save_operation('update_tag', **arguments)
 
     def destroy_tag(self, **arguments):
@@ -97,7 +175,12 @@ class Database(Context):
         Destroy the given tag.
         :return: None
         """
+        name = self.get_tag(arguments['id']).name if self.has_tag(arguments.get('id')) else None
         super(Database, self).destroy_tag(**arguments)
+        if self._tag_name_index is not None:
+            self._tag_name_index.remove(name)
+        if not self._is_restoring:
+            self._cooccurrence.drop_tag(arguments['id'])
         self.save_operation('destroy_tag', **arguments)
 
     def find_similar_tags(self, tag_name, limit=20):
@@ -109,19 +192,39 @@ class Database(Context):
         """
         name = tag_name.lower()
         similar_tags = []
-        for _, tag in self._tags.items():
+        for tag in self.find_tags([]):
             if name in tag.name.lower():
                 similar_tags.append(tag.name)
                 if len(similar_tags) == limit:
                     return similar_tags
         return similar_tags
 
+    def find_close_tags(self, tag_name, max_distance=1, limit=20):
+        """
+        Find tags with names within the given edit distance.
+        The name index is built at the first call and maintained on the tag changes.
+        :param tag_name: the searched tag name
+        :param max_distance: the maximal number of character edits, at most MAX_TAG_NAME_DISTANCE
+        :param limit: the maximal number of the resulted tag names
+        :return: the list of tag names in ascending distance order
+        :raises ValueError: for a negative or too large distance, whose index would be too large
+        """
+        if not 0 <= max_distance <= MAX_TAG_NAME_DISTANCE:
+            raise ValueError('The maximal distance should be between 0 and {}!'.format(MAX_TAG_NAME_DISTANCE))
+        if self._tag_name_index is None or self._tag_name_index.max_distance < max_distance:
+            self._tag_name_index = self._create_tag_name_index(max(max_distance, 1))
+        return [name for _, name in self._tag_name_index.search(tag_name, max_distance)[:limit]]
+
     def create_relation(self, **arguments):
         """
         Create a new relation.
         :return: None
         """
+        is_new = not self.has_relation(**arguments)
         super(Database, self).create_relation(**arguments)
+        if is_new and not self._is_restoring:
+            document_id = arguments['document_id']
+            self._cooccurrence.add_tag(arguments['tag_id'], self.get_document_tag_ids(document_id))
         self.save_operation('create_relation', **arguments)
 
     def destroy_relation(self, **arguments):
@@ -130,4 +233,121 @@ class Database(Context):
         :return: None
         """
         super(Database, self).destroy_relation(**arguments)
+        if not self._is_restoring:
+            document_id = arguments['document_id']
+            self._cooccurrence.remove_tag(arguments['tag_id'], self.get_document_tag_ids(document_id))
         self.save_operation('destroy_relation', **arguments)
+
+    def count_cooccurrences(self, tag_id, other_tag_id):
+        """
+        Count the documents which are related to both of the tags.
+        :param tag_id: the identifier of the first tag
+        :param other_tag_id: the identifier of the second tag
+        :return: a non-negative integer value
+        """
+        return self._cooccurrence.count(tag_id, other_tag_id)
+
+    def find_cooccurring_tag_ids(self, tag_ids, limit=20):
+        """
+        Find the tags which are the most frequently used together with the given tags.
+        :param tag_ids: the identifiers of the query tags
+        :param limit: the maximal number of the resulted tags
+        :return: list of (tag identifier, score) pairs in descending score order
+        """
+        return self._cooccurrence.find_top_tag_ids(tag_ids, limit)
+
+    def get_cooccurrence_stats(self):
+        """
+        Get the size statistics of the co-occurrence matrix.
+        :return: dictionary with the pair count, the pair limit, the estimated bytes and the exactness
+        """
+        return {
+            'pairs': self._cooccurrence.count_pairs(),
+            'max_pairs': self._cooccurrence.max_pairs,
+            'bytes': self._cooccurrence.calc_memory_usage(),
+            'exact': self._cooccurrence.is_exact()
+        }
+
+    def snapshot(self):
+        """
+        Create a read-only view of the current state in constant time.
+        The co-occurrence matrix and the tag name index are shared with the snapshot like the context storage,
+        so the tag suggestions can also be calculated from the snapshot.
+        The tag name index is built here when it has not been built yet.
+        :return: a DatabaseSnapshot object
+        """
+        if self._tag_name_index is None:
+            self._tag_name_index = self._create_tag_name_index(1)
+        snapshot = DatabaseSnapshot.__new__(DatabaseSnapshot)
+        self._share_state(snapshot)
+        return snapshot
+
+    def memory_stats(self, sample_size=MEMORY_SAMPLE_SIZE):
+        """
+        Estimate the memory usage of the context, the co-occurrence matrix and the fuzzy tag name index.
+        :param sample_size: the maximal number of the measured elements of a container
+        :return: dictionary of the estimated bytes by parts and their sum as 'total'
+        """
+        stats = super(Database, self).memory_stats(sample_size)
+        total = stats.pop('total')
+        stats['cooccurrence'] = self._cooccurrence.calc_memory_usage()
+        stats['fuzzy_tag_index'] = 0
+        if self._tag_name_index is not None:
+            stats['fuzzy_tag_index'] = self._tag_name_index.calc_memory_usage()
+        stats['total'] = total + stats['cooccurrence'] + stats['fuzzy_tag_index']
+        return stats
+
+    def _rebuild_cooccurrence(self):
+        document_ids = self.get_all_document_ids()
+        self._cooccurrence.rebuild(self.get_document_tag_ids(document_id) for document_id in document_ids)
+
+    def _create_tag_name_index(self, max_distance):
+        tag_name_index = SymmetricDeleteIndex(max_distance)
+        for tag in self.find_tags([]):
+            tag_name_index.add(tag.name)
+        return tag_name_index
+
+    def _share_state(self, snapshot):
+        super(Database, self)._share_state(snapshot)
+        snapshot._logger = None
+        snapshot._last_document_id = self._last_document_id
+        snapshot._last_tag_id = self._last_tag_id
+        snapshot._cooccurrence = self._cooccurrence.snapshot()
+        snapshot._tag_name_index = self._tag_name_index.snapshot()
+        snapshot._is_restoring = False
+
+
+class DatabaseSnapshot(ContextSnapshot, Database):
+    """
+    Read-only view of a database at the time of its snapshot.
+    It has the query methods of the database, including the tag suggestions and the co-occurrences.
+    """
+
+    def generate_document_id(self):
+        raise ValueError('The snapshot is read-only!')
+
+    def generate_tag_id(self):
+        raise ValueError('The snapshot is read-only!')
+
+    def compact_log(self):
+        raise ValueError('The snapshot is read-only!')
+
+    def save_operation(self, method, **arguments):
+        raise ValueError('The snapshot is read-only!')
+
+    def find_close_tags(self, tag_name, max_distance=1, limit=20):
+        """
+        Find tags with names within the given edit distance.
+        The shared name index is used when it supports the distance, else a private index is built for the call.
+        :param tag_name: the searched tag name
+        :param max_distance: the maximal number of character edits, at most MAX_TAG_NAME_DISTANCE
+        :param limit: the maximal number of the resulted tag names
+        :return: the list of tag names in ascending distance order
+        :raises ValueError: for a negative or too large distance, whose index would be too large
+        """
+        if not 0 <= max_distance <= MAX_TAG_NAME_DISTANCE:
+            raise ValueError('The maximal distance should be between 0 and {}!'.format(MAX_TAG_NAME_DISTANCE))
+        tag_name_index = self._tag_name_index
+        if tag_name_index.max_distance < max_distance:
+            tag_name_index = self._create_tag_name_index(max_distance)
+        return [name for _, name in tag_name_index.search(tag_name, max_distance)[:limit]]
@@ -2,10 +2,14 @@
 Document class definition
 """
 
+import sys
+
 
 class Document(object):
     """Represents a document"""
 
+    __slots__ = ('_id', '_name', '_type', '_path')
+
     def __init__(self, id, name, type, path):
         if '\n' in name:
             raise ValueError('The document name cannot contain newline character!')
@@ -15,7 +19,7 @@ class Document(object):
             raise ValueError('The document path cannot contain newline character!')
         self._id = id
         self._name = name
-        self._type = type
+        self._type = sys.intern(type)
         self._path = path
 
     @property
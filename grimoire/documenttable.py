@@ -0,0 +1,273 @@
+"""
+Columnar storage of the documents
+"""
+
+from array import array
+import itertools
+import operator
+import sys
+
+from grimoire.document import Document
+
+
+MISSING = -1
+MIN_COMPACTION_SIZE = 1024
+
+
+class StringTable(object):
+    """Append-only table of strings without newline characters, stored as UTF-8 lines"""
+
+    def __init__(self):
+        self._data = bytearray()
+        self._offsets = array('q', [0])
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def add(self, value):
+        """
+        Append a string to the table.
+        :param value: a string without newline character
+        :return: the index of the string
+        """
+        self._data += value.encode('utf-8')
+        self._data += b'\n'
+        self._offsets.append(len(self._data))
+        return len(self._offsets) - 2
+
+    def get(self, index):
+        """
+        Get a string by its index.
+        :param index: the index of the string
+        :return: the string value
+        """
+        return self._data[self._offsets[index]:self._offsets[index + 1] - 1].decode('utf-8')
+
+    def get_all(self):
+        """
+        Decode all strings at once.
+        :return: list of the strings in index order
+        """
+        return self._data.decode('utf-8').split('\n')[:-1]
+
+    def copy(self):
+        """
+        Copy the table.
+        :return: a StringTable object
+        """
+        table = StringTable()
+        table._data = bytearray(self._data)
+        table._offsets = array('q', self._offsets)
+        return table
+
+    def calc_memory_usage(self):
+        """
+        Calculate the size of the buffers.
+        :return: the size in bytes
+        """
+        return len(self._data) + self._offsets.itemsize * len(self._offsets)
+
+
+class DocumentTable(object):
+    """
+    Document store with one array per column, indexed directly by the document identifiers.
+    It can replace the document dictionary of a Context.
+    The identifiers should be dense non-negative integers, because the arrays grow up to the largest identifier.
+    The types are stored as small integer codes, the paths as a shared directory prefix and a file name,
+    which refers to the string of the document name when they are equal.
+    The Document objects are created on demand.
+    The joined paths are cached at the first path scan and kept up to date by the changes,
+    so the repeated scans do not rebuild the path strings.
+    """
+
+    def __init__(self):
+        self._type_codes = array('i')
+        self._name_indices = array('q')
+        self._prefix_codes = array('i')
+        self._base_name_indices = array('q')
+        self._types = []
+        self._type_codes_by_type = {}
+        self._prefixes = ['']
+        self._prefix_codes_by_prefix = {'': 0}
+        self._strings = StringTable()
+        self._count = 0
+        self._paths = None
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, id):
+        return isinstance(id, int) and 0 <= id < len(self._type_codes) and self._type_codes[id] != MISSING
+
+    def __iter__(self):
+        return itertools.compress(itertools.count(), map(MISSING.__ne__, self._type_codes))
+
+    def __getitem__(self, id):
+        if id not in self:
+            raise KeyError(id)
+        name = self._strings.get(self._name_indices[id])
+        base_name_index = self._base_name_indices[id]
+        if base_name_index != self._name_indices[id]:
+            base_name = self._strings.get(base_name_index)
+        else:
+            base_name = name
+        path = self._prefixes[self._prefix_codes[id]] + base_name
+        return Document(id, name, self._types[self._type_codes[id]], path)
+
+    def __setitem__(self, id, document):
+        if not isinstance(id, int) or isinstance(id, bool) or id < 0:
+            raise ValueError('The document table needs non-negative integer identifiers!')
+        if id != document.id:
+            raise ValueError('The identifier of the document does not match!')
+        if id not in self:
+            self._ensure_size(id + 1)
+            self._count += 1
+        name = document.name
+        directory_path, separator, base_name = document.path.rpartition('/')
+        self._type_codes[id] = self._get_type_code(document.type)
+        self._prefix_codes[id] = self._get_prefix_code(directory_path + separator)
+        name_index = self._strings.add(name)
+        self._name_indices[id] = name_index
+        if base_name == name:
+            self._base_name_indices[id] = name_index
+        else:
+            self._base_name_indices[id] = self._strings.add(base_name)
+        if self._paths is not None:
+            self._paths.extend([None] * (len(self._type_codes) - len(self._paths)))
+            self._paths[id] = document.path
+        if len(self._strings) > 4 * self._count + MIN_COMPACTION_SIZE:
+            self.compact()
+
+    def items(self):
+        """
+        Iterate over the documents.
+        :return: generator of (identifier, Document) pairs
+        """
+        for id in self:
+            yield id, self[id]
+
+    def pop(self, id):
+        """
+        Remove the document.
+        :param id: the identifier of the document
+        :return: the removed Document object
+        :raises KeyError: for missing document
+        """
+        document = self[id]
+        self._type_codes[id] = MISSING
+        self._name_indices[id] = MISSING
+        self._base_name_indices[id] = MISSING
+        self._prefix_codes[id] = 0
+        self._count -= 1
+        if self._paths is not None:
+            self._paths[id] = None
+        return document
+
+    def iterate_paths(self):
+        """
+        Iterate over the paths of all documents.
+        The first scan joins the paths with a single decoding of the string table and caches them.
+        :return: iterator of the document paths in identifier order
+        """
+        if self._paths is None:
+            strings = self._strings.get_all()
+            strings.append('')
+            prefixes = map(self._prefixes.__getitem__, self._prefix_codes)
+            base_names = map(strings.__getitem__, self._base_name_indices)
+            self._paths = [
+                path if type_code != MISSING else None
+                for path, type_code in zip(map(operator.add, prefixes, base_names), self._type_codes)
+            ]
+        return itertools.compress(self._paths, map(MISSING.__ne__, self._type_codes))
+
+    def collect_paths(self):
+        """
+        Collect the paths of all documents.
+        :return: list of the document paths in identifier order
+        """
+        return list(self.iterate_paths())
+
+    def compact(self):
+        """
+        Drop the strings of the updated and removed documents from the string table.
+        :return: None
+        """
+        strings = StringTable()
+        for id in self:
+            name_index = self._name_indices[id]
+            base_name_index = self._base_name_indices[id]
+            self._name_indices[id] = strings.add(self._strings.get(name_index))
+            if base_name_index == name_index:
+                self._base_name_indices[id] = self._name_indices[id]
+            else:
+                self._base_name_indices[id] = strings.add(self._strings.get(base_name_index))
+        self._strings = strings
+
+    def snapshot(self):
+        """
+        Copy the table for a context snapshot.
+        The columns are flat buffers, so the copy is fast, but it needs linear time unlike the ChunkedMap snapshots.
+        :return: a DocumentTable object
+        """
+        table = DocumentTable()
+        table._type_codes = array('i', self._type_codes)
+        table._name_indices = array('q', self._name_indices)
+        table._prefix_codes = array('i', self._prefix_codes)
+        table._base_name_indices = array('q', self._base_name_indices)
+        table._types = list(self._types)
+        table._type_codes_by_type = dict(self._type_codes_by_type)
+        table._prefixes = list(self._prefixes)
+        table._prefix_codes_by_prefix = dict(self._prefix_codes_by_prefix)
+        table._strings = self._strings.copy()
+        table._count = self._count
+        if self._paths is not None:
+            table._paths = list(self._paths)
+        return table
+
+    def calc_memory_usage(self):
+        """
+        Estimate the memory usage of the columns, the string table and the cached paths.
+        The type, prefix and path strings are counted by their lengths.
+        :return: the size in bytes
+        """
+        size = self._strings.calc_memory_usage()
+        for column in (self._type_codes, self._name_indices, self._prefix_codes, self._base_name_indices):
+            size += column.itemsize * len(column)
+        for value in self._types + self._prefixes:
+            size += len(value)
+        if self._paths is not None:
+            size += sys.getsizeof(self._paths)
+            size += sum(len(path) for path in self._paths if path is not None)
+        return size
+
+    def calc_string_memory_usage(self):
+        """
+        Calculate the size of the string table of the names and the file names.
+        :return: the size in bytes
+        """
+        return self._strings.calc_memory_usage()
+
+    def _get_type_code(self, type):
+        try:
+            return self._type_codes_by_type[type]
+        except KeyError:
+            self._type_codes_by_type[type] = len(self._types)
+            self._types.append(type)
+            return len(self._types) - 1
+
+    def _get_prefix_code(self, prefix):
+        try:
+            return self._prefix_codes_by_prefix[prefix]
+        except KeyError:
+            self._prefix_codes_by_prefix[prefix] = len(self._prefixes)
+            self._prefixes.append(prefix)
+            return len(self._prefixes) - 1
+
+    def _ensure_size(self, size):
+        missing_count = size - len(self._type_codes)
+        if missing_count <= 0:
+            return
+        self._type_codes.extend(array('i', [MISSING]) * missing_count)
+        self._name_indices.extend(array('q', [MISSING]) * missing_count)
+        self._prefix_codes.extend(array('i', [0]) * missing_count)
+        self._base_name_indices.extend(array('q', [MISSING]) * missing_count)
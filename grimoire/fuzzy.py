@@ -0,0 +1,173 @@
+"""
+Typo-tolerant lookup of names with symmetric delete dictionary
+"""
+
+import sys
+
+from grimoire.chunkedmap import ChunkedMap
+
+
+def calc_edit_distance(first, second, max_distance=None):
+    """
+    Calculate the edit distance of the strings.
+    It counts character insertions, deletions, substitutions and adjacent transpositions.
+    :param first: the first string
+    :param second: the second string
+    :param max_distance: stop the calculation when the distance surely exceeds this value
+    :return: the distance, or max_distance + 1 when it exceeds max_distance
+    """
+    if max_distance is not None and abs(len(first) - len(second)) > max_distance:
+        return max_distance + 1
+    if len(first) < len(second):
+        first, second = second, first
+    if not second:
+        return len(first)
+    before_previous_row = None
+    previous_row = list(range(len(second) + 1))
+    for first_index in range(1, len(first) + 1):
+        first_char = first[first_index - 1]
+        current_row = [first_index]
+        for second_index in range(1, len(second) + 1):
+            second_char = second[second_index - 1]
+            distance = min(
+                previous_row[second_index] + 1,
+                current_row[second_index - 1] + 1,
+                previous_row[second_index - 1] + (first_char != second_char)
+            )
+            if (before_previous_row is not None and second_index > 1
+                    and first_char == second[second_index - 2] and first[first_index - 2] == second_char):
+                distance = min(distance, before_previous_row[second_index - 2] + 1)
+            current_row.append(distance)
+        if max_distance is not None and min(current_row) > max_distance:
+            return max_distance + 1
+        before_previous_row = previous_row
+        previous_row = current_row
+    return previous_row[-1]
+
+
+class SymmetricDeleteIndex(object):
+    """
+    Index of the names by their deletion variants.
+    The names and the variants are stored in ChunkedMaps, so a snapshot of the index shares the unchanged parts.
+    """
+
+    def __init__(self, max_distance=1, prefix_length=8):
+        """
+        Construct an empty index.
+        :param max_distance: the maximal edit distance which can be searched
+        :param prefix_length: the length of the indexed name prefixes, which bounds the memory usage
+        :return: None
+        """
+        if max_distance < 0:
+            raise ValueError('The maximal distance cannot be negative!')
+        if prefix_length <= max_distance:
+            raise ValueError('The prefix should be longer than the maximal distance!')
+        self._max_distance = max_distance
+        self._prefix_length = prefix_length
+        self._names = ChunkedMap()
+        self._variants = ChunkedMap()
+
+    @property
+    def max_distance(self):
+        return self._max_distance
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def snapshot(self):
+        """
+        Create a read-only index with the current names in constant time.
+        :return: a SymmetricDeleteIndex object
+        """
+        snapshot = SymmetricDeleteIndex(self._max_distance, self._prefix_length)
+        snapshot._names = self._names.snapshot()
+        snapshot._variants = self._variants.snapshot()
+        return snapshot
+
+    def add(self, name):
+        """
+        Add a name to the index.
+        :param name: the inserted name
+        :return: None
+        """
+        if name in self._names:
+            return
+        self._names[name] = None
+        for variant in self._generate_variants(name):
+            self._variants[variant] = self._variants.get(variant, ()) + (name,)
+
+    def remove(self, name):
+        """
+        Remove a name from the index.
+        :param name: the removed name
+        :return: None
+        :raises ValueError: for missing name
+        """
+        if name not in self._names:
+            raise ValueError('The name is not in the index!')
+        self._names.pop(name)
+        for variant in self._generate_variants(name):
+            names = tuple(other_name for other_name in self._variants[variant] if other_name != name)
+            if names:
+                self._variants[variant] = names
+            else:
+                del self._variants[variant]
+
+    def search(self, name, max_distance=None):
+        """
+        Search the names within the given distance.
+        :param name: the searched name
+        :param max_distance: the maximal edit distance, at most the maximal distance of the index
+        :return: list of (distance, name) pairs in ascending order
+        :raises ValueError: when the distance is greater than the indexed one
+        """
+        if max_distance is None:
+            max_distance = self._max_distance
+        if max_distance > self._max_distance:
+            raise ValueError('The distance is greater than the indexed one!')
+        candidates = set()
+        for variant in self._generate_variants(name, max_distance):
+            candidates.update(self._variants.get(variant, ()))
+        results = []
+        for candidate in candidates:
+            distance = calc_edit_distance(name, candidate, max_distance)
+            if distance <= max_distance:
+                results.append((distance, candidate))
+        results.sort()
+        return results
+
+    def count_variants(self):
+        """
+        Count the indexed deletion variants.
+        :return: a non-negative integer value
+        """
+        return len(self._variants)
+
+    def calc_memory_usage(self):
+        """
+        Estimate the memory usage of the index.
+        The name strings are shared with the tags, so they are not counted.
+        :return: the estimated size in bytes
+        """
+        size = self._names.calc_memory_usage() + self._variants.calc_memory_usage()
+        for variant, names in self._variants.items():
+            size += sys.getsizeof(variant) + sys.getsizeof(names)
+        return size
+
+    def _generate_variants(self, name, max_distance=None):
+        if max_distance is None:
+            max_distance = self._max_distance
+        prefix = name[:self._prefix_length]
+        variants = {prefix}
+        layer = {prefix}
+        for _ in range(max_distance):
+            next_layer = set()
+            for word in layer:
+                for index in range(len(word)):
+                    next_layer.add(word[:index] + word[index + 1:])
+            variants |= next_layer
+            layer = next_layer
+        return variants
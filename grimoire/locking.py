@@ -0,0 +1,185 @@
+"""
+Share a database between threads
+"""
+
+import contextlib
+import threading
+
+
+WRITE_METHOD_PREFIXES = ('create_', 'update_', 'destroy_', 'restore_', 'generate_')
+WRITE_METHODS = {'compact_log', 'save_operation', 'find_close_tags', 'snapshot'}
+
+
+class ReadWriteLock(object):
+    """
+    Lock which allows many readers or one writer.
+    The waiting writers are preferred, so the readers cannot starve them.
+    The locks are reentrant, and the writer can also read, but a reader cannot become a writer.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._reader_count = 0
+        self._waiting_writer_count = 0
+        self._writer = None
+        self._write_depth = 0
+        self._local = threading.local()
+
+    def acquire_read(self):
+        """
+        Wait until there is no writer, then start reading.
+        :return: None
+        """
+        depth = getattr(self._local, 'read_depth', 0)
+        if depth == 0 and self._writer != threading.get_ident():
+            with self._condition:
+                while self._writer is not None or self._waiting_writer_count > 0:
+                    self._condition.wait()
+                self._reader_count += 1
+            self._local.is_counted = True
+        elif depth == 0:
+            self._local.is_counted = False
+        self._local.read_depth = depth + 1
+
+    def release_read(self):
+        """
+        Finish reading.
+        :return: None
+        :raises RuntimeError: when the thread does not read
+        """
+        depth = getattr(self._local, 'read_depth', 0)
+        if depth == 0:
+            raise RuntimeError('The read lock is not held!')
+        self._local.read_depth = depth - 1
+        if depth == 1 and self._local.is_counted:
+            with self._condition:
+                self._reader_count -= 1
+                if self._reader_count == 0:
+                    self._condition.notify_all()
+
+    def acquire_write(self):
+        """
+        Wait until the readers and the other writer have finished, then start writing.
+        :return: None
+        :raises RuntimeError: when the thread holds a read lock only
+        """
+        ident = threading.get_ident()
+        with self._condition:
+            if self._writer == ident:
+                self._write_depth += 1
+                return
+            if getattr(self._local, 'read_depth', 0) > 0:
+                raise RuntimeError('The read lock cannot be upgraded to a write lock!')
+            self._waiting_writer_count += 1
+            try:
+                while self._writer is not None or self._reader_count > 0:
+                    self._condition.wait()
+            finally:
+                self._waiting_writer_count -= 1
+            self._writer = ident
+            self._write_depth = 1
+
+    def release_write(self):
+        """
+        Finish writing.
+        :return: None
+        :raises RuntimeError: when the thread does not write
+        """
+        with self._condition:
+            if self._writer != threading.get_ident():
+                raise RuntimeError('The write lock is not held!')
+            self._write_depth -= 1
+            if self._write_depth == 0:
+                self._writer = None
+                self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def read(self):
+        """Hold the read lock in the block."""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextlib.contextmanager
+    def write(self):
+        """Hold the write lock in the block."""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+class ThreadSafeDatabase(object):
+    """
+    Wrapper which makes the public methods of a database safe to call from several threads.
+    The queries run concurrently, the changes one at a time. A change and its log record are written
+    under the same write lock, so the order of the log records is the order of the changes.
+    The resulted sets are copied, because the database may change them after the lock has been released.
+    Long queries can run on a snapshot of the database without holding the lock.
+    """
+
+    def __init__(self, database):
+        """
+        Wrap the database.
+        The database should not be used directly while it is shared.
+        :param database: a Context or Database object
+        :return: None
+        """
+        self._database = database
+        self._lock = ReadWriteLock()
+
+    @property
+    def database(self):
+        return self._database
+
+    def read_lock(self):
+        """
+        Hold the read lock for several queries, which see the same state.
+        :return: a context manager
+        """
+        return self._lock.read()
+
+    def write_lock(self):
+        """
+        Hold the write lock for several changes, which are seen together by the readers.
+        :return: a context manager
+        """
+        return self._lock.write()
+
+    def __getattr__(self, name):
+        attribute = getattr(self._database, name)
+        if name.startswith('_') or not callable(attribute):
+            return attribute
+        if is_write_method(name):
+            method = self._wrap(attribute, self._lock.write)
+        else:
+            method = self._wrap(attribute, self._lock.read)
+        self.__dict__[name] = method
+        return method
+
+    @staticmethod
+    def _wrap(method, lock):
+        def locked_method(*args, **kwargs):
+            with lock():
+                result = method(*args, **kwargs)
+                if isinstance(result, set):
+                    result = set(result)
+                return result
+
+        locked_method.__name__ = method.__name__
+        locked_method.__doc__ = method.__doc__
+        return locked_method
+
+
+def is_write_method(name):
+    """
+    Check that the database method can change the state.
+    The close tag search is a change, because it builds its index at the first call.
+    The snapshot is a change, because it marks the storage as shared.
+    :param name: the name of the method
+    :return: True for the changing methods, else False
+    """
+    return name.startswith(WRITE_METHOD_PREFIXES) or name in WRITE_METHODS
@@ -0,0 +1,271 @@
+"""
+Analyze an operation log without loading it into a database
+
+Run from the repository root:
+
+    python -m grimoire.loganalyzer /tmp/importer/grimoire.log
+
+The log is read in one pass. The statistics of the operations and their growth need constant memory.
+The dead records depend on the whole history, so they are found by tracking the live identifiers
+and relations as integers only, which is much smaller than the loaded database.
+It can be switched off with `--no-liveness`.
+The tracked relations also show the heaviest records of the replay: destroying a document or a tag
+removes all of its relations, so their cost depends on the history and not on the size of the record.
+"""
+
+import argparse
+import heapq
+import json
+
+
+HEAVIEST_RECORD_COUNT = 10
+PERIOD_LENGTHS = {'year': 4, 'month': 7, 'day': 10, 'hour': 13}
+ALWAYS_DEAD_METHODS = {'update_document', 'destroy_document', 'update_tag', 'destroy_tag', 'destroy_relation'}
+COMPACTION_HEADER_SIZE = 100
+
+
+class LogAnalyzer(object):
+    """Collects the statistics of the records of an operation log"""
+
+    def __init__(self, period='day', track_liveness=True, heaviest_record_count=HEAVIEST_RECORD_COUNT):
+        """
+        Create an analyzer without records.
+        :param period: the period of the growth statistics, one of year, month, day or hour
+        :param track_liveness: find the dead records, which needs memory for the live identifiers and relations
+        :param heaviest_record_count: the number of the reported heaviest records, which needs liveness
+        :return: None
+        :raises ValueError: for unknown period
+        """
+        if period not in PERIOD_LENGTHS:
+            raise ValueError('Unknown period "{}"!'.format(period))
+        self._period_length = PERIOD_LENGTHS[period]
+        self._track_liveness = track_liveness
+        self._heaviest_record_count = heaviest_record_count
+        self._record_count = 0
+        self._byte_count = 0
+        self._method_counts = {}
+        self._method_byte_counts = {}
+        self._periods = {}
+        self._heaviest_records = []
+        self._document_ids = set()
+        self._tag_ids = set()
+        self._document_tag_ids = {}
+        self._tag_document_ids = {}
+        self._relation_count = 0
+
+    def analyze_file(self, path):
+        """
+        Analyze the records of a log file.
+        :param path: the path of the log file
+        :return: None
+        """
+        with open(path, 'rb') as log_file:
+            for line in log_file:
+                if line.strip():
+                    self.analyze_line(line)
+
+    def analyze_line(self, line):
+        """
+        Analyze a record of the log.
+        :param line: the JSON record as bytes or string
+        :return: None
+        :raises ValueError: for invalid JSON or a record without method
+        """
+        operation = json.loads(line)
+        method = operation.get('method')
+        if method is None:
+            raise ValueError('The record {} has no method!'.format(self._record_count + 1))
+        size = len(line)
+        self._record_count += 1
+        if self._track_liveness:
+            removed_relation_count = self._apply(method, operation)
+            if method in ('destroy_document', 'destroy_tag'):
+                self._add_heaviest_record((removed_relation_count, self._record_count, method, size))
+        self._byte_count += size
+        self._method_counts[method] = self._method_counts.get(method, 0) + 1
+        self._method_byte_counts[method] = self._method_byte_counts.get(method, 0) + size
+        timestamp = operation.get('timestamp')
+        if timestamp is not None:
+            period = self._periods.setdefault(timestamp[:self._period_length], {'records': 0, 'bytes': 0})
+            period['records'] += 1
+            period['bytes'] += size
+
+    def get_report(self):
+        """
+        Collect the statistics.
+        :return: JSON compatible dictionary
+        """
+        report = {
+            'records': self._record_count,
+            'bytes': self._byte_count,
+            'methods': {
+                method: {'records': count, 'bytes': self._method_byte_counts[method]}
+                for method, count in sorted(self._method_counts.items())
+            },
+            'periods': [
+                dict(period=period, **statistics) for period, statistics in sorted(self._periods.items())
+            ]
+        }
+        if self._track_liveness:
+            report['live'] = {
+                'documents': len(self._document_ids),
+                'tags': len(self._tag_ids),
+                'relations': self._relation_count
+            }
+            report['dead_records'] = self.count_dead_records()
+            report['compaction'] = self.estimate_compaction()
+            report['heaviest_records'] = [
+                {'line': line_number, 'method': method, 'bytes': size, 'removed_relations': relation_count}
+                for relation_count, line_number, method, size in sorted(self._heaviest_records, reverse=True)
+            ]
+        return report
+
+    def count_dead_records(self):
+        """
+        Count the records which are not needed to restore the final state.
+        The updates are dead, because the compaction writes the final state of the documents and the tags.
+        The compaction keeps one restore_id_counters record for the identifier counters.
+        :return: dictionary of the dead record counts by methods
+        """
+        live_counts = {
+            'create_document': len(self._document_ids),
+            'create_tag': len(self._tag_ids),
+            'create_relation': self._relation_count,
+            'restore_id_counters': 1
+        }
+        dead_counts = {}
+        for method, count in sorted(self._method_counts.items()):
+            if method in live_counts:
+                dead_counts[method] = count - live_counts[method]
+            elif method in ALWAYS_DEAD_METHODS:
+                dead_counts[method] = count
+        return dead_counts
+
+    def estimate_compaction(self):
+        """
+        Estimate the size of the compacted log from the average sizes of the create records.
+        :return: dictionary of the current, the estimated compacted and the saved records and bytes
+        """
+        live_counts = {
+            'create_document': len(self._document_ids),
+            'create_tag': len(self._tag_ids),
+            'create_relation': self._relation_count
+        }
+        compacted_records = 1
+        compacted_bytes = COMPACTION_HEADER_SIZE
+        for method, live_count in live_counts.items():
+            count = self._method_counts.get(method, 0)
+            if count > 0:
+                compacted_records += live_count
+                compacted_bytes += live_count * self._method_byte_counts[method] // count
+        return {
+            'records': self._record_count,
+            'bytes': self._byte_count,
+            'compacted_records': compacted_records,
+            'compacted_bytes': compacted_bytes,
+            'saved_records': self._record_count - compacted_records,
+            'saved_bytes': self._byte_count - compacted_bytes
+        }
+
+    def _add_heaviest_record(self, heaviest_record):
+        if len(self._heaviest_records) < self._heaviest_record_count:
+            heapq.heappush(self._heaviest_records, heaviest_record)
+        elif self._heaviest_records and heaviest_record[0] > self._heaviest_records[0][0]:
+            heapq.heapreplace(self._heaviest_records, heaviest_record)
+
+    def _apply(self, method, operation):
+        """
+        Apply a record on the tracked identifiers and relations.
+        :param method: the method of the record
+        :param operation: the decoded record
+        :return: the number of the removed relations
+        """
+        relation_count = self._relation_count
+        if method == 'create_document':
+            self._document_ids.add(operation['id'])
+        elif method == 'destroy_document':
+            document_id = operation['id']
+            self._document_ids.discard(document_id)
+            for tag_id in self._document_tag_ids.pop(document_id, ()):
+                self._tag_document_ids[tag_id].discard(document_id)
+                self._relation_count -= 1
+        elif method == 'create_tag':
+            self._tag_ids.add(operation['id'])
+        elif method == 'destroy_tag':
+            tag_id = operation['id']
+            self._tag_ids.discard(tag_id)
+            for document_id in self._tag_document_ids.pop(tag_id, ()):
+                self._document_tag_ids[document_id].discard(tag_id)
+                self._relation_count -= 1
+        elif method == 'create_relation':
+            document_id = operation['document_id']
+            tag_id = operation['tag_id']
+            tag_ids = self._document_tag_ids.setdefault(document_id, set())
+            if tag_id not in tag_ids:
+                tag_ids.add(tag_id)
+                self._tag_document_ids.setdefault(tag_id, set()).add(document_id)
+                self._relation_count += 1
+        elif method == 'destroy_relation':
+            document_id = operation['document_id']
+            tag_id = operation['tag_id']
+            tag_ids = self._document_tag_ids.get(document_id)
+            if tag_ids is not None and tag_id in tag_ids:
+                tag_ids.remove(tag_id)
+                self._tag_document_ids[tag_id].discard(document_id)
+                self._relation_count -= 1
+        return max(relation_count - self._relation_count, 0)
+
+
+def format_report(report):
+    """
+    Format the report as a human readable text.
+    :param report: the report of a LogAnalyzer
+    :return: the text as a string
+    """
+    lines = ['records: {}, bytes: {}'.format(report['records'], report['bytes']), '', 'operations:']
+    for method, statistics in report['methods'].items():
+        lines.append('  {:24} {:12} records {:14} bytes'.format(method, statistics['records'], statistics['bytes']))
+    if report['periods']:
+        lines.extend(['', 'growth:'])
+        total_records = 0
+        for period in report['periods']:
+            total_records += period['records']
+            lines.append('  {:14} {:12} records {:14} bytes {:12} total records'.format(
+                period['period'], period['records'], period['bytes'], total_records))
+    if 'live' in report:
+        live = report['live']
+        lines.extend(['', 'live: {} documents, {} tags, {} relations'.format(
+            live['documents'], live['tags'], live['relations']), '', 'dead records:'])
+        for method, count in report['dead_records'].items():
+            lines.append('  {:24} {:12}'.format(method, count))
+        compaction = report['compaction']
+        lines.extend(['', 'compaction: {} records, about {} bytes, saving {} records and about {} bytes'.format(
+            compaction['compacted_records'], compaction['compacted_bytes'],
+            compaction['saved_records'], compaction['saved_bytes'])])
+        lines.extend(['', 'heaviest records:'])
+        for record in report['heaviest_records']:
+            lines.append('  line {:10} {:24} {:8} bytes {:10} removed relations'.format(
+                record['line'], record['method'], record['bytes'], record['removed_relations']))
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Analyze a grimoire log file in one pass.')
+    parser.add_argument('log_path', help='the path of the log file')
+    parser.add_argument('--period', choices=sorted(PERIOD_LENGTHS), default='day', help='the period of the growth')
+    parser.add_argument('--no-liveness', action='store_true', help='do not track the dead records')
+    parser.add_argument('--heaviest', type=int, default=HEAVIEST_RECORD_COUNT,
+                        help='the number of the destroyed documents and tags with the most relations')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    arguments = parser.parse_args()
+    analyzer = LogAnalyzer(arguments.period, not arguments.no_liveness, arguments.heaviest)
+    analyzer.analyze_file(arguments.log_path)
+    report = analyzer.get_report()
+    if arguments.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_report(report))
+
+
+if __name__ == '__main__':
+    main()
@@ -4,7 +4,10 @@ Manage the log file
 
 from datetime import datetime
 import json
-import os.path
+import os
+
+
+PROGRESS_INTERVAL = 10000
 
 
 class Logger(object):
@@ -27,14 +30,43 @@ class Logger(object):
                 log_file.write(line)
                 log_file.write('\n')
 
-    def restore_context(self, context):
-        """Restore the context from the log file."""
-        with open(self._path, 'r') as log_file:
-            for line in log_file:
+    def restore_context(self, context, progress=None):
+        """
+        Restore the context from the log file.
+        :param context: the context which replays the operations
+        :param progress: function which is called with the read and the total byte counts
+            after every PROGRESS_INTERVAL operations and at the end of the log
+        :return: None
+        """
+        total_size = os.path.getsize(self._path)
+        read_size = 0
+        with open(self._path, 'rb') as log_file:
+            for index, line in enumerate(log_file, 1):
+                read_size += len(line)
                 operation = json.loads(line)
                 operation.pop('timestamp', None)
                 method = operation.pop("method")
                 getattr(context, method)(**operation)
+                if progress is not None and index % PROGRESS_INTERVAL == 0:
+                    progress(read_size, total_size)
+        if progress is not None:
+            progress(read_size, total_size)
+
+    def rewrite(self, operations):
+        """
+        Replace the content of the log file with the given operations.
+        The new log is written to a temporary file first, which replaces the log at the end.
+        :param operations: iterable of operation dictionaries with 'method' keys
+        :return: None
+        """
+        temporary_path = self._path + '.tmp'
+        timestamp = str(datetime.now())
+        with open(temporary_path, 'w') as log_file:
+            for operation in operations:
+                operation['timestamp'] = timestamp
+                log_file.write(json.dumps(operation))
+                log_file.write('\n')
+        os.replace(temporary_path, self._path)
 
     def disable_logging(self):
         """Disable logging to the log file."""
@@ -0,0 +1,69 @@
+"""
+Print the estimated memory usage of a database loaded from a log file
+
+Run from the repository root:
+
+    python -m grimoire.memorystats /tmp/importer/grimoire.log --tracemalloc
+"""
+
+import argparse
+import os
+import tracemalloc
+
+from grimoire.context import MEMORY_SAMPLE_SIZE
+from grimoire.database import Database
+from grimoire.documenttable import DocumentTable
+
+
+def format_size(size):
+    """
+    Format a size in bytes with a binary unit.
+    :param size: the size in bytes
+    :return: the formatted size as a string
+    """
+    for unit in ['B', 'KiB', 'MiB']:
+        if abs(size) < 1024:
+            return '{:.1f} {}'.format(size, unit)
+        size /= 1024
+    return '{:.1f} GiB'.format(size)
+
+
+def format_stats(stats):
+    """
+    Format the memory statistics as a table.
+    :param stats: dictionary of the sizes in bytes by parts
+    :return: the table as a string
+    """
+    total = stats['total']
+    lines = []
+    for part, size in stats.items():
+        share = 100 * size / total if total > 0 else 0
+        lines.append('{:20} {:>12} {:6.1f} %'.format(part, format_size(size), share))
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Estimate the memory usage of a grimoire log file.')
+    parser.add_argument('log_path', help='the path of the log file')
+    parser.add_argument('--document-table', action='store_true', help='store the documents in a DocumentTable')
+    parser.add_argument('--sample-size', type=int, default=MEMORY_SAMPLE_SIZE, help='the sample size of the estimate')
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help='also measure the allocations of the loading, which is slower')
+    arguments = parser.parse_args()
+    if not os.path.isfile(arguments.log_path):
+        parser.error('The log file "{}" does not exist!'.format(arguments.log_path))
+    if arguments.tracemalloc:
+        tracemalloc.start()
+    document_table = DocumentTable() if arguments.document_table else None
+    database = Database(arguments.log_path, document_table=document_table)
+    print('documents: {}, tags: {}, relations: {}'.format(
+        database.count_documents(), database.count_tags(), database.count_relations()))
+    print(format_stats(database.memory_stats(arguments.sample_size)))
+    if arguments.tracemalloc:
+        traced_size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print('{:20} {:>12}'.format('traced', format_size(traced_size)))
+
+
+if __name__ == '__main__':
+    main()
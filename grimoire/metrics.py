@@ -0,0 +1,296 @@
+"""
+Call counts and latency histograms of the database and the scope
+"""
+
+import bisect
+import inspect
+import json
+import threading
+import time
+
+
+LATENCY_BUCKETS = [
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+]
+RESULT_SIZE_BUCKETS = [0, 1, 10, 100, 1000, 10000, 100000, 1000000]
+RESULT_SIZE_PREFIX = 'find_'
+
+
+class Histogram(object):
+    """Counts the observed values in buckets with upper bounds"""
+
+    __slots__ = ('_bounds', '_counts', '_sum', '_count')
+
+    def __init__(self, bounds):
+        """
+        Create an empty histogram.
+        :param bounds: the increasing upper bounds of the buckets, the values above the last bound are also counted
+        :return: None
+        """
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)
+        self._sum = 0
+        self._count = 0
+
+    @property
+    def sum(self):
+        return self._sum
+
+    @property
+    def count(self):
+        return self._count
+
+    def observe(self, value):
+        """
+        Count a value.
+        :param value: the observed number
+        :return: None
+        """
+        self._counts[bisect.bisect_left(self._bounds, value)] += 1
+        self._sum += value
+        self._count += 1
+
+    def get_cumulative_counts(self):
+        """
+        Get the number of the values which are less than or equal to the bounds.
+        :return: list of (bound, count) pairs, where the last bound is infinity
+        """
+        cumulative_counts = []
+        total = 0
+        for bound, count in zip(self._bounds + [float('inf')], self._counts):
+            total += count
+            cumulative_counts.append((bound, total))
+        return cumulative_counts
+
+    def to_dict(self):
+        """
+        Collect the histogram to a JSON compatible dictionary.
+        :return: dictionary of the sum, the count and the cumulative bucket counts
+        """
+        return {
+            'sum': self._sum,
+            'count': self._count,
+            'buckets': [[format_bound(bound), count] for bound, count in self.get_cumulative_counts()]
+        }
+
+
+class MethodLayer(object):
+    """
+    The wrappers which one tool added to the methods of an instance.
+    The tools can be stacked in any order, and removing a layer keeps the wrappers of the other tools.
+    """
+
+    def __init__(self, target, method_names, wrap):
+        """
+        Wrap the methods of the instance.
+        :param target: the wrapped object
+        :param method_names: the names of the wrapped methods
+        :param wrap: function which creates the wrapper from the method name, the current method and the layer
+        :return: None
+        """
+        self.active = True
+        self._target = target
+        self._previous_methods = {}
+        self._wrappers = {}
+        for method_name in method_names:
+            self._previous_methods[method_name] = target.__dict__.get(method_name)
+            wrapper = wrap(method_name, getattr(target, method_name), self)
+            wrapper.method_layer = self
+            self._wrappers[method_name] = wrapper
+            setattr(target, method_name, wrapper)
+
+    def remove(self):
+        """
+        Remove the wrappers of the layer.
+        A wrapper which was wrapped again by another tool cannot be taken out of the chain,
+        so it stays in place but only calls the method below it, until the outer layer is removed.
+        :return: None
+        """
+        self.active = False
+        for method_name, wrapper in self._wrappers.items():
+            if self._target.__dict__.get(method_name) is wrapper:
+                previous_method = self._get_active_previous_method(method_name)
+                if previous_method is None:
+                    delattr(self._target, method_name)
+                else:
+                    setattr(self._target, method_name, previous_method)
+
+    def _get_active_previous_method(self, method_name):
+        previous_method = self._previous_methods[method_name]
+        layer = getattr(previous_method, 'method_layer', None)
+        while layer is not None and not layer.active:
+            previous_method = layer._previous_methods[method_name]
+            layer = getattr(previous_method, 'method_layer', None)
+        return previous_method
+
+
+class Metrics(object):
+    """
+    Collects the call counts, the latencies and the result sizes of the public methods of instrumented objects.
+    The methods are wrapped on the instances only, so the classes and their subclasses are not changed,
+    and there is no cost for the objects which are not instrumented.
+    """
+
+    def __init__(self):
+        self._latencies = {}
+        self._result_sizes = {}
+        self._lock = threading.Lock()
+        self._layers = {}
+
+    def instrument(self, target, name):
+        """
+        Start measuring the public methods of the object.
+        :param target: the measured object, for example a Database or a Scope
+        :param name: the name of the object in the exported metrics
+        :return: None
+        """
+        self.uninstrument(target)
+        self._layers[id(target)] = MethodLayer(
+            target, collect_public_method_names(type(target)),
+            lambda method_name, method, layer: self._wrap(name, method_name, method, layer))
+
+    def uninstrument(self, target):
+        """
+        Stop measuring the methods of the object.
+        The collected metrics are kept, and the wrappers of the other tools are not changed.
+        :param target: a previously instrumented object
+        :return: None
+        """
+        layer = self._layers.pop(id(target), None)
+        if layer is not None:
+            layer.remove()
+
+    def reset(self):
+        """
+        Remove the collected metrics.
+        :return: None
+        """
+        with self._lock:
+            self._latencies = {}
+            self._result_sizes = {}
+
+    def get_call_count(self, name, method_name):
+        """
+        Get the number of the calls of the method.
+        :param name: the name of the instrumented object
+        :param method_name: the name of the method
+        :return: a non-negative integer value
+        """
+        histogram = self._latencies.get((name, method_name))
+        return histogram.count if histogram is not None else 0
+
+    def to_dict(self):
+        """
+        Collect the metrics to a JSON compatible dictionary.
+        :return: dictionary of the method metrics by object names and method names
+        """
+        with self._lock:
+            result = {}
+            for (name, method_name), histogram in sorted(self._latencies.items()):
+                method_metrics = {
+                    'calls': histogram.count,
+                    'total_seconds': histogram.sum,
+                    'latency_seconds': histogram.to_dict()
+                }
+                if (name, method_name) in self._result_sizes:
+                    method_metrics['result_size'] = self._result_sizes[(name, method_name)].to_dict()
+                result.setdefault(name, {})[method_name] = method_metrics
+            return result
+
+    def to_prometheus(self):
+        """
+        Format the metrics in the Prometheus text exposition format.
+        :return: the metrics as a string
+        """
+        with self._lock:
+            lines = [
+                '# HELP grimoire_call_duration_seconds The latency of the method calls.',
+                '# TYPE grimoire_call_duration_seconds histogram'
+            ]
+            for key, histogram in sorted(self._latencies.items()):
+                lines.extend(format_prometheus_histogram('grimoire_call_duration_seconds', key, histogram))
+            lines.extend([
+                '# HELP grimoire_result_size The number of the items returned by the find methods.',
+                '# TYPE grimoire_result_size histogram'
+            ])
+            for key, histogram in sorted(self._result_sizes.items()):
+                lines.extend(format_prometheus_histogram('grimoire_result_size', key, histogram))
+            return '\n'.join(lines) + '\n'
+
+    def save_json(self, path):
+        """
+        Write the metrics to a JSON file.
+        :param path: the path of the file
+        :return: None
+        """
+        with open(path, 'w') as metrics_file:
+            json.dump(self.to_dict(), metrics_file, indent=2)
+
+    def save_prometheus(self, path):
+        """
+        Write the metrics to a file in Prometheus text format.
+        :param path: the path of the file
+        :return: None
+        """
+        with open(path, 'w') as metrics_file:
+            metrics_file.write(self.to_prometheus())
+
+    def _wrap(self, name, method_name, method, layer):
+        key = (name, method_name)
+        has_result_size = method_name.startswith(RESULT_SIZE_PREFIX)
+
+        def measured_method(*args, **kwargs):
+            if not layer.active:
+                return method(*args, **kwargs)
+            result = None
+            start_time = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+                return result
+            finally:
+                self._observe(key, has_result_size, time.perf_counter() - start_time, result)
+
+        return measured_method
+
+    def _observe(self, key, has_result_size, elapsed_time, result):
+        with self._lock:
+            histogram = self._latencies.get(key)
+            if histogram is None:
+                histogram = self._latencies[key] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(elapsed_time)
+            if has_result_size and hasattr(result, '__len__'):
+                histogram = self._result_sizes.get(key)
+                if histogram is None:
+                    histogram = self._result_sizes[key] = Histogram(RESULT_SIZE_BUCKETS)
+                histogram.observe(len(result))
+
+
+def collect_public_method_names(cls):
+    """
+    Collect the names of the public methods of the class.
+    :param cls: a class
+    :return: list of method names
+    """
+    return [name for name, _ in inspect.getmembers(cls, inspect.isfunction) if not name.startswith('_')]
+
+
+def format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+
+def format_prometheus_histogram(metric_name, key, histogram):
+    """
+    Format the lines of a histogram in Prometheus text format.
+    :param metric_name: the name of the metric
+    :param key: the (object name, method name) pair
+    :param histogram: a Histogram object
+    :return: list of lines
+    """
+    labels = 'object="{}",method="{}"'.format(*key)
+    lines = [
+        '{}_bucket{{{},le="{}"}} {}'.format(metric_name, labels, format_bound(bound), count)
+        for bound, count in histogram.get_cumulative_counts()
+    ]
+    lines.append('{}_sum{{{}}} {}'.format(metric_name, labels, repr(histogram.sum)))
+    lines.append('{}_count{{{}}} {}'.format(metric_name, labels, histogram.count))
+    return lines
@@ -0,0 +1,158 @@
+"""
+Directory index of relative file paths
+"""
+
+
+class PathIndex(object):
+    """Directory tree of file paths with the file counts of the subtrees"""
+
+    def __init__(self, paths=()):
+        """
+        Construct an index from the relative file paths.
+        :param paths: iterable of relative paths with '/' separators
+        :return: None
+        """
+        self._directories = {'': _Directory()}
+        self._file_count = 0
+        for path in paths:
+            self.add(path)
+
+    def __len__(self):
+        return self._file_count
+
+    def __contains__(self, path):
+        directory_path, name = _split_path(path)
+        directory = self._directories.get(directory_path)
+        return directory is not None and name in directory.file_names
+
+    def add(self, path):
+        """
+        Add a file path to the index. Do nothing when the path has already been added.
+        :param path: the relative path of the file
+        :return: None
+        """
+        directory_path, name = _split_path(path)
+        directory = self._ensure_directory(directory_path)
+        if name in directory.file_names:
+            return
+        directory.file_names.add(name)
+        self._file_count += 1
+        for ancestor_path in _collect_ancestor_paths(directory_path):
+            self._directories[ancestor_path].file_count += 1
+
+    def remove(self, path):
+        """
+        Remove a file path and the emptied directories from the index.
+        :param path: the relative path of the file
+        :return: None
+        :raises ValueError: for missing path
+        """
+        if path not in self:
+            raise ValueError('The path is not in the index!')
+        directory_path, name = _split_path(path)
+        self._directories[directory_path].file_names.remove(name)
+        self._file_count -= 1
+        for ancestor_path in _collect_ancestor_paths(directory_path):
+            directory = self._directories[ancestor_path]
+            directory.file_count -= 1
+            if directory.file_count == 0 and ancestor_path != '':
+                del self._directories[ancestor_path]
+                parent_path, _ = _split_path(ancestor_path)
+                self._directories[parent_path].directory_paths.discard(ancestor_path)
+
+    def has_directory(self, directory_path):
+        """
+        Check that the directory contains indexed files.
+        :param directory_path: the relative path of the directory, '' for the root
+        :return: True, when the directory is in the index, else False
+        """
+        return directory_path in self._directories
+
+    def count_files(self, directory_path=''):
+        """
+        Count the files in the directory and its subdirectories.
+        :param directory_path: the relative path of the directory, '' for the root
+        :return: a non-negative integer value
+        """
+        directory = self._directories.get(directory_path)
+        if directory is None:
+            return 0
+        return directory.file_count
+
+    def list_directories(self, directory_path=''):
+        """
+        List the subdirectories of the directory.
+        :param directory_path: the relative path of the directory, '' for the root
+        :return: sorted list of (directory path, file count) pairs
+        """
+        directory = self._get_directory(directory_path)
+        return [(path, self._directories[path].file_count) for path in sorted(directory.directory_paths)]
+
+    def list_files(self, directory_path='', offset=0, limit=None):
+        """
+        List the files directly in the directory.
+        :param directory_path: the relative path of the directory, '' for the root
+        :param offset: the index of the first listed file in name order
+        :param limit: the maximal number of the listed files, all when None
+        :return: sorted list of file paths
+        """
+        directory = self._get_directory(directory_path)
+        names = sorted(directory.file_names)
+        end = None if limit is None else offset + limit
+        return [_join_path(directory_path, name) for name in names[offset:end]]
+
+    def count_direct_files(self, directory_path=''):
+        """
+        Count the files directly in the directory.
+        :param directory_path: the relative path of the directory, '' for the root
+        :return: a non-negative integer value
+        """
+        return len(self._get_directory(directory_path).file_names)
+
+    def _get_directory(self, directory_path):
+        try:
+            return self._directories[directory_path]
+        except KeyError:
+            raise ValueError('Invalid directory path!')
+
+    def _ensure_directory(self, directory_path):
+        directory = self._directories.get(directory_path)
+        if directory is not None:
+            return directory
+        directory = self._directories[directory_path] = _Directory()
+        parent_path, _ = _split_path(directory_path)
+        self._ensure_directory(parent_path).directory_paths.add(directory_path)
+        return directory
+
+
+class _Directory(object):
+    """Node of the directory tree"""
+
+    __slots__ = ('directory_paths', 'file_names', 'file_count')
+
+    def __init__(self):
+        self.directory_paths = set()
+        self.file_names = set()
+        self.file_count = 0
+
+
+def _split_path(path):
+    index = path.rfind('/')
+    if index < 0:
+        return '', path
+    return path[:index], path[index + 1:]
+
+
+def _join_path(directory_path, name):
+    if directory_path == '':
+        return name
+    return directory_path + '/' + name
+
+
+def _collect_ancestor_paths(directory_path):
+    """Collect the directory and its ancestors up to the root."""
+    ancestor_paths = [directory_path]
+    while directory_path != '':
+        directory_path, _ = _split_path(directory_path)
+        ancestor_paths.append(directory_path)
+    return ancestor_paths
@@ -0,0 +1,146 @@
+"""
+Cost-based planning of the posting intersections
+"""
+
+import time
+
+
+class PlanStep(object):
+    """Represents an intersection step of the plan"""
+
+    def __init__(self, key, posting_count, estimated_count):
+        self._key = key
+        self._posting_count = posting_count
+        self._estimated_count = estimated_count
+        self.actual_count = None
+        self.elapsed_time = None
+
+    @property
+    def key(self):
+        return self._key
+
+    @property
+    def posting_count(self):
+        return self._posting_count
+
+    @property
+    def estimated_count(self):
+        return self._estimated_count
+
+
+class QueryPlan(object):
+    """Ordered intersection of postings"""
+
+    def __init__(self, postings, steps, universe_count):
+        """
+        Construct a plan from the ordered steps.
+        :param postings: dictionary of the posting sets
+        :param steps: list of PlanStep objects in evaluation order
+        :param universe_count: the number of all items, used when there is no step
+        :return: None
+        """
+        self._postings = postings
+        self._steps = steps
+        self._universe_count = universe_count
+        self._is_empty = any(step.posting_count == 0 for step in steps)
+
+    @property
+    def steps(self):
+        return self._steps
+
+    def is_empty(self):
+        """
+        Check that the result is known to be empty before the execution.
+        :return: True, when a step has an empty or missing posting, else False
+        """
+        return self._is_empty
+
+    def calc_estimated_count(self):
+        """
+        Estimate the size of the result.
+        :return: a non-negative number
+        """
+        if not self._steps:
+            return self._universe_count
+        return self._steps[-1].estimated_count
+
+    def execute(self, measure=False):
+        """
+        Intersect the postings in the planned order.
+        :param measure: record the actual counts and elapsed times of the steps
+        :return: the set of the resulted items, or None when there is no step
+        """
+        if not self._steps:
+            return None
+        if self._is_empty:
+            return set()
+        result = None
+        for step in self._steps:
+            start_time = time.perf_counter() if measure else None
+            posting = self._postings[step.key]
+            if result is None:
+                result = set(posting)
+            else:
+                result &= posting
+            if measure:
+                step.elapsed_time = time.perf_counter() - start_time
+                step.actual_count = len(result)
+            if not result:
+                break
+        return result
+
+    def format(self):
+        """
+        Format the plan as a human readable table.
+        :return: the plan description as a string
+        """
+        lines = ['{:>5} {:>10} {:>10} {:>10} {:>10} {:>12}'.format(
+            'step', 'key', 'posting', 'estimated', 'actual', 'time [ms]')]
+        for index, step in enumerate(self._steps, 1):
+            actual_count = '-' if step.actual_count is None else step.actual_count
+            if step.elapsed_time is None:
+                elapsed_time = '-'
+            else:
+                elapsed_time = '{:.3f}'.format(step.elapsed_time * 1000)
+            lines.append('{:>5} {:>10} {:>10} {:>10.1f} {:>10} {:>12}'.format(
+                index, step.key, step.posting_count, step.estimated_count, actual_count, elapsed_time))
+        if self._is_empty:
+            lines.append('empty result detected before execution')
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return self.format()
+
+
+class QueryPlanner(object):
+    """Plans the intersection of postings by their sizes"""
+
+    def __init__(self, postings, universe_count):
+        """
+        Construct a planner for the postings.
+        :param postings: dictionary of the posting sets by their keys
+        :param universe_count: the number of all items
+        :return: None
+        """
+        self._postings = postings
+        self._universe_count = universe_count
+
+    def create_plan(self, keys):
+        """
+        Order the postings from the most selective to the least selective one.
+        The estimated cardinalities assume independent postings.
+        :param keys: the keys of the intersected postings
+        :return: a QueryPlan object
+        """
+        posting_counts = {}
+        for key in keys:
+            posting = self._postings.get(key)
+            posting_counts[key] = 0 if posting is None else len(posting)
+        ordered_keys = sorted(posting_counts, key=lambda key: posting_counts[key])
+        steps = []
+        estimated_count = float(self._universe_count)
+        for key in ordered_keys:
+            if self._universe_count > 0:
+                estimated_count *= posting_counts[key] / self._universe_count
+            steps.append(PlanStep(key, posting_counts[key], estimated_count))
+        return QueryPlan(self._postings, steps, self._universe_count)
@@ -0,0 +1,405 @@
+"""
+Boolean query language over the tag postings
+
+The grammar of the queries in decreasing precedence:
+
+    query   := and_expr ('OR' and_expr)*
+    and_expr := not_expr ('AND' not_expr)*
+    not_expr := 'NOT' not_expr | '(' query ')' | tag
+
+The tag names are bare words or double quoted strings.
+The operator keywords are case sensitive, so `and` is a valid tag name.
+"""
+
+import re
+
+
+TOKEN_PATTERN = re.compile(r'\s*(?:(\()|(\))|"((?:[^"\\]|\\.)*)"|([^\s()"]+))')
+
+KEYWORDS = {'AND', 'OR', 'NOT'}
+
+
+class Query(object):
+    """Base class of the query expression nodes"""
+
+    def evaluate(self, context):
+        """
+        Evaluate the query as set operations on the postings of the context.
+        The resulted set can be shared with the context so it must not be modified.
+        :param context: the queried context
+        :return: the set of the matching document identifiers
+        """
+        raise NotImplementedError()
+
+    def collect_tag_names(self):
+        """
+        Collect the tag names of the query.
+        :return: set of tag names
+        """
+        raise NotImplementedError()
+
+    def collect_tag_ids(self):
+        """
+        Collect the tag identifiers of the query.
+        :return: set of tag identifiers
+        """
+        raise NotImplementedError()
+
+    def resolve_tag_names(self, context):
+        """
+        Replace the tag names with the tag identifiers, so the query does not depend on the later renames.
+        :param context: the context of the tags
+        :return: an equivalent Query object
+        :raises ValueError: for unknown tag names
+        """
+        raise NotImplementedError()
+
+    def restore_tag_names(self, context):
+        """
+        Replace the identifiers of the existing tags with their current names for displaying.
+        :param context: the context of the tags
+        :return: an equivalent Query object
+        """
+        raise NotImplementedError()
+
+    def estimate_count(self, context):
+        """
+        Estimate the number of the matching documents from the posting sizes.
+        :param context: the queried context
+        :return: a non-negative number
+        """
+        raise NotImplementedError()
+
+    def calc_depth(self):
+        """
+        Calculate the depth of the expression tree.
+        :return: a positive integer value
+        """
+        raise NotImplementedError()
+
+
+class TagQuery(Query):
+    """Documents which have the given tag"""
+
+    def __init__(self, name):
+        self._name = name
+
+    @property
+    def name(self):
+        return self._name
+
+    def evaluate(self, context):
+        return context.get_tag_document_ids(context.find_tag_id(self._name))
+
+    def estimate_count(self, context):
+        return len(self.evaluate(context))
+
+    def collect_tag_names(self):
+        return {self._name}
+
+    def collect_tag_ids(self):
+        return set()
+
+    def resolve_tag_names(self, context):
+        return TagIdQuery(context.find_tag_id(self._name))
+
+    def restore_tag_names(self, context):
+        return self
+
+    def calc_depth(self):
+        return 1
+
+    def __str__(self):
+        if re.match(r'^[^\s()"]+$', self._name) and self._name not in KEYWORDS:
+            return self._name
+        return '"{}"'.format(self._name.replace('\\', '\\\\').replace('"', '\\"'))
+
+
+class TagIdQuery(Query):
+    """Documents which have the tag with the given identifier"""
+
+    def __init__(self, tag_id):
+        self._tag_id = tag_id
+
+    @property
+    def tag_id(self):
+        return self._tag_id
+
+    def evaluate(self, context):
+        return context.get_tag_document_ids(self._tag_id)
+
+    def estimate_count(self, context):
+        return len(self.evaluate(context))
+
+    def collect_tag_names(self):
+        return set()
+
+    def collect_tag_ids(self):
+        return {self._tag_id}
+
+    def resolve_tag_names(self, context):
+        return self
+
+    def restore_tag_names(self, context):
+        if context.has_tag(self._tag_id):
+            return TagQuery(context.get_tag(self._tag_id).name)
+        return self
+
+    def calc_depth(self):
+        return 1
+
+    def __str__(self):
+        return '#{}'.format(self._tag_id)
+
+
+class NotQuery(Query):
+    """Documents which do not match the operand"""
+
+    def __init__(self, operand):
+        self._operand = operand
+
+    @property
+    def operand(self):
+        return self._operand
+
+    def evaluate(self, context):
+        excluded_ids = self._operand.evaluate(context)
+        return context.get_all_document_ids() - excluded_ids
+
+    def estimate_count(self, context):
+        return max(context.count_documents() - self._operand.estimate_count(context), 0)
+
+    def collect_tag_names(self):
+        return self._operand.collect_tag_names()
+
+    def collect_tag_ids(self):
+        return self._operand.collect_tag_ids()
+
+    def resolve_tag_names(self, context):
+        return NotQuery(self._operand.resolve_tag_names(context))
+
+    def restore_tag_names(self, context):
+        return NotQuery(self._operand.restore_tag_names(context))
+
+    def calc_depth(self):
+        return self._operand.calc_depth() + 1
+
+    def __str__(self):
+        return 'NOT {}'.format(_format_operand(self._operand, self))
+
+
+class AndQuery(Query):
+    """Documents which match all of the operands"""
+
+    def __init__(self, operands):
+        self._operands = _flatten(operands, AndQuery)
+
+    @property
+    def operands(self):
+        return self._operands
+
+    def evaluate(self, context):
+        """
+        Intersect the positive operands and subtract the negated ones.
+        The operands are ordered by their estimated sizes, the most selective one first.
+        The evaluation stops at the first empty intermediate result.
+        """
+        positives = [operand for operand in self._operands if not isinstance(operand, NotQuery)]
+        negatives = [operand.operand for operand in self._operands if isinstance(operand, NotQuery)]
+        positives.sort(key=lambda operand: operand.estimate_count(context))
+        negatives.sort(key=lambda operand: -operand.estimate_count(context))
+        if positives:
+            document_ids = positives[0].evaluate(context)
+            for operand in positives[1:]:
+                if not document_ids:
+                    return document_ids
+                document_ids = document_ids & operand.evaluate(context)
+        else:
+            document_ids = context.get_all_document_ids()
+        for operand in negatives:
+            if not document_ids:
+                return document_ids
+            document_ids = document_ids - operand.evaluate(context)
+        return document_ids
+
+    def estimate_count(self, context):
+        document_count = context.count_documents()
+        if document_count == 0:
+            return 0
+        estimated_count = float(document_count)
+        for operand in self._operands:
+            estimated_count *= operand.estimate_count(context) / document_count
+        return estimated_count
+
+    def collect_tag_names(self):
+        return set().union(*[operand.collect_tag_names() for operand in self._operands])
+
+    def collect_tag_ids(self):
+        return set().union(*[operand.collect_tag_ids() for operand in self._operands])
+
+    def resolve_tag_names(self, context):
+        return AndQuery([operand.resolve_tag_names(context) for operand in self._operands])
+
+    def restore_tag_names(self, context):
+        return AndQuery([operand.restore_tag_names(context) for operand in self._operands])
+
+    def calc_depth(self):
+        return max(operand.calc_depth() for operand in self._operands) + 1
+
+    def __str__(self):
+        return ' AND '.join(_format_operand(operand, self) for operand in self._operands)
+
+
+class OrQuery(Query):
+    """Documents which match at least one of the operands"""
+
+    def __init__(self, operands):
+        self._operands = _flatten(operands, OrQuery)
+
+    @property
+    def operands(self):
+        return self._operands
+
+    def evaluate(self, context):
+        """
+        Unite the results of the operands.
+        The evaluation stops when the result already contains all documents.
+        """
+        document_count = context.count_documents()
+        document_ids = set()
+        for operand in self._operands:
+            document_ids = document_ids | operand.evaluate(context)
+            if len(document_ids) == document_count:
+                break
+        return document_ids
+
+    def estimate_count(self, context):
+        return min(sum(operand.estimate_count(context) for operand in self._operands), context.count_documents())
+
+    def collect_tag_names(self):
+        return set().union(*[operand.collect_tag_names() for operand in self._operands])
+
+    def collect_tag_ids(self):
+        return set().union(*[operand.collect_tag_ids() for operand in self._operands])
+
+    def resolve_tag_names(self, context):
+        return OrQuery([operand.resolve_tag_names(context) for operand in self._operands])
+
+    def restore_tag_names(self, context):
+        return OrQuery([operand.restore_tag_names(context) for operand in self._operands])
+
+    def calc_depth(self):
+        return max(operand.calc_depth() for operand in self._operands) + 1
+
+    def __str__(self):
+        return ' OR '.join(_format_operand(operand, self) for operand in self._operands)
+
+
+def parse_query(text):
+    """
+    Parse the query expression.
+    :param text: the query as a string
+    :return: a Query object
+    :raises ValueError: for syntax errors
+    """
+    parser = _Parser(_tokenize(text))
+    query = parser.parse_or()
+    if parser.peek() is not None:
+        raise ValueError('Unexpected token in the query: {}'.format(parser.peek()[1]))
+    return query
+
+
+def _tokenize(text):
+    tokens = []
+    position = 0
+    while position < len(text):
+        match = TOKEN_PATTERN.match(text, position)
+        if match is None:
+            if text[position:].strip() == '':
+                break
+            raise ValueError('Invalid query syntax at position {}!'.format(position))
+        opening, closing, quoted, word = match.groups()
+        if opening is not None:
+            tokens.append(('(', opening))
+        elif closing is not None:
+            tokens.append((')', closing))
+        elif quoted is not None:
+            tokens.append(('tag', re.sub(r'\\(.)', r'\1', quoted)))
+        elif word in KEYWORDS:
+            tokens.append((word, word))
+        else:
+            tokens.append(('tag', word))
+        position = match.end()
+    return tokens
+
+
+class _Parser(object):
+    """Recursive descent parser of the query tokens"""
+
+    def __init__(self, tokens):
+        self._tokens = tokens
+        self._index = 0
+
+    def peek(self):
+        if self._index < len(self._tokens):
+            return self._tokens[self._index]
+        return None
+
+    def take(self, kind):
+        token = self.peek()
+        if token is None:
+            raise ValueError('Unexpected end of the query!')
+        if token[0] != kind:
+            raise ValueError('Unexpected token in the query: {}'.format(token[1]))
+        self._index += 1
+        return token[1]
+
+    def parse_or(self):
+        operands = [self.parse_and()]
+        while self.peek() is not None and self.peek()[0] == 'OR':
+            self.take('OR')
+            operands.append(self.parse_and())
+        if len(operands) == 1:
+            return operands[0]
+        return OrQuery(operands)
+
+    def parse_and(self):
+        operands = [self.parse_not()]
+        while self.peek() is not None and self.peek()[0] == 'AND':
+            self.take('AND')
+            operands.append(self.parse_not())
+        if len(operands) == 1:
+            return operands[0]
+        return AndQuery(operands)
+
+    def parse_not(self):
+        token = self.peek()
+        if token is None:
+            raise ValueError('Unexpected end of the query!')
+        if token[0] == 'NOT':
+            self.take('NOT')
+            return NotQuery(self.parse_not())
+        if token[0] == '(':
+            self.take('(')
+            query = self.parse_or()
+            self.take(')')
+            return query
+        return TagQuery(self.take('tag'))
+
+
+def _flatten(operands, query_class):
+    flat_operands = []
+    for operand in operands:
+        if isinstance(operand, query_class):
+            flat_operands.extend(operand.operands)
+        else:
+            flat_operands.append(operand)
+    if not flat_operands:
+        raise ValueError('The query should have at least one operand!')
+    return flat_operands
+
+
+def _format_operand(operand, parent):
+    if isinstance(operand, (AndQuery, OrQuery)) and not isinstance(operand, type(parent)):
+        return '({})'.format(operand)
+    return str(operand)
@@ -0,0 +1,122 @@
+"""
+Incremental update of Treeview rows
+"""
+
+
+class TreeviewReconciler(object):
+    """Updates the child rows of a Treeview item with the minimal number of widget calls"""
+
+    def __init__(self, view, parent=''):
+        """
+        Construct a reconciler for an item without children.
+        All later changes of the child rows should be made through the reconciler.
+        :param view: a ttk.Treeview or an object with the same item methods
+        :param parent: the identifier of the parent item, '' for the top level rows
+        :return: None
+        """
+        self._view = view
+        self._parent = parent
+        self._order = []
+        self._rows = {}
+        self._call_count = 0
+
+    @property
+    def call_count(self):
+        return self._call_count
+
+    def update(self, rows):
+        """
+        Update the view to show the given rows.
+        The rows are matched by their identifiers. The unchanged rows are not touched,
+        the kept rows are moved only when they are not in the longest ordered subsequence.
+        :param rows: list of dictionaries with 'iid', 'text', 'values' and 'tags' keys
+        :return: the number of the widget calls
+        """
+        target_order = []
+        target_rows = {}
+        for row in rows:
+            iid = str(row['iid'])
+            if iid in target_rows:
+                raise ValueError('Duplicated row identifier: {}'.format(iid))
+            target_order.append(iid)
+            target_rows[iid] = (row.get('text', ''), tuple(row.get('values', ())), tuple(row.get('tags', ())))
+        call_count = 0
+        removed_iids = [iid for iid in self._order if iid not in target_rows]
+        if removed_iids:
+            self._view.delete(*removed_iids)
+            call_count += 1
+        kept_order = [iid for iid in self._order if iid in target_rows]
+        target_positions = {iid: index for index, iid in enumerate(target_order)}
+        stable_iids = _find_stable_iids(kept_order, target_positions)
+        detached_iids = [iid for iid in kept_order if iid not in stable_iids]
+        if detached_iids:
+            self._view.detach(*detached_iids)
+            call_count += 1
+        for index, iid in enumerate(target_order):
+            text, values, tags = target_rows[iid]
+            if iid not in self._rows:
+                self._view.insert(self._parent, index, iid=iid, text=text, values=values, tags=tags)
+                call_count += 1
+                continue
+            if iid not in stable_iids:
+                self._view.move(iid, self._parent, index)
+                call_count += 1
+            changes = {}
+            old_text, old_values, old_tags = self._rows[iid]
+            if text != old_text:
+                changes['text'] = text
+            if values != old_values:
+                changes['values'] = values
+            if tags != old_tags:
+                changes['tags'] = tags
+            if changes:
+                self._view.item(iid, **changes)
+                call_count += 1
+        self._order = target_order
+        self._rows = target_rows
+        self._call_count += call_count
+        return call_count
+
+    def clear(self):
+        """
+        Remove all rows from the view.
+        :return: the number of the widget calls
+        """
+        return self.update([])
+
+    def get_iids(self):
+        """
+        Get the identifiers of the shown rows.
+        :return: the list of the row identifiers as strings
+        """
+        return list(self._order)
+
+
+def _find_stable_iids(kept_order, target_positions):
+    """Find the longest subsequence of the kept rows which is already in the target order."""
+    positions = [target_positions[iid] for iid in kept_order]
+    tail_indices = []
+    tail_positions = []
+    predecessors = [-1] * len(positions)
+    for index, position in enumerate(positions):
+        low, high = 0, len(tail_positions)
+        while low < high:
+            middle = (low + high) // 2
+            if tail_positions[middle] < position:
+                low = middle + 1
+            else:
+                high = middle
+        if low > 0:
+            predecessors[index] = tail_indices[low - 1]
+        if low == len(tail_positions):
+            tail_positions.append(position)
+            tail_indices.append(index)
+        else:
+            tail_positions[low] = position
+            tail_indices[low] = index
+    stable_iids = set()
+    index = tail_indices[-1] if tail_indices else -1
+    while index >= 0:
+        stable_iids.add(kept_order[index])
+        index = predecessors[index]
+    return stable_iids
@@ -0,0 +1,246 @@
+"""
+Record the scope calls of a session and replay them on a database
+
+Replay a recorded trace from the repository root:
+
+    python -m grimoire.recorder trace.jsonl /tmp/importer/grimoire.log
+
+The database is copied into a temporary directory first, so the replayed changes do not modify it.
+"""
+
+import argparse
+import inspect
+import json
+import math
+import os
+import shutil
+import tempfile
+import time
+
+from grimoire.database import Database
+from grimoire.metrics import MethodLayer
+from grimoire.scope import Scope
+from grimoire.sqlitedatabase import SQLiteDatabase
+
+
+RECORDED_METHODS = [
+    name for name, member in inspect.getmembers(Scope, inspect.isfunction)
+    if not name.startswith('_') and name != 'copy'
+]
+PERCENTILES = [50, 90, 99]
+
+
+class ScopeRecorder(object):
+    """
+    Records the public method calls of scopes with their arguments and elapsed times.
+    Only the outermost calls are recorded, the nested calls of the scope are included in their time.
+    """
+
+    def __init__(self, path=None):
+        """
+        Create a recorder.
+        :param path: the path of the trace file where the records are appended, or None to keep them in memory only
+        :return: None
+        """
+        self._path = path
+        self._trace_file = None
+        self._records = []
+        self._depth = 0
+        self._start_time = time.perf_counter()
+        self._layers = {}
+
+    def attach(self, scope):
+        """
+        Start recording the calls of the scope.
+        The methods of the given instance are wrapped, so the other scopes and the copies are not recorded.
+        :param scope: the recorded Scope object
+        :return: None
+        """
+        self.detach(scope)
+        self._layers[id(scope)] = MethodLayer(scope, RECORDED_METHODS, self._wrap)
+
+    def detach(self, scope):
+        """
+        Stop recording the calls of the scope.
+        The wrappers of the other tools are not changed.
+        :param scope: a previously attached Scope object
+        :return: None
+        """
+        layer = self._layers.pop(id(scope), None)
+        if layer is not None:
+            layer.remove()
+
+    def get_records(self):
+        """
+        Get the records of the calls.
+        :return: list of dictionaries with method, arguments, time, elapsed and optional error keys
+        """
+        return self._records
+
+    def close(self):
+        """
+        Close the trace file.
+        :return: None
+        """
+        if self._trace_file is not None:
+            self._trace_file.close()
+            self._trace_file = None
+
+    def _wrap(self, name, method, layer):
+        signature = inspect.signature(method)
+
+        def recorded_method(*args, **kwargs):
+            if self._depth > 0 or not layer.active:
+                return method(*args, **kwargs)
+            record = {
+                'method': name,
+                'arguments': convert_arguments(signature.bind(*args, **kwargs).arguments),
+                'time': time.perf_counter() - self._start_time
+            }
+            self._depth += 1
+            start_time = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            except ValueError as error:
+                record['error'] = str(error)
+                raise
+            finally:
+                record['elapsed'] = time.perf_counter() - start_time
+                self._depth -= 1
+                self._save_record(record)
+
+        return recorded_method
+
+    def _save_record(self, record):
+        self._records.append(record)
+        if self._path is not None:
+            if self._trace_file is None:
+                self._trace_file = open(self._path, 'a')
+            self._trace_file.write(json.dumps(record))
+            self._trace_file.write('\n')
+            self._trace_file.flush()
+
+
+def convert_arguments(arguments):
+    """
+    Convert the argument values which cannot be stored in JSON, like query objects, to strings.
+    :param arguments: dictionary of the argument values by name
+    :return: a new dictionary
+    """
+    converted_arguments = {}
+    for name, value in arguments.items():
+        if value is not None and not isinstance(value, (bool, int, float, str, list)):
+            value = str(value)
+        converted_arguments[name] = value
+    return converted_arguments
+
+
+def load_trace(path):
+    """
+    Load the records of a trace file.
+    :param path: the path of the trace file
+    :return: list of record dictionaries
+    """
+    with open(path) as trace_file:
+        return [json.loads(line) for line in trace_file if line.strip()]
+
+
+def replay_trace(records, database):
+    """
+    Replay the recorded calls on a new scope of the database.
+    The calls which fail with ValueError, for example on the missing identifiers of another database, are counted.
+    :param records: list of record dictionaries
+    :param database: the Database or Context object of the scope
+    :return: dictionary of the elapsed times in seconds and the error counts by method names
+    :raises ValueError: for unknown method names
+    """
+    scope = Scope(database)
+    elapsed_times = {}
+    error_counts = {}
+    for record in records:
+        method_name = record['method']
+        if method_name not in RECORDED_METHODS:
+            raise ValueError('Unknown scope method "{}"!'.format(method_name))
+        method = getattr(scope, method_name)
+        start_time = time.perf_counter()
+        try:
+            method(**record['arguments'])
+        except ValueError:
+            error_counts[method_name] = error_counts.get(method_name, 0) + 1
+        elapsed_times.setdefault(method_name, []).append(time.perf_counter() - start_time)
+    return {
+        method_name: {'elapsed_times': times, 'errors': error_counts.get(method_name, 0)}
+        for method_name, times in elapsed_times.items()
+    }
+
+
+def calc_percentile(values, percent):
+    """
+    Calculate the percentile with the nearest rank method.
+    :param values: non-empty list of numbers
+    :param percent: the percent between 0 and 100
+    :return: an element of the values
+    :raises ValueError: for empty values or invalid percent
+    """
+    if not values:
+        raise ValueError('There are no values!')
+    if percent < 0 or percent > 100:
+        raise ValueError('The percent should be between 0 and 100!')
+    sorted_values = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize_latencies(results):
+    """
+    Summarize the replayed elapsed times by methods.
+    :param results: the result of replay_trace
+    :return: dictionary of the count, the errors and the percentile and maximal latencies in milliseconds by method
+    """
+    summary = {}
+    for method_name, result in sorted(results.items()):
+        elapsed_times = result['elapsed_times']
+        method_summary = {'count': len(elapsed_times), 'errors': result['errors']}
+        for percent in PERCENTILES:
+            method_summary['p{}_ms'.format(percent)] = calc_percentile(elapsed_times, percent) * 1000
+        method_summary['max_ms'] = max(elapsed_times) * 1000
+        summary[method_name] = method_summary
+    return summary
+
+
+def open_database_copy(database_path, directory_path, is_sqlite):
+    """
+    Copy the database file into the directory and open the copy.
+    :param database_path: the path of the log file or the SQLite database
+    :param directory_path: the directory of the copy
+    :param is_sqlite: open the file as SQLiteDatabase instead of a log based Database
+    :return: the opened database
+    """
+    copy_path = os.path.join(directory_path, os.path.basename(database_path))
+    shutil.copyfile(database_path, copy_path)
+    if is_sqlite:
+        return SQLiteDatabase(copy_path)
+    return Database(copy_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a recorded scope trace and report the latencies.')
+    parser.add_argument('trace_path', help='the path of the trace file')
+    parser.add_argument('database_path', help='the path of the log file or the SQLite database')
+    parser.add_argument('--sqlite', action='store_true', help='the database is an SQLite database')
+    arguments = parser.parse_args()
+    records = load_trace(arguments.trace_path)
+    with tempfile.TemporaryDirectory() as directory_path:
+        database = open_database_copy(arguments.database_path, directory_path, arguments.sqlite)
+        summary = summarize_latencies(replay_trace(records, database))
+        if arguments.sqlite:
+            database.close()
+    print('{:32} {:>7} {:>7} {:>9} {:>9} {:>9} {:>9}'.format('method', 'count', 'errors', 'p50 ms', 'p90 ms', 'p99 ms', 'max ms'))
+    for method_name, method_summary in summary.items():
+        print('{:32} {:7} {:7} {:9.3f} {:9.3f} {:9.3f} {:9.3f}'.format(
+            method_name, method_summary['count'], method_summary['errors'],
+            method_summary['p50_ms'], method_summary['p90_ms'], method_summary['p99_ms'], method_summary['max_ms']))
+
+
+if __name__ == '__main__':
+    main()
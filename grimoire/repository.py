@@ -21,6 +21,20 @@ class Repository(object):
         file_paths = self._storage.collect_file_paths()
         return set(file_paths) - document_paths
 
+    def iterate_untracked_file_paths(self, document_paths=None, chunk_size=1000):
+        """
+        Collect the untracked file paths in chunks while walking the storage.
+        :param document_paths: the set of the tracked paths, collected from the database by default
+        :param chunk_size: the maximal number of the scanned paths per chunk
+        :return: generator of (untracked paths, number of scanned paths) pairs
+        """
+        if document_paths is None:
+            document_paths = self._database.collect_document_paths()
+        scanned_count = 0
+        for file_paths in self._storage.iterate_file_paths(chunk_size):
+            scanned_count += len(file_paths)
+            yield [file_path for file_path in file_paths if file_path not in document_paths], scanned_count
+
     def collect_missing_file_paths(self):
         """
         Collect file paths which are in the database but not in the storage.
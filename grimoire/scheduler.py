@@ -0,0 +1,101 @@
+"""
+Coalesced rendering of the views
+"""
+
+
+class RenderState(object):
+    """Read-only view of an object which calculates every query only once"""
+
+    def __init__(self, source):
+        """
+        Wrap the source object.
+        The results are shared between the callers, so they must not be modified.
+        :param source: the queried object, typically a Scope
+        :return: None
+        """
+        self._source = source
+        self._results = {}
+
+    def __getattr__(self, name):
+        if not (name.startswith('get_') or name.startswith('has_')):
+            raise AttributeError('Only the queries of the source are available: {}'.format(name))
+        method = getattr(self._source, name)
+
+        def query(*args):
+            key = (name, args)
+            if key not in self._results:
+                self._results[key] = method(*args)
+            return self._results[key]
+
+        return query
+
+
+class RenderScheduler(object):
+    """Collects the redraw requests of the views and renders the dirty views once"""
+
+    def __init__(self, after_idle, source):
+        """
+        Construct a scheduler.
+        :param after_idle: function which calls its argument when the event loop is idle, like `root.after_idle`
+        :param source: the object whose queries are shared by the renderers through a RenderState
+        :return: None
+        """
+        self._after_idle = after_idle
+        self._source = source
+        self._renderers = []
+        self._dirty_names = set()
+        self._is_scheduled = False
+        self._render_count = 0
+
+    @property
+    def render_count(self):
+        return self._render_count
+
+    def register(self, name, renderer):
+        """
+        Register a view renderer. The renderers are called in the order of registration.
+        :param name: the name of the view
+        :param renderer: function which redraws the view from a RenderState
+        :return: None
+        """
+        self._renderers.append((name, renderer))
+
+    def mark_dirty(self, *names):
+        """
+        Request the redraw of the views. The redraw happens when the event loop is idle.
+        :param names: the names of the views, all views when there is no name
+        :return: None
+        :raises ValueError: for unknown view names
+        """
+        registered_names = [name for name, _ in self._renderers]
+        for name in names:
+            if name not in registered_names:
+                raise ValueError('Unknown view: {}'.format(name))
+        self._dirty_names.update(names or registered_names)
+        if not self._is_scheduled:
+            self._is_scheduled = True
+            self._after_idle(self.flush)
+
+    def is_dirty(self, name):
+        """
+        Check that the view is waiting for redraw.
+        :param name: the name of the view
+        :return: True, when the view is dirty, else False
+        """
+        return name in self._dirty_names
+
+    def flush(self):
+        """
+        Redraw the dirty views with a shared state.
+        :return: None
+        """
+        self._is_scheduled = False
+        dirty_names = self._dirty_names
+        self._dirty_names = set()
+        if not dirty_names:
+            return
+        state = RenderState(self._source)
+        for name, renderer in self._renderers:
+            if name in dirty_names:
+                renderer(state)
+                self._render_count += 1
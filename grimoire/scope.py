@@ -2,6 +2,8 @@
 Scope class definition
 """
 
+from grimoire.query import AndQuery, Query, TagIdQuery, parse_query
+
 
 class Scope(object):
     """Represents a scope in the context"""
@@ -14,9 +16,23 @@ class Scope(object):
         """
         self._database = database
         self._concept_tag_ids = []
-        self._selection_document_ids = []
+        self._concept_query = None
+        self._selection_document_ids = {}
         self._ordering = None
 
+    def copy(self, database=None):
+        """
+        Create an independent scope with the same concept and selection.
+        :param database: the database of the copy, for example a snapshot, the database of the scope by default
+        :return: a Scope object
+        """
+        scope = Scope(self._database if database is None else database)
+        scope._concept_tag_ids = list(self._concept_tag_ids)
+        scope._concept_query = self._concept_query
+        scope._selection_document_ids = dict(self._selection_document_ids)
+        scope._ordering = self._ordering
+        return scope
+
     def create_document(self, name, type, path):
         """
         Create a new document in the actual concept.
@@ -96,13 +112,17 @@ class Scope(object):
         Get the documents of the concept.
         :return: the list of document objects
         """
-        return self._database.find_documents(self._concept_tag_ids)
+        return [self._database.get_document(document_id) for document_id in self.get_concept_document_ids()]
 
     def get_concept_document_ids(self):
         """
         Get the identifiers of the documents of the concept.
         :return: the list of document identifiers
         """
+        if self._concept_query is not None:
+            tag_queries = [TagIdQuery(tag_id) for tag_id in self._concept_tag_ids]
+            query = AndQuery([self._concept_query] + tag_queries)
+            return self._database.find_document_ids_by_query(query)
         return self._database.find_document_ids(self._concept_tag_ids)
 
     def get_selection_documents(self):
@@ -114,10 +134,10 @@ class Scope(object):
 
     def get_selection_document_ids(self):
         """
-        Get the identifiers of the selected documents of the scope.
+        Get the identifiers of the selected documents of the scope in the order of the selection.
         :return: the list of document identifiers
         """
-        return self._selection_document_ids
+        return list(self._selection_document_ids)
 
     def get_concept_only_documents(self):
         """
@@ -131,8 +151,86 @@ class Scope(object):
         Get the identifiers of the documents which are only in the concept and not in the selection.
         :return: the list of document identifiers
         """
-        concept_document_ids = self._database.find_document_ids(self._concept_tag_ids)
-        return [document_id for document_id in concept_document_ids if document_id not in self._selection_document_ids]
+        concept_document_ids = self.get_concept_document_ids()
+        selection_document_ids = self._selection_document_ids
+        return [document_id for document_id in concept_document_ids if document_id not in selection_document_ids]
+
+    def get_ranked_documents(self, limit=20, weighted=True):
+        """
+        Get the documents which match the most concept tags.
+        The selected documents are not included.
+        :param limit: the maximal number of the resulted documents
+        :param weighted: prefer the documents of the rare concept tags
+        :return: list of (document object, score) pairs in descending score order
+        """
+        selection_document_ids = self._selection_document_ids
+        ranked_document_ids = self._database.rank_document_ids(
+            self._concept_tag_ids, limit + len(selection_document_ids), weighted)
+        ranked_documents = [
+            (self._database.get_document(document_id), score)
+            for document_id, score in ranked_document_ids
+            if document_id not in selection_document_ids
+        ]
+        return ranked_documents[:limit]
+
+    def get_fallback_documents(self, limit=20):
+        """
+        Get the partially matching documents when no document matches the whole concept.
+        There is no fallback for the concepts with query expression.
+        :param limit: the maximal number of the resulted documents
+        :return: list of (document object, score) pairs, empty when the concept has documents
+        """
+        if self._concept_query is not None or len(self._concept_tag_ids) < 2:
+            return []
+        if self.get_concept_document_ids():
+            return []
+        return self.get_ranked_documents(limit)
+
+    def set_concept_query(self, query):
+        """
+        Restrict the concept with a boolean query expression.
+        The query is combined with the concept tags by conjunction.
+        The tag names are resolved to tag identifiers here, so renaming a tag does not change the query.
+        :param query: a query string like `(paper OR preprint) AND NOT read` or a Query object
+        :return: None
+        :raises ValueError: for invalid query syntax or unknown tag names
+        """
+        if not isinstance(query, Query):
+            query = parse_query(query)
+        self._concept_query = query.resolve_tag_names(self._database)
+
+    def get_concept_query(self):
+        """
+        Get the query expression of the concept with the current names of the tags.
+        :return: a Query object or None
+        """
+        if self._concept_query is None:
+            return None
+        return self._concept_query.restore_tag_names(self._database)
+
+    def clear_concept_query(self):
+        """
+        Remove the query expression from the concept.
+        :return: None
+        """
+        self._concept_query = None
+
+    def get_listed_document_ids(self):
+        """
+        Get the identifiers of the selected documents followed by the concept only documents.
+        The list should be calculated once per render, and only its visible page fetched with `get_documents`.
+        :return: the list of document identifiers
+        """
+        return self.get_selection_document_ids() + self.get_concept_only_document_ids()
+
+    def get_documents(self, document_ids):
+        """
+        Get the documents with a single database call, for example the visible page of a document list.
+        :param document_ids: the identifiers of the documents
+        :return: the list of document objects in the order of the identifiers
+        :raises ValueError: for invalid document identifier
+        """
+        return self._database.get_documents(document_ids)
 
     def toggle_document_selection(self, document_id):
         """
@@ -156,7 +254,7 @@ class Scope(object):
         """
         _ = self._database.get_document(document_id)
         if document_id not in self._selection_document_ids:
-            self._selection_document_ids.append(document_id)
+            self._selection_document_ids[document_id] = None
         else:
             ValueError('The given document has already selected!')
 
@@ -169,7 +267,7 @@ class Scope(object):
         :raises ValueError: for invalid document identifier
         """
         if document_id in self._selection_document_ids:
-            self._selection_document_ids.remove(document_id)
+            del self._selection_document_ids[document_id]
         else:
             raise ValueError('Invalid document identifier!')
 
@@ -178,7 +276,7 @@ class Scope(object):
         Remove all documents selection.
         :return: None
         """
-        self._selection_document_ids = []
+        self._selection_document_ids = {}
 
     def has_document_selection(self):
         """
@@ -250,11 +348,16 @@ class Scope(object):
         """
         Destroy the tag of the managed context.
         It removes all relation to the tagged documents.
+        It removes the tag from the concept, and the concept query which refers to the tag.
         :param tag_id: the identifier of the destroyable tag
         :return: None
         :raises ValueError: for invalid tag identifier
         """
         self._database.destroy_tag(id=tag_id)
+        if tag_id in self._concept_tag_ids:
+            self._concept_tag_ids.remove(tag_id)
+        if self._concept_query is not None and tag_id in self._concept_query.collect_tag_ids():
+            self._concept_query = None
 
     def get_tag(self, tag_id):
         """
@@ -325,12 +428,42 @@ class Scope(object):
         selection_tag_ids = self.get_selection_tag_ids()
         return [tag_id for tag_id in selection_tag_ids if tag_id not in self._concept_tag_ids]
 
+    def find_close_tag_names(self, tag_name, max_distance=1):
+        """
+        Find the existing tag names which differ from the given name in a few characters.
+        :param tag_name: the name of the tag
+        :param max_distance: the maximal number of character edits
+        :return: the list of tag names without the given name
+        """
+        close_tag_names = self._database.find_close_tags(tag_name, max_distance)
+        return [name for name in close_tag_names if name != tag_name]
+
     def get_suggested_tags(self, tag_name_input):
         """
         Calculate tag suggestions for efficient navigation.
+        The existing tags with close names are suggested after the input.
         :param tag_name_input: the content of actual text input
         :return: the list of tag names as strings
         """
         if tag_name_input != '':
-            return [tag_name_input]
+            return [tag_name_input] + self.find_close_tag_names(tag_name_input)
         return []
+
+
+def calc_document_rows(scope_state, fallback_limit):
+    """
+    Calculate the listed document identifiers and the tags of the highlighted rows.
+    The partially matching documents are listed when there is no concept only document.
+    The query results are not modified, because a RenderState shares them between the renderers.
+    :param scope_state: a Scope or a RenderState of a scope
+    :param fallback_limit: the maximal number of the partially matching documents
+    :return: the list of document identifiers and the dictionary of the row tags by document identifiers
+    """
+    selection_document_ids = scope_state.get_selection_document_ids()
+    row_tags = {document_id: 'selected' for document_id in selection_document_ids}
+    document_ids = list(scope_state.get_listed_document_ids())
+    if len(document_ids) == len(selection_document_ids):
+        for document, _ in scope_state.get_fallback_documents(fallback_limit):
+            document_ids.append(document.id)
+            row_tags[document.id] = 'partial'
+    return document_ids, row_tags
@@ -0,0 +1,438 @@
+"""
+Context of documents and tags stored in SQLite
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import sqlite3
+
+from grimoire.context import MEMORY_SAMPLE_SIZE, Context
+from grimoire.document import Document
+from grimoire.logger import Logger
+from grimoire.planner import QueryPlanner
+from grimoire.tag import Tag
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_path ON documents (path);
+CREATE TABLE IF NOT EXISTS tags (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS relations (
+    tag_id INTEGER NOT NULL,
+    document_id INTEGER NOT NULL,
+    PRIMARY KEY (tag_id, document_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS relations_document ON relations (document_id, tag_id);
+'''
+
+
+class SQLiteContext(Context):
+    """
+    Context which keeps the documents, the tags and the relations in an SQLite database.
+    The changes are committed one by one, or together in a `batch` block.
+    The connection can be used from other threads, but the writes should come from one thread.
+    """
+
+    def __init__(self, path=':memory:'):
+        """
+        Open or create the database.
+        :param path: the path of the database file, ':memory:' for a temporary database
+        :return: None
+        """
+        self._connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(SCHEMA)
+        self._batch_depth = 0
+        self._batch_counts = None
+        self._document_count = self._query_value('SELECT COUNT(*) FROM documents')
+        self._tag_count = self._query_value('SELECT COUNT(*) FROM tags')
+        self._relation_count = self._query_value('SELECT COUNT(*) FROM relations')
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Commit the changes of the block in a single transaction, or roll them back on exception.
+        The blocks can be nested, the outermost one commits.
+        The operations validate their arguments before their own blocks, so a rejected operation
+        rolls back only when it is called in an outer block.
+        """
+        if self._batch_depth == 0:
+            self._connection.execute('BEGIN')
+            self._batch_counts = (self._document_count, self._tag_count, self._relation_count)
+        self._batch_depth += 1
+        try:
+            yield
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._connection.execute('ROLLBACK')
+                self._handle_rollback()
+            raise
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            self._connection.execute('COMMIT')
+
+    def close(self):
+        """
+        Close the database connection.
+        :return: None
+        """
+        self._connection.close()
+
+    def create_document(self, id, name, type, path):
+        """Create a new document."""
+        document = Document(id, name, type, path)
+        if self.has_document(id):
+            raise ValueError('Invalid document identifier!')
+        with self.batch():
+            self._connection.execute(
+                'INSERT INTO documents (id, name, type, path) VALUES (?, ?, ?, ?)', (id, name, type, path))
+            self._document_count += 1
+        return document
+
+    def get_document(self, id):
+        """Get the document by identifier."""
+        row = self._connection.execute('SELECT id, name, type, path FROM documents WHERE id = ?', (id,)).fetchone()
+        if row is None:
+            raise ValueError('Invalid document identifier!')
+        return Document(*row)
+
+    def get_documents(self, document_ids):
+        """Get the documents in the order of the given identifiers with a single query."""
+        document_ids = list(document_ids)
+        rows = self._connection.execute(
+            'SELECT id, name, type, path FROM documents WHERE id IN (SELECT value FROM json_each(?))',
+            (json.dumps(document_ids),))
+        documents = {row[0]: Document(*row) for row in rows}
+        try:
+            return [documents[document_id] for document_id in document_ids]
+        except KeyError:
+            raise ValueError('Invalid document identifier!')
+
+    def has_document(self, id):
+        """Check that the document exists."""
+        return self._connection.execute('SELECT 1 FROM documents WHERE id = ?', (id,)).fetchone() is not None
+
+    def collect_document_paths(self):
+        """Get the paths of the documents."""
+        return {path for path, in self._connection.execute('SELECT path FROM documents')}
+
+    def find_documents(self, tag_ids):
+        """Find the documents which are related to the given tags."""
+        document_ids = self.find_document_ids(tag_ids)
+        rows = self._connection.execute(
+            'SELECT id, name, type, path FROM documents WHERE id IN (SELECT value FROM json_each(?)) ORDER BY id',
+            (json.dumps(document_ids),))
+        return [Document(*row) for row in rows]
+
+    def find_document_ids(self, tag_ids):
+        """Find the document identifiers which are related to the given tags in ascending order."""
+        tag_ids = set(tag_ids)
+        if not tag_ids:
+            return self._query_column('SELECT id FROM documents ORDER BY id')
+        return self._query_column(
+            'SELECT document_id FROM relations WHERE tag_id IN (SELECT value FROM json_each(?)) '
+            'GROUP BY document_id HAVING COUNT(*) = ? ORDER BY document_id',
+            (json.dumps(sorted(tag_ids)), len(tag_ids)))
+
+    def plan_document_query(self, tag_ids):
+        """Plan the intersection of the tag postings from the rarest tag."""
+        postings = {tag_id: self.get_tag_document_ids(tag_id) for tag_id in tag_ids if self.has_tag(tag_id)}
+        planner = QueryPlanner(postings, self._document_count)
+        return planner.create_plan(tag_ids)
+
+    def rank_document_ids(self, tag_ids, limit=20, weighted=False):
+        """
+        Rank the documents by the number of the matching tags.
+        The scores are summed by SQLite from the relation index of the tags.
+        :param tag_ids: the identifiers of the query tags
+        :param limit: the maximal number of the resulted documents
+        :param weighted: weight the tags by their rarity instead of counting them
+        :return: list of (document identifier, score) pairs in descending score order
+        """
+        weights = {}
+        rows = self._connection.execute(
+            'SELECT tag_id, COUNT(*) FROM relations WHERE tag_id IN (SELECT value FROM json_each(?)) GROUP BY tag_id',
+            (json.dumps(sorted(set(tag_ids))),))
+        for tag_id, document_count in rows:
+            weights[str(tag_id)] = math.log(1.0 + self._document_count / document_count) if weighted else 1.0
+        rows = self._connection.execute(
+            'SELECT relations.document_id, SUM(weights.value) AS score '
+            'FROM json_each(?) AS weights JOIN relations ON relations.tag_id = CAST(weights.key AS INTEGER) '
+            'GROUP BY relations.document_id ORDER BY score DESC, relations.document_id LIMIT ?',
+            (json.dumps(weights), limit))
+        return [(document_id, float(score)) for document_id, score in rows]
+
+    def get_all_document_ids(self):
+        """Get the set of all document identifiers."""
+        return set(self._query_column('SELECT id FROM documents'))
+
+    def get_document_tag_ids(self, document_id):
+        """Get the identifiers of the tags of the document."""
+        if not self.has_document(document_id):
+            raise ValueError('Invalid document identifier!')
+        return set(self._query_column('SELECT tag_id FROM relations WHERE document_id = ?', (document_id,)))
+
+    def get_tag_document_ids(self, tag_id):
+        """Get the identifiers of the documents of the tag."""
+        if not self.has_tag(tag_id):
+            raise ValueError('Invalid tag identifier!')
+        return set(self._query_column('SELECT document_id FROM relations WHERE tag_id = ?', (tag_id,)))
+
+    def update_document(self, id, name=None, type=None, path=None):
+        """Update the document."""
+        document = self.get_document(id)
+        document = Document(
+            id,
+            document.name if name is None else name,
+            document.type if type is None else type,
+            document.path if path is None else path)
+        self._connection.execute(
+            'UPDATE documents SET name = ?, type = ?, path = ? WHERE id = ?',
+            (document.name, document.type, document.path, id))
+
+    def destroy_document(self, id):
+        """Remove the document from the context."""
+        if not self.has_document(id):
+            raise ValueError('Invalid document identifier!')
+        with self.batch():
+            cursor = self._connection.execute('DELETE FROM relations WHERE document_id = ?', (id,))
+            self._relation_count -= cursor.rowcount
+            self._connection.execute('DELETE FROM documents WHERE id = ?', (id,))
+            self._document_count -= 1
+
+    def count_documents(self):
+        """Count the documents in the database."""
+        return self._document_count
+
+    def create_tag(self, id, name):
+        """Create a new tag."""
+        tag = Tag(id, name)
+        if self.has_tag(id):
+            raise ValueError('Invalid tag identifier!')
+        if self._has_tag_name(name):
+            raise ValueError('The tag name already exist!')
+        with self.batch():
+            self._connection.execute('INSERT INTO tags (id, name) VALUES (?, ?)', (id, name))
+            self._tag_count += 1
+        return tag
+
+    def get_tag(self, id):
+        """Get the tag."""
+        row = self._connection.execute('SELECT id, name FROM tags WHERE id = ?', (id,)).fetchone()
+        if row is None:
+            raise ValueError('Invalid tag identifier!')
+        return Tag(*row)
+
+    def has_tag(self, id):
+        """Check that the tag exists."""
+        return self._connection.execute('SELECT 1 FROM tags WHERE id = ?', (id,)).fetchone() is not None
+
+    def get_all_tag_ids(self):
+        """Get the set of all tag identifiers."""
+        return set(self._query_column('SELECT id FROM tags'))
+
+    def find_tag_id(self, name):
+        """Find the tag identifier from the name."""
+        row = self._connection.execute('SELECT id FROM tags WHERE name = ?', (name,)).fetchone()
+        if row is None:
+            raise ValueError('Invalid tag name!')
+        return row[0]
+
+    def find_tags(self, document_ids):
+        """Find tags which are related to the given documents."""
+        tag_ids = self.find_tag_ids(document_ids)
+        rows = self._connection.execute(
+            'SELECT id, name FROM tags WHERE id IN (SELECT value FROM json_each(?)) ORDER BY id',
+            (json.dumps(tag_ids),))
+        return [Tag(*row) for row in rows]
+
+    def find_tag_ids(self, document_ids):
+        """Find tag identifiers which are related to the given documents in ascending order."""
+        document_ids = set(document_ids)
+        if not document_ids:
+            return self._query_column('SELECT id FROM tags ORDER BY id')
+        return self._query_column(
+            'SELECT tag_id FROM relations WHERE document_id IN (SELECT value FROM json_each(?)) '
+            'GROUP BY tag_id HAVING COUNT(*) = ? ORDER BY tag_id',
+            (json.dumps(sorted(document_ids)), len(document_ids)))
+
+    def update_tag(self, id, name):
+        """Update the tag."""
+        tag = Tag(id, name)
+        if not self.has_tag(id):
+            raise ValueError('Invalid tag identifier!')
+        if self._has_tag_name(name):
+            raise ValueError('The tag name already exist!')
+        with self.batch():
+            self._connection.execute('UPDATE tags SET name = ? WHERE id = ?', (tag.name, id))
+
+    def destroy_tag(self, id):
+        """Remove the tag from the context."""
+        if not self.has_tag(id):
+            raise ValueError('Invalid tag identifier!')
+        with self.batch():
+            cursor = self._connection.execute('DELETE FROM relations WHERE tag_id = ?', (id,))
+            self._relation_count -= cursor.rowcount
+            self._connection.execute('DELETE FROM tags WHERE id = ?', (id,))
+            self._tag_count -= 1
+
+    def count_tags(self):
+        """Count the tags in the database."""
+        return self._tag_count
+
+    def create_relation(self, document_id, tag_id):
+        """Create relation between the document and the tag."""
+        if not self.has_document(document_id):
+            raise ValueError('Invalid document identifier!')
+        if not self.has_tag(tag_id):
+            raise ValueError('Invalid tag identifier!')
+        cursor = self._connection.execute(
+            'INSERT OR IGNORE INTO relations (tag_id, document_id) VALUES (?, ?)', (tag_id, document_id))
+        self._relation_count += cursor.rowcount
+
+    def destroy_relation(self, document_id, tag_id):
+        """Remove the relation between the document and the tag."""
+        cursor = self._connection.execute(
+            'DELETE FROM relations WHERE tag_id = ? AND document_id = ?', (tag_id, document_id))
+        if cursor.rowcount == 0:
+            raise ValueError('The destroyable relation does not exists!')
+        self._relation_count -= 1
+
+    def has_relation(self, document_id, tag_id):
+        """Check that the document is related to the tag."""
+        row = self._connection.execute(
+            'SELECT 1 FROM relations WHERE tag_id = ? AND document_id = ?', (tag_id, document_id)).fetchone()
+        return row is not None
+
+    def count_relations(self):
+        """Count the relations in the database."""
+        return self._relation_count
+
+    def restore_id_counters(self, last_document_id, last_tag_id):
+        """
+        Raise the stored high-water marks of the identifiers.
+        :param last_document_id: the largest document identifier which has ever been used
+        :param last_tag_id: the largest tag identifier which has ever been used
+        :return: None
+        """
+        with self.batch():
+            for table, last_id in [('documents', last_document_id), ('tags', last_tag_id)]:
+                cursor = self._connection.execute(
+                    'UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?', (last_id, table))
+                if cursor.rowcount == 0:
+                    self._connection.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)', (table, last_id))
+
+    def snapshot(self):
+        """
+        The snapshots are not supported, because the data is kept in the database file.
+        :raises ValueError: always
+        """
+        raise ValueError('The SQLite context does not support snapshots!')
+
+    def memory_stats(self, sample_size=MEMORY_SAMPLE_SIZE):
+        """
+        Estimate the memory usage of the database.
+        The data is kept in the file, only its cached pages are in memory, up to the cache size limit.
+        :param sample_size: not used, the sizes are calculated from the page counts
+        :return: dictionary of the page cache, the database file and the total in-memory bytes
+        """
+        page_size = self._query_value('PRAGMA page_size')
+        cache_size = self._query_value('PRAGMA cache_size')
+        cache_limit = cache_size * page_size if cache_size >= 0 else -cache_size * 1024
+        file_size = self._query_value('PRAGMA page_count') * page_size
+        page_cache = min(cache_limit, file_size)
+        return {'page_cache': page_cache, 'database_file': file_size, 'total': page_cache}
+
+    def get_id_counters(self):
+        """
+        Get the high-water marks of the identifiers, which are kept by SQLite even for the deleted rows.
+        :return: (last document identifier, last tag identifier) pair
+        """
+        counters = dict(self._connection.execute('SELECT name, seq FROM sqlite_sequence').fetchall())
+        return counters.get('documents', 0), counters.get('tags', 0)
+
+    def calc_last_document_id(self):
+        """
+        Calculate the last document identifier of the managed context.
+        :return: a positive integer value
+        """
+        return self._query_value('SELECT COALESCE(MAX(id), 0) FROM documents')
+
+    def calc_last_tag_id(self):
+        """
+        Calculate the last tag identifier of the managed context.
+        :return: a positive integer value
+        """
+        return self._query_value('SELECT COALESCE(MAX(id), 0) FROM tags')
+
+    def iterate_document_tag_ids(self):
+        """
+        Iterate over the tags of the documents with a single scan of the relation index.
+        :return: generator of the tag identifier sets of the tagged documents
+        """
+        rows = self._connection.execute('SELECT document_id, tag_id FROM relations ORDER BY document_id')
+        current_document_id = None
+        tag_ids = set()
+        for document_id, tag_id in rows:
+            if document_id != current_document_id and tag_ids:
+                yield tag_ids
+                tag_ids = set()
+            current_document_id = document_id
+            tag_ids.add(tag_id)
+        if tag_ids:
+            yield tag_ids
+
+    def _has_tag_name(self, name):
+        return self._connection.execute('SELECT 1 FROM tags WHERE name = ?', (name,)).fetchone() is not None
+
+    def _query_value(self, sql, parameters=()):
+        return self._connection.execute(sql, parameters).fetchone()[0]
+
+    def _query_column(self, sql, parameters=()):
+        return [row[0] for row in self._connection.execute(sql, parameters)]
+
+    def _handle_rollback(self):
+        """Restore the counts of the start of the rolled back transaction."""
+        self._document_count, self._tag_count, self._relation_count = self._batch_counts
+
+
+def migrate_log(log_path, database_path, progress=None):
+    """
+    Replay a log file into an SQLite database in a single transaction.
+    The logged identifiers are kept, and SQLite keeps their high-water marks even for the destroyed objects.
+    :param log_path: the path of the log file
+    :param database_path: the path of the SQLite database
+    :param progress: function which is called with the read and the total byte counts of the log
+    :return: the SQLiteContext of the migrated database
+    """
+    context = SQLiteContext(database_path)
+    with context.batch():
+        Logger(log_path).restore_context(context, progress)
+    return context
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Migrate a grimoire log file to an SQLite database.')
+    parser.add_argument('log_path', help='the path of the log file')
+    parser.add_argument('database_path', help='the path of the created SQLite database')
+    arguments = parser.parse_args()
+    context = migrate_log(arguments.log_path, arguments.database_path)
+    print('documents: {}, tags: {}, relations: {}'.format(
+        context.count_documents(), context.count_tags(), context.count_relations()))
+    context.close()
+
+
+if __name__ == '__main__':
+    main()
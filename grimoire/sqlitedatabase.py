@@ -0,0 +1,59 @@
+"""
+Database for tagging stored in SQLite
+"""
+
+from grimoire.cooccurrence import Cooccurrence
+from grimoire.database import Database
+from grimoire.sqlitecontext import SQLiteContext
+
+
+class SQLiteDatabase(Database, SQLiteContext):
+    """
+    Database for tagging which keeps its state in SQLite instead of a replayed log.
+    The identifier generation, the co-occurrence matrix and the tag name index are the same as in `Database`.
+    """
+
+    def __init__(self, path='/tmp/grimoire.db', max_cooccurrence_pairs=1000000):
+        """
+        Open or create the database.
+        :param path: the path of the SQLite database file
+        :param max_cooccurrence_pairs: the maximal number of the stored tag pairs
+        :return: None
+        """
+        SQLiteContext.__init__(self, path)
+        self._last_document_id, self._last_tag_id = SQLiteContext.get_id_counters(self)
+        self._cooccurrence = Cooccurrence(max_cooccurrence_pairs)
+        self._tag_name_index = None
+        self._is_restoring = False
+        self._rebuild_cooccurrence()
+
+    def save_operation(self, method, **arguments):
+        """
+        The changes are committed to SQLite, so there is no operation log.
+        :return: None
+        """
+        pass
+
+    def snapshot(self):
+        """
+        The snapshots are not supported, because the data is kept in the database file.
+        :raises ValueError: always
+        """
+        return SQLiteContext.snapshot(self)
+
+    def compact_log(self):
+        """
+        Rebuild the database file to reclaim the space of the deleted rows.
+        :return: None
+        """
+        self._connection.execute('VACUUM')
+
+    def _rebuild_cooccurrence(self):
+        self._cooccurrence.rebuild(self.iterate_document_tag_ids())
+
+    def _handle_rollback(self):
+        """Bring the identifier counters and the derived indexes back in sync with the rolled back tables."""
+        SQLiteContext._handle_rollback(self)
+        self._last_document_id, self._last_tag_id = SQLiteContext.get_id_counters(self)
+        self._rebuild_cooccurrence()
+        self._tag_name_index = None
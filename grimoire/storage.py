@@ -22,6 +22,17 @@ class Storage(object):
         Collect the file paths from the storage directory recursively.
         :return: list of paths as strings
         """
+        file_paths = []
+        for chunk in self.iterate_file_paths():
+            file_paths.extend(chunk)
+        return file_paths
+
+    def iterate_file_paths(self, chunk_size=1000):
+        """
+        Collect the file paths from the storage directory recursively in chunks.
+        :param chunk_size: the maximal number of paths in a chunk
+        :return: generator of lists of paths as strings
+        """
         offset = len(self._path)
         if self._path[-1] != '/':
             offset += 1
@@ -30,4 +41,8 @@ class Storage(object):
             for name in files:
                 file_path = os.path.join(root, name)[offset:]
                 file_paths.append(file_path)
-        return file_paths
+                if len(file_paths) == chunk_size:
+                    yield file_paths
+                    file_paths = []
+        if file_paths:
+            yield file_paths
@@ -6,6 +6,8 @@ Tag class definition
 class Tag(object):
     """Represents a tag"""
 
+    __slots__ = ('_id', '_name')
+
     def __init__(self, id, name):
         if '\n' in name:
             raise ValueError('The tag name cannot contain newline character!')
@@ -0,0 +1,177 @@
+"""
+Span tracing in the Chrome trace event format
+
+The saved files can be opened in chrome://tracing or in https://ui.perfetto.dev/.
+"""
+
+import collections
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+from grimoire.metrics import MethodLayer, collect_public_method_names
+
+
+DEFAULT_CAPACITY = 100000
+NULL_SPAN = contextlib.nullcontext()
+
+
+class Tracer(object):
+    """
+    Records the spans of the traced calls in a bounded ring buffer.
+    When the buffer is full, the oldest spans are dropped, so the tracer can be left enabled.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, enabled=False):
+        """
+        Create a tracer.
+        :param capacity: the maximal number of the kept spans
+        :param enabled: record the spans from the start
+        :return: None
+        :raises ValueError: for non-positive capacity
+        """
+        if capacity <= 0:
+            raise ValueError('The capacity should be positive!')
+        self._events = collections.deque(maxlen=capacity)
+        self._enabled = enabled
+        self._start_time = time.perf_counter()
+        self._process_id = os.getpid()
+        self._layers = {}
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    def enable(self):
+        """
+        Start recording the spans.
+        :return: None
+        """
+        self._enabled = True
+
+    def disable(self):
+        """
+        Stop recording the spans. The recorded spans are kept.
+        :return: None
+        """
+        self._enabled = False
+
+    def clear(self):
+        """
+        Remove the recorded spans.
+        :return: None
+        """
+        self._events.clear()
+
+    def get_events(self):
+        """
+        Get the recorded spans.
+        :return: list of trace event dictionaries in the order of their end
+        """
+        return list(self._events)
+
+    def span(self, name, category='', **arguments):
+        """
+        Create a context manager which records a span around its block.
+        :param name: the name of the span
+        :param category: the category of the span, for example scope or treeview
+        :param arguments: additional values which are shown with the span
+        :return: a context manager
+        """
+        if not self._enabled:
+            return NULL_SPAN
+        return self._record(name, category, arguments)
+
+    def traced(self, name=None, category='handler'):
+        """
+        Create a decorator which records the calls of the function as spans.
+        :param name: the name of the spans, the name of the function by default
+        :param category: the category of the spans
+        :return: the decorator
+        """
+        def decorator(function):
+            span_name = name or function.__name__
+
+            @functools.wraps(function)
+            def traced_function(*args, **kwargs):
+                if not self._enabled:
+                    return function(*args, **kwargs)
+                with self._record(span_name, category, {}):
+                    return function(*args, **kwargs)
+
+            return traced_function
+
+        return decorator
+
+    def instrument(self, target, category):
+        """
+        Record the calls of the public methods of the object as spans.
+        The methods are wrapped on the instance only.
+        :param target: the traced object, for example a Database or a Scope
+        :param category: the category of the spans
+        :return: None
+        """
+        def wrap(method_name, method, layer):
+            span_name = '{}.{}'.format(category, method_name)
+
+            @functools.wraps(method)
+            def traced_method(*args, **kwargs):
+                if not self._enabled or not layer.active:
+                    return method(*args, **kwargs)
+                with self._record(span_name, category, {}):
+                    return method(*args, **kwargs)
+
+            return traced_method
+
+        self.uninstrument(target)
+        self._layers[id(target)] = MethodLayer(target, collect_public_method_names(type(target)), wrap)
+
+    def uninstrument(self, target):
+        """
+        Stop recording the method calls of the object.
+        The wrappers of the other tools are not changed.
+        :param target: a previously instrumented object
+        :return: None
+        """
+        layer = self._layers.pop(id(target), None)
+        if layer is not None:
+            layer.remove()
+
+    def to_dict(self):
+        """
+        Collect the spans in the Chrome trace event format.
+        :return: JSON compatible dictionary
+        """
+        return {'traceEvents': self.get_events(), 'displayTimeUnit': 'ms'}
+
+    def save(self, path):
+        """
+        Write the spans to a Chrome trace event JSON file.
+        :param path: the path of the file
+        :return: None
+        """
+        with open(path, 'w') as trace_file:
+            json.dump(self.to_dict(), trace_file)
+
+    @contextlib.contextmanager
+    def _record(self, name, category, arguments):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            end_time = time.perf_counter()
+            event = {
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': (start_time - self._start_time) * 1e6,
+                'dur': (end_time - start_time) * 1e6,
+                'pid': self._process_id,
+                'tid': threading.get_ident()
+            }
+            if arguments:
+                event['args'] = arguments
+            self._events.append(event)
@@ -0,0 +1,148 @@
+"""
+Background worker for the user interface
+"""
+
+import queue
+import threading
+
+
+class Job(object):
+    """Represents a submitted background computation"""
+
+    def __init__(self, worker, function, args, on_done, on_partial, on_error):
+        self._worker = worker
+        self._function = function
+        self._args = args
+        self._on_done = on_done
+        self._on_partial = on_partial
+        self._on_error = on_error
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """
+        Cancel the job. Its pending results will be dropped.
+        :return: None
+        """
+        self._cancelled.set()
+
+    def is_cancelled(self):
+        """
+        Check that the job has been cancelled or superseded by a newer one.
+        The long running functions should check it periodically.
+        :return: True, when the job has been cancelled, else False
+        """
+        return self._cancelled.is_set()
+
+    def publish(self, value):
+        """
+        Send a partial result to the partial callback.
+        :param value: the partial result
+        :return: None
+        """
+        self._worker.put_message(self, self._on_partial, value)
+
+    def run(self):
+        """
+        Run the function of the job and send its result to the callbacks.
+        :return: None
+        """
+        try:
+            result = self._function(self, *self._args)
+        except Exception as error:
+            self._worker.put_message(self, self._on_error, error)
+        else:
+            self._worker.put_message(self, self._on_done, result)
+
+
+class BackgroundWorker(object):
+    """Runs the latest submitted job on a background thread"""
+
+    def __init__(self):
+        """
+        Start the background thread.
+        The callbacks of the jobs are called from the dispatch method, so from the thread of the caller.
+        :return: None
+        """
+        self._condition = threading.Condition()
+        self._pending_job = None
+        self._current_job = None
+        self._messages = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, function, *args, on_done=None, on_partial=None, on_error=None):
+        """
+        Submit a new job. It cancels the pending and the running jobs.
+        :param function: the computation, which is called with the job and the arguments
+        :param args: the arguments of the function
+        :param on_done: callback for the result of the function
+        :param on_partial: callback for the published partial results
+        :param on_error: callback for the raised exception
+        :return: the Job object
+        """
+        job = Job(self, function, args, on_done, on_partial, on_error)
+        with self._condition:
+            self._cancel_jobs()
+            self._pending_job = job
+            self._condition.notify()
+        return job
+
+    def cancel(self):
+        """
+        Cancel the pending and the running jobs.
+        :return: None
+        """
+        with self._condition:
+            self._cancel_jobs()
+            self._pending_job = None
+
+    def is_busy(self):
+        """
+        Check that there is a pending or running job which has not been cancelled.
+        :return: True, when the worker has an active job, else False
+        """
+        with self._condition:
+            for job in (self._pending_job, self._current_job):
+                if job is not None and not job.is_cancelled():
+                    return True
+        return False
+
+    def put_message(self, job, callback, value):
+        """
+        Queue a callback call for the dispatching thread.
+        :return: None
+        """
+        self._messages.put((job, callback, value))
+
+    def dispatch(self):
+        """
+        Call the callbacks of the finished computations, dropping the results of the cancelled jobs.
+        :return: the number of the called callbacks
+        """
+        count = 0
+        while True:
+            try:
+                job, callback, value = self._messages.get_nowait()
+            except queue.Empty:
+                return count
+            if callback is not None and not job.is_cancelled():
+                callback(value)
+                count += 1
+
+    def _cancel_jobs(self):
+        for job in (self._pending_job, self._current_job):
+            if job is not None:
+                job.cancel()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending_job is None:
+                    self._condition.wait()
+                job = self._pending_job
+                self._pending_job = None
+                self._current_job = job
+            if not job.is_cancelled():
+                job.run()
+            with self._condition:
+                self._current_job = None
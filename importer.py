@@ -5,6 +5,7 @@ File importer graphical application
 from datetime import datetime
 import os
 import subprocess
+import time
 
 import tkinter
 from tkinter import ttk
@@ -12,19 +13,52 @@ from tkinter import StringVar
 from tkinter import messagebox
 
 from grimoire.database import Database
+from grimoire.locking import ThreadSafeDatabase
+from grimoire.metrics import Metrics
+from grimoire.pathindex import PathIndex
+from grimoire.reconciler import TreeviewReconciler
+from grimoire.recorder import ScopeRecorder
 from grimoire.repository import Repository
-from grimoire.scope import Scope
+from grimoire.scheduler import RenderScheduler
+from grimoire.scope import Scope, calc_document_rows
 from grimoire.storage import Storage
+from grimoire.tracing import Tracer
+from grimoire.worker import BackgroundWorker
 
 
+STARTUP_TIME = time.perf_counter()
+
 DATABASE_PATH = '/tmp/importer/grimoire.log'
 STORAGE_PATH = '/tmp/importer/storage/'
 NOTES_PATH = '/tmp/importer/storage/notes/'
-
-database = Database(DATABASE_PATH)
+FALLBACK_DOCUMENT_LIMIT = 50
+DOCUMENT_BUFFER_SIZE = 50
+TAG_LIST_DELAY = 150
+WORKER_POLL_INTERVAL = 20
+SCAN_CHUNK_SIZE = 2000
+DIRECTORY_PAGE_SIZE = 1000
+DIRECTORY_IID_PREFIX = '/directory/'
+MORE_IID_PREFIX = '/more/'
+PLACEHOLDER_IID_PREFIX = '/placeholder/'
+TRACE_PATH = os.environ.get('GRIMOIRE_TRACE_PATH')
+METRICS_PATH = os.environ.get('GRIMOIRE_METRICS_PATH')
+TRACE_EVENTS_PATH = os.environ.get('GRIMOIRE_TRACE_EVENTS_PATH', '/tmp/importer/trace.json')
+
+database = None
 storage = Storage(STORAGE_PATH)
-repository = Repository(database, storage)
-scope = Scope(database)
+repository = None
+scope = None
+render_scheduler = None
+recorder = ScopeRecorder(TRACE_PATH) if TRACE_PATH else None
+metrics = Metrics() if METRICS_PATH else None
+tracer = Tracer(enabled='GRIMOIRE_TRACE_EVENTS_PATH' in os.environ)
+load_worker = BackgroundWorker()
+worker = BackgroundWorker()
+scan_worker = BackgroundWorker()
+untracked_index = PathIndex()
+scanned_index = PathIndex()
+directory_file_limits = {}
+tag_list_timer = None
 
 if os.path.isdir(NOTES_PATH) is False:
     os.mkdir(NOTES_PATH)
@@ -54,79 +88,310 @@ def open_path(file_path):
             _ = subprocess.Popen(['firefox', url])
 
 
-def list_untracked_files():
-    untracked_file_paths = repository.collect_untracked_file_paths()
-    file_view.delete(*file_view.get_children())
+def load_database(job):
+    """Replay the log on the background, publishing the (read, total) byte counts."""
+    return Database(DATABASE_PATH, progress=lambda read_size, total_size: job.publish((read_size, total_size)))
+
+
+def show_load_progress(progress):
+    read_size, total_size = progress
+    percent = 100 * read_size // total_size if total_size > 0 else 100
+    scan_status.set('Loading database: {}%'.format(percent))
+
+
+def finish_database_load(loaded_database):
+    """Create the objects which depend on the database, then enable the controls and fill the views."""
+    global database, repository, scope, render_scheduler
+    if metrics is not None:
+        metrics.instrument(loaded_database, 'database')
+    tracer.instrument(loaded_database, 'database')
+    database = ThreadSafeDatabase(loaded_database)
+    repository = Repository(database, storage)
+    scope = Scope(database)
+    if recorder is not None:
+        recorder.attach(scope)
+    if metrics is not None:
+        metrics.instrument(scope, 'scope')
+    tracer.instrument(scope, 'scope')
+    print('Database loaded in {:.3f} s'.format(time.perf_counter() - STARTUP_TIME))
+    render_scheduler = RenderScheduler(root.after_idle, scope)
+    render_scheduler.register('tags', list_current_tags)
+    render_scheduler.register('documents', list_current_documents)
+    render_scheduler.register('files', list_untracked_files)
+    bind_events()
+    render_scheduler.mark_dirty()
+
+
+def fail_database_load(error):
+    scan_status.set('Loading failed: {}'.format(error))
+
+
+@tracer.traced(category='render')
+def list_untracked_files(scope_state):
+    start_file_scan()
+
+
+def start_file_scan():
+    """Scan the storage on the background, superseding the running scan."""
+    global scanned_index
+    scanned_index = PathIndex()
+    document_paths = database.collect_document_paths()
+    scan_worker.submit(scan_untracked_files, document_paths,
+                       on_partial=show_scanned_files, on_done=finish_file_scan, on_error=fail_file_scan)
+    scan_status.set('Scanning...')
+
+
+def scan_untracked_files(job, document_paths):
+    untracked_count = 0
+    for untracked_file_paths, scanned_count in repository.iterate_untracked_file_paths(document_paths, SCAN_CHUNK_SIZE):
+        if job.is_cancelled():
+            return None
+        untracked_count += len(untracked_file_paths)
+        job.publish((untracked_file_paths, scanned_count))
+    return untracked_count
+
+
+def show_scanned_files(chunk):
+    """Add the scanned paths to the shown tree, which keeps the paths of the previous scan until the end."""
+    untracked_file_paths, scanned_count = chunk
     for file_path in untracked_file_paths:
-        file_view.insert('', tkinter.END, iid=file_path, text=file_path)
-
-
+        scanned_index.add(file_path)
+        untracked_index.add(file_path)
+    refresh_file_tree()
+    scan_status.set('Scanning: {} files'.format(scanned_count))
+
+
+def finish_file_scan(untracked_count):
+    global untracked_index
+    untracked_index = scanned_index
+    refresh_file_tree()
+    scan_status.set('{} untracked files'.format(untracked_count))
+
+
+def fail_file_scan(error):
+    scan_status.set('Scan failed: {}'.format(error))
+
+
+def cancel_file_scan():
+    scan_worker.cancel()
+    scan_status.set('Scan cancelled')
+
+
+def get_directory_iid(directory_path):
+    if directory_path == '':
+        return ''
+    return DIRECTORY_IID_PREFIX + directory_path
+
+
+def calc_directory_rows(directory_path):
+    """Calculate the rows of the subdirectories and a page of the files of the directory."""
+    rows = []
+    for path, file_count in untracked_index.list_directories(directory_path):
+        rows.append({
+            'iid': get_directory_iid(path),
+            'text': '{} ({})'.format(os.path.basename(path), file_count),
+            'tags': ['directory']
+        })
+    limit = directory_file_limits.get(directory_path, DIRECTORY_PAGE_SIZE)
+    for file_path in untracked_index.list_files(directory_path, 0, limit):
+        rows.append({'iid': file_path, 'text': os.path.basename(file_path), 'tags': ['file']})
+    remaining_count = untracked_index.count_direct_files(directory_path) - limit
+    if remaining_count > 0:
+        rows.append({
+            'iid': MORE_IID_PREFIX + directory_path,
+            'text': '... {} more files'.format(remaining_count),
+            'tags': ['more']
+        })
+    return rows
+
+
+def show_directory(directory_path):
+    """Update the rows of an opened directory and make its closed subdirectories openable."""
+    rows = calc_directory_rows(directory_path)
+    with tracer.span('file_view.update', 'treeview', rows=len(rows)):
+        directory_reconcilers[directory_path].update(rows)
+    for row in rows:
+        subdirectory_path = row['iid'][len(DIRECTORY_IID_PREFIX):]
+        if row['tags'] == ['directory'] and subdirectory_path not in directory_reconcilers:
+            if not file_view.get_children(row['iid']):
+                file_view.insert(row['iid'], tkinter.END, iid=PLACEHOLDER_IID_PREFIX + subdirectory_path, text='...')
+
+
+def refresh_file_tree():
+    """Update the opened directories from the parents to the children."""
+    for directory_path in sorted(directory_reconcilers):
+        if directory_path not in directory_reconcilers:
+            continue
+        if not untracked_index.has_directory(directory_path):
+            for opened_path in list(directory_reconcilers):
+                if opened_path == directory_path or opened_path.startswith(directory_path + '/'):
+                    del directory_reconcilers[opened_path]
+            continue
+        show_directory(directory_path)
+
+
+@tracer.traced()
+def open_directory(event):
+    """Insert the children of the directory at its first opening."""
+    iid = file_view.focus()
+    if not iid.startswith(DIRECTORY_IID_PREFIX):
+        return
+    directory_path = iid[len(DIRECTORY_IID_PREFIX):]
+    if directory_path in directory_reconcilers or not untracked_index.has_directory(directory_path):
+        return
+    placeholder_iids = file_view.get_children(iid)
+    if placeholder_iids:
+        file_view.delete(*placeholder_iids)
+    directory_reconcilers[directory_path] = TreeviewReconciler(file_view, iid)
+    show_directory(directory_path)
+
+
+def is_file_iid(iid):
+    return iid != '' and not iid.startswith('/')
+
+
+@tracer.traced()
 def open_file(event):
     file_path = file_view.identify_row(event.y)
-    print('Open {}'.format(file_path))
-    open_path(file_path)
+    if is_file_iid(file_path):
+        print('Open {}'.format(file_path))
+        open_path(file_path)
 
 
+@tracer.traced()
 def import_file(event):
     file_path = file_view.identify_row(event.y)
+    if not is_file_iid(file_path):
+        return
     document_id = repository.track_file(file_path)
     scope.copy_document(document_id)
-    list_untracked_files()
-    list_current_documents()
-
-
-def refresh_file_list(event):
-    list_untracked_files()
-
-
-def list_current_documents():
-    document_view.delete(*document_view.get_children())
-    documents = scope.get_selection_documents()
-    for document in documents:
-        document_view.insert('', tkinter.END, iid=document.id, text=document.name,
-                             values=[document.path, document.type], tags=['selected'])
-    documents = scope.get_concept_only_documents()
-    for document in documents:
-        document_view.insert('', tkinter.END, iid=document.id, text=document.name,
-                             values=[document.path, document.type])
-    document_view.tag_configure('selected', background='#FFFFBB')
-
-
-def list_current_tags():
-    tag_view.delete(*tag_view.get_children())
-    if scope.has_document_selection():
-        selection_only_tags = scope.get_selection_only_tags()
+    if file_path in untracked_index:
+        untracked_index.remove(file_path)
+    if file_path in scanned_index:
+        scanned_index.remove(file_path)
+    refresh_file_tree()
+    render_scheduler.mark_dirty('documents')
+
+
+@tracer.traced()
+def left_click_on_file_view(event):
+    """Show more files of a directory or rescan the storage when clicking on the empty area."""
+    iid = file_view.identify_row(event.y)
+    if iid.startswith(MORE_IID_PREFIX):
+        directory_path = iid[len(MORE_IID_PREFIX):]
+        directory_file_limits[directory_path] = directory_file_limits.get(directory_path, DIRECTORY_PAGE_SIZE) + DIRECTORY_PAGE_SIZE
+        refresh_file_tree()
+    elif iid == '':
+        render_scheduler.mark_dirty('files')
+
+
+@tracer.traced(category='render')
+def list_current_documents(scope_state):
+    document_ids, row_tags = calc_document_rows(scope_state, FALLBACK_DOCUMENT_LIMIT)
+    document_window.set_rows(document_ids, row_tags)
+
+
+def calc_tag_rows(job, scope_state, tag_name_input):
+    """Calculate the rows of the tag view from the scope state."""
+    rows = []
+    if scope_state.has_document_selection():
+        selection_only_tags = scope_state.get_selection_only_tags()
         for tag in selection_only_tags:
             args = {
                 'iid': tag.id,
                 'text': tag.name,
                 'tags': ['document']
             }
-            tag_view.insert('', tkinter.END, **args)
-    concept_tags = scope.get_concept_tags()
+            rows.append(args)
+    concept_tags = scope_state.get_concept_tags()
     for tag in concept_tags:
         args = {
             'iid': tag.id,
             'text': tag.name,
             'tags': ['query']
         }
-        tag_view.insert('', tkinter.END, **args)
-    suggested_tags = scope.get_suggested_tags(tag_entry.get())
+        rows.append(args)
+    concept_query = scope_state.get_concept_query()
+    if concept_query is not None:
+        rows.append({'iid': 'expression', 'text': str(concept_query), 'tags': ['expression']})
+    suggested_tags = scope_state.get_suggested_tags(tag_name_input)
     for tag in suggested_tags:
         args = {
+            'iid': 'suggestion:{}'.format(tag),
             'text': tag,
             'tags': ['suggestion']
         }
-        tag_view.insert('', tkinter.END, **args)
-    tag_view.tag_configure('document', background='#FFFFBB')
-    tag_view.tag_configure('query', background='#BBBBFF')
-    tag_view.tag_configure('suggestion', background='#EEEEEE')
+        rows.append(args)
+    return rows
+
+
+@tracer.traced(category='render')
+def show_tag_rows(rows):
+    with tracer.span('tag_view.update', 'treeview', rows=len(rows)):
+        tag_view_reconciler.update(rows)
 
 
+@tracer.traced(category='render')
+def list_current_tags(scope_state):
+    cancel_tag_list_request()
+    show_tag_rows(calc_tag_rows(None, scope_state, tag_entry.get()))
+
+
+def request_tag_list():
+    """Calculate the tag list on the worker thread from a copy of the scope on a snapshot of the database."""
+    global tag_list_timer
+    tag_list_timer = None
+    worker.submit(calc_tag_rows, scope.copy(database.snapshot()), tag_entry.get(),
+                  on_done=show_tag_rows, on_error=fail_tag_list)
+
+
+def fail_tag_list(error):
+    scan_status.set('Tag list failed: {}'.format(error))
+
+
+def cancel_tag_list_request():
+    global tag_list_timer
+    if tag_list_timer is not None:
+        root.after_cancel(tag_list_timer)
+        tag_list_timer = None
+    worker.cancel()
+
+
+@tracer.traced()
 def tag_entry_callback(*args):
-    list_current_tags()
+    """Refresh the tag list when the user has stopped typing."""
+    global tag_list_timer
+    if tag_list_timer is not None:
+        root.after_cancel(tag_list_timer)
+    worker.cancel()
+    tag_list_timer = root.after(TAG_LIST_DELAY, request_tag_list)
+
 
+def poll_worker():
+    load_worker.dispatch()
+    worker.dispatch()
+    scan_worker.dispatch()
+    root.after(WORKER_POLL_INTERVAL, poll_worker)
+
+
+@tracer.traced()
+def apply_query_expression(event):
+    try:
+        scope.set_concept_query(tag_entry.get())
+    except ValueError as error:
+        messagebox.showerror('Invalid query', str(error))
+        return
+    tag_entry.delete(0, tkinter.END)
+    render_scheduler.mark_dirty('tags', 'documents')
 
+
+@tracer.traced()
+def remove_query_expression():
+    scope.clear_concept_query()
+    render_scheduler.mark_dirty('tags', 'documents')
+
+
+@tracer.traced()
 def open_document(event):
     iid = document_view.identify_row(event.y)
     try:
@@ -138,53 +403,66 @@ def open_document(event):
         pass
 
 
+@tracer.traced()
 def select_single_document(event):
     iid = document_view.identify_row(event.y)
     try:
         document_id = int(iid)
         scope.deselect_all_documents()
         scope.toggle_document_selection(document_id)
-        list_current_documents()
-        list_current_tags()
+        render_scheduler.mark_dirty('documents', 'tags')
     except ValueError:
         pass
 
 
+@tracer.traced()
 def select_document(event):
     iid = document_view.identify_row(event.y)
     try:
         document_id = int(iid)
         scope.toggle_document_selection(document_id)
-        list_current_documents()
-        list_current_tags()
+        render_scheduler.mark_dirty('documents', 'tags')
     except ValueError:
         pass
 
 
 def add_tag_to_query(tag_id):
     scope.add_tag(tag_id)
-    list_current_tags()
-    list_current_documents()
+    render_scheduler.mark_dirty('tags', 'documents')
 
 
 def remove_tag_from_query(tag_id):
     scope.remove_tag(tag_id)
-    list_current_tags()
-    list_current_documents()
+    render_scheduler.mark_dirty('tags', 'documents')
 
 
 def add_tag_to_documents(tag_id):
     scope.add_tag(tag_id)
-    list_current_tags()
-    list_current_documents()
+    render_scheduler.mark_dirty('tags', 'documents')
 
 
 def remove_tag_from_documents(tag_id):
     scope.remove_tag(tag_id)
-    list_current_tags()
-    list_current_documents()
+    render_scheduler.mark_dirty('tags', 'documents')
+
+
+def find_or_create_tag(tag_name):
+    """Find the tag by name or create it after confirmation when there are tags with close names."""
+    try:
+        return scope.find_tag_id(tag_name)
+    except ValueError:
+        pass
+    close_tag_names = scope.find_close_tag_names(tag_name)
+    if close_tag_names:
+        message = 'There are similar tags:\n\n{}\n\nCreate the new tag "{}" anyway?'.format(
+            '\n'.join(close_tag_names), tag_name)
+        if not messagebox.askyesno('Similar tags', message):
+            return None
+    tag = scope.create_tag(tag_name)
+    return tag.id
 
 
+@tracer.traced()
 def left_click_on_tag(event):
     iid = tag_view.identify_row(event.y)
     if iid != '':
@@ -194,18 +472,17 @@ def left_click_on_tag(event):
             tag_id = None
         tags = tag_view.item(iid, 'tags')
         item_type = tags[0]
-        if scope.has_document_selection() is False:
+        if item_type == 'expression':
+            remove_query_expression()
+        elif scope.has_document_selection() is False:
             if item_type == 'query':
                 remove_tag_from_query(tag_id)
             elif item_type == 'suggestion':
                 tag_name = tag_view.item(iid, 'text')
-                try:
-                    tag_id = scope.find_tag_id(tag_name)
-                except ValueError:
-                    tag = scope.create_tag(tag_name)
-                    tag_id = tag.id
-                add_tag_to_query(tag_id)
-                tag_entry.delete(0, tkinter.END)
+                tag_id = find_or_create_tag(tag_name)
+                if tag_id is not None:
+                    add_tag_to_query(tag_id)
+                    tag_entry.delete(0, tkinter.END)
         else:
             if item_type == 'document':
                 add_tag_to_query(tag_id)
@@ -213,6 +490,7 @@ def left_click_on_tag(event):
                 remove_tag_from_query(tag_id)
 
 
+@tracer.traced()
 def right_click_on_tag(event):
     iid = tag_view.identify_row(event.y)
     if iid != '':
@@ -227,15 +505,13 @@ def right_click_on_tag(event):
                 remove_tag_from_documents(tag_id)
             elif item_type == 'suggestion':
                 tag_name = tag_view.item(iid, 'text')
-                try:
-                    tag_id = scope.find_tag_id(tag_name)
-                except ValueError:
-                    tag = scope.create_tag(tag_name)
-                    tag_id = tag.id
-                add_tag_to_query(tag_id)
-                tag_entry.delete(0, tkinter.END)
+                tag_id = find_or_create_tag(tag_name)
+                if tag_id is not None:
+                    add_tag_to_query(tag_id)
+                    tag_entry.delete(0, tkinter.END)
 
 
+@tracer.traced()
 def show_note_dialog():
     if scope.has_concept_tags() is True:
         note_dialog = NoteDialog(root)
@@ -244,6 +520,86 @@ def show_note_dialog():
         messagebox.showerror('Missing query tags', 'You should select query tags!')
 
 
+class DocumentWindow(object):
+    """
+    Shows a long document list in a Treeview by materializing only the visible rows.
+    The identifier list is calculated once per render, and the visible page is fetched with one scope call.
+    """
+
+    def __init__(self, view, scrollbar, buffer_size=DOCUMENT_BUFFER_SIZE):
+        self._view = view
+        self._reconciler = TreeviewReconciler(view)
+        self._scrollbar = scrollbar
+        self._buffer_size = buffer_size
+        self._document_ids = []
+        self._row_tags = {}
+        self._offset = 0
+        self._first_index = 0
+        self._last_index = 0
+        self._scrollbar.configure(command=self.scroll)
+        self._view.bind('<MouseWheel>', self.scroll_by_wheel)
+        self._view.bind('<Button-4>', self.scroll_by_wheel)
+        self._view.bind('<Button-5>', self.scroll_by_wheel)
+        self._view.bind('<Configure>', lambda event: self.render())
+
+    def set_rows(self, document_ids, row_tags):
+        """Set the listed document identifiers and the tags of the highlighted rows."""
+        self._document_ids = document_ids
+        self._row_tags = row_tags
+        self._first_index = 0
+        self._last_index = 0
+        self.render()
+
+    def count_visible_rows(self):
+        row_height = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        header_height = row_height + 4
+        return max((self._view.winfo_height() - header_height) // row_height, 1)
+
+    def scroll(self, command, *args):
+        """Handle the commands of the scrollbar."""
+        visible_count = self.count_visible_rows()
+        if command == 'moveto':
+            self._offset = int(float(args[0]) * len(self._document_ids))
+        elif command == 'scroll':
+            step = visible_count if args[1] == 'pages' else 1
+            self._offset += int(args[0]) * step
+        self.render()
+
+    def scroll_by_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.scroll('scroll', -3, 'units')
+        else:
+            self.scroll('scroll', 3, 'units')
+        return 'break'
+
+    def render(self):
+        """Materialize the visible rows with a buffer around them and update the scrollbar."""
+        document_count = len(self._document_ids)
+        visible_count = self.count_visible_rows()
+        self._offset = max(min(self._offset, document_count - visible_count), 0)
+        if not (self._first_index <= self._offset and self._offset + visible_count <= self._last_index):
+            self._first_index = max(self._offset - self._buffer_size, 0)
+            self._last_index = min(self._offset + visible_count + self._buffer_size, document_count)
+            rows = []
+            for document in scope.get_documents(self._document_ids[self._first_index:self._last_index]):
+                row_tag = self._row_tags.get(document.id)
+                rows.append({
+                    'iid': document.id,
+                    'text': document.name,
+                    'values': [document.path, document.type],
+                    'tags': [row_tag] if row_tag else []
+                })
+            with tracer.span('document_view.update', 'treeview', rows=len(rows)):
+                self._reconciler.update(rows)
+        materialized_count = self._last_index - self._first_index
+        if materialized_count > 0:
+            self._view.yview_moveto((self._offset - self._first_index) / materialized_count)
+        if document_count > 0:
+            self._scrollbar.set(self._offset / document_count, min((self._offset + visible_count) / document_count, 1.0))
+        else:
+            self._scrollbar.set(0.0, 1.0)
+
+
 class Note(object):
     """Represents a note"""
 
@@ -279,7 +635,7 @@ class Note(object):
         """Save the note."""
         self.save_to_storage()
         self.save_to_scope()
-        list_current_documents()
+        render_scheduler.mark_dirty('documents')
 
     def save_to_storage(self):
         """Save the note to the storage."""
@@ -353,53 +709,96 @@ class NoteDialog(object):
         self.top.destroy()
 
 
+@tracer.traced()
 def go_home():
     """Remove all selections and tags."""
     scope.deselect_all_documents()
     scope.remove_all_tags()
-    list_current_tags()
-    list_current_documents()
+    scope.clear_concept_query()
+    render_scheduler.mark_dirty('tags', 'documents')
+
+
+def toggle_tracing(event):
+    """Start or stop the span tracing, the spans are saved when it stops."""
+    if tracer.enabled:
+        tracer.disable()
+        tracer.save(TRACE_EVENTS_PATH)
+        print('Trace saved to {}'.format(TRACE_EVENTS_PATH))
+    else:
+        tracer.clear()
+        tracer.enable()
+        print('Tracing started')
+
+
+def bind_events():
+    """Connect the controls to the handlers, which need the loaded database."""
+    tag_entry_value.trace('w', tag_entry_callback)
+    tag_entry.bind('<Return>', apply_query_expression)
+    tag_view.bind('<Button-1>', left_click_on_tag)
+    tag_view.bind('<Button-3>', right_click_on_tag)
+    document_view.bind('<Button-1>', select_single_document)
+    document_view.bind('<Shift-Button-1>', select_document)
+    document_view.bind('<Button-3>', open_document)
+    file_view.bind('<Button-1>', left_click_on_file_view)
+    file_view.bind('<Button-2>', import_file)
+    file_view.bind('<Button-3>', open_file)
+    file_view.bind('<<TreeviewOpen>>', open_directory)
+    home_button.configure(state=tkinter.NORMAL)
+    note_button.configure(state=tkinter.NORMAL)
 
 
 root = tkinter.Tk()
 root.title('Grimoire - Importer')
+root.bind('<F12>', toggle_tracing)
 
 tag_entry_value = StringVar()
 tag_entry = tkinter.Entry(root, textvariable=tag_entry_value)
-tag_entry_value.trace('w', tag_entry_callback)
 
 tag_view = ttk.Treeview(root, selectmode='none')
-tag_view.bind('<Button-1>', left_click_on_tag)
-tag_view.bind('<Button-3>', right_click_on_tag)
-
-document_view = ttk.Treeview(root, columns=('name', 'type'), selectmode='none')
+tag_view.tag_configure('document', background='#FFFFBB')
+tag_view.tag_configure('query', background='#BBBBFF')
+tag_view.tag_configure('expression', background='#BBDDFF')
+tag_view.tag_configure('suggestion', background='#EEEEEE')
+tag_view_reconciler = TreeviewReconciler(tag_view)
+
+document_frame = tkinter.Frame(root)
+document_view = ttk.Treeview(document_frame, columns=('name', 'type'), selectmode='none')
 document_view.heading('name', text='name')
 document_view.heading('type', text='type')
-document_view.bind('<Button-1>', select_single_document)
-document_view.bind('<Shift-Button-1>', select_document)
-document_view.bind('<Button-3>', open_document)
+document_view.tag_configure('selected', background='#FFFFBB')
+document_view.tag_configure('partial', foreground='#777777')
+document_scrollbar = ttk.Scrollbar(document_frame, orient=tkinter.VERTICAL)
+document_window = DocumentWindow(document_view, document_scrollbar)
 
 file_view = ttk.Treeview(root, selectmode='none')
-file_view.bind('<Button-1>', refresh_file_list)
-file_view.bind('<Button-2>', import_file)
-file_view.bind('<Button-3>', open_file)
+file_view.tag_configure('more', foreground='#777777')
+directory_reconcilers = {'': TreeviewReconciler(file_view)}
 
 toolbar = tkinter.Frame(root)
 
 ordering_combobox = ttk.Combobox(toolbar)
-home_button = tkinter.Button(toolbar, text='Home', command=go_home)
-note_button = tkinter.Button(toolbar, text='Note', command=show_note_dialog)
+home_button = tkinter.Button(toolbar, text='Home', command=go_home, state=tkinter.DISABLED)
+note_button = tkinter.Button(toolbar, text='Note', command=show_note_dialog, state=tkinter.DISABLED)
+scan_status = StringVar()
+scan_label = tkinter.Label(toolbar, textvariable=scan_status, anchor=tkinter.W)
+stop_scan_button = tkinter.Button(toolbar, text='Stop scan', command=cancel_file_scan)
 
 full = (tkinter.N, tkinter.S, tkinter.E, tkinter.W)
 
 home_button.grid(row=0, column=0, sticky=full)
 note_button.grid(row=0, column=1, sticky=full)
 ordering_combobox.grid(row=0, column=2, sticky=full)
+scan_label.grid(row=0, column=3, sticky=full)
+stop_scan_button.grid(row=0, column=4, sticky=full)
 
 tag_entry.grid(row=0, column=0, sticky=full)
 toolbar.grid(row=0, column=1, sticky=full)
 tag_view.grid(row=1, column=0, sticky=full)
-document_view.grid(row=1, column=1, sticky=full)
+document_frame.grid(row=1, column=1, sticky=full)
+document_view.grid(row=0, column=0, sticky=full)
+document_scrollbar.grid(row=0, column=1, sticky=(tkinter.N, tkinter.S))
+document_frame.rowconfigure(0, weight=1)
+document_frame.columnconfigure(0, weight=1)
 
 file_view.grid(row=2, column=0, columnspan=2, sticky=full)
 
@@ -409,11 +808,25 @@ root.rowconfigure(2, weight=0)
 root.columnconfigure(0, weight=1)
 root.columnconfigure(1, weight=4)
 
-list_untracked_files()
-list_current_documents()
-list_current_tags()
-
 style = ttk.Style()
 style.theme_use('clam')
 
+root.wait_visibility(root)
+root.update_idletasks()
+print('First paint after {:.3f} s'.format(time.perf_counter() - STARTUP_TIME))
+
+scan_status.set('Loading database...')
+load_worker.submit(load_database, on_partial=show_load_progress, on_done=finish_database_load, on_error=fail_database_load)
+poll_worker()
+
 root.mainloop()
+
+if recorder is not None:
+    recorder.close()
+if metrics is not None:
+    if METRICS_PATH.endswith('.prom'):
+        metrics.save_prometheus(METRICS_PATH)
+    else:
+        metrics.save_json(METRICS_PATH)
+if tracer.enabled:
+    tracer.save(TRACE_EVENTS_PATH)
@@ -0,0 +1,89 @@
+import unittest
+
+from grimoire.chunkedmap import CHUNK_BITS, ChunkedMap
+
+
+class ChunkedMapTest(unittest.TestCase):
+    """Unittest for the dictionary with copy-on-write snapshots"""
+
+    def test_dictionary_operations(self):
+        chunked_map = ChunkedMap([(1, 'a'), ('b', 2)])
+        chunked_map[5000] = 'c'
+        chunked_map[1] = 'd'
+        self.assertEqual(len(chunked_map), 3)
+        self.assertEqual(chunked_map[1], 'd')
+        self.assertEqual(chunked_map.get('b'), 2)
+        self.assertIsNone(chunked_map.get('missing'))
+        self.assertIn(5000, chunked_map)
+        self.assertNotIn(2, chunked_map)
+        self.assertEqual(dict(chunked_map.items()), {1: 'd', 'b': 2, 5000: 'c'})
+        self.assertEqual(sorted(chunked_map.values(), key=str), [2, 'c', 'd'])
+        self.assertEqual(chunked_map.pop(5000), 'c')
+        self.assertEqual(chunked_map.pop(5000, None), None)
+        del chunked_map['b']
+        self.assertEqual(list(chunked_map), [1])
+        with self.assertRaises(KeyError):
+            _ = chunked_map[5000]
+        with self.assertRaises(KeyError):
+            chunked_map.pop('b')
+
+    def test_snapshot_isolation(self):
+        chunked_map = ChunkedMap((key, str(key)) for key in range(3000))
+        snapshot = chunked_map.snapshot()
+        chunked_map[0] = 'changed'
+        chunked_map[5000] = 'new'
+        chunked_map.pop(2999)
+        self.assertEqual(snapshot[0], '0')
+        self.assertNotIn(5000, snapshot)
+        self.assertEqual(snapshot[2999], '2999')
+        self.assertEqual(len(snapshot), 3000)
+        self.assertEqual(len(chunked_map), 3000)
+        self.assertEqual(chunked_map[0], 'changed')
+        self.assertTrue(snapshot.is_frozen())
+        self.assertFalse(chunked_map.is_frozen())
+        self.assertIs(snapshot.snapshot(), snapshot)
+
+    def test_shared_chunks(self):
+        chunked_map = ChunkedMap((key, key) for key in range(4 << CHUNK_BITS))
+        snapshot = chunked_map.snapshot()
+        chunked_map[0] = -1
+        self.assertIs(chunked_map._chunks[1], snapshot._chunks[1])
+        self.assertIsNot(chunked_map._chunks[0], snapshot._chunks[0])
+
+    def test_get_mutable(self):
+        chunked_map = ChunkedMap([(1, {1, 2})])
+        chunked_map.get_mutable(1).add(3)
+        snapshot = chunked_map.snapshot()
+        value = chunked_map.get_mutable(1)
+        value.remove(1)
+        self.assertIs(chunked_map.get_mutable(1), value)
+        self.assertEqual(snapshot[1], {1, 2, 3})
+        self.assertEqual(chunked_map[1], {2, 3})
+        with self.assertRaises(KeyError):
+            chunked_map.get_mutable(2)
+
+    def test_read_only_snapshot(self):
+        snapshot = ChunkedMap([(1, {1})]).snapshot()
+        with self.assertRaises(ValueError):
+            snapshot[2] = set()
+        with self.assertRaises(ValueError):
+            snapshot.pop(1)
+        with self.assertRaises(ValueError):
+            snapshot.get_mutable(1)
+
+    def test_emptied_chunk(self):
+        chunked_map = ChunkedMap([(1, 'a')])
+        snapshot = chunked_map.snapshot()
+        chunked_map.pop(1)
+        chunked_map[2] = 'b'
+        chunked_map.pop(2)
+        chunked_map[3] = 'c'
+        self.assertEqual(dict(chunked_map.items()), {3: 'c'})
+        self.assertEqual(dict(snapshot.items()), {1: 'a'})
+
+    def test_memory_usage(self):
+        chunked_map = ChunkedMap()
+        empty_size = chunked_map.calc_memory_usage()
+        for key in range(100):
+            chunked_map[key] = key
+        self.assertGreater(chunked_map.calc_memory_usage(), empty_size)
@@ -0,0 +1,218 @@
+import gc
+import math
+import os
+import time
+import unittest
+
+from grimoire.context import Context
+from grimoire.database import Database
+from grimoire.logger import Logger
+from grimoire.pathindex import PathIndex
+from grimoire.scope import Scope
+
+TEST_LOG_PATH = '/tmp/grimoire_complexity_test_{}.log'.format(os.getpid())
+
+COMPLEXITY_EXPONENTS = {
+    'constant': 0.0,
+    'linear': 1.0
+}
+EXPONENT_TOLERANCE = 0.5
+SIZE_RATIO = 4
+REPEAT = 5
+LOOKUP_COUNT = 40000
+SELECTION_ROUNDS = 10
+QUERY_ROUNDS = 40
+DESELECTION_SCOPES = 4
+
+
+def remove_test_log():
+    try:
+        os.remove(TEST_LOG_PATH)
+    except OSError:
+        pass
+
+
+def min_time(best_time, elapsed_time):
+    if best_time is None:
+        return elapsed_time
+    return min(best_time, elapsed_time)
+
+
+class ComplexityTest(unittest.TestCase):
+    """
+    Checks the growth rate of the key operations.
+    The operations run on two dataset sizes, and the exponent of the time ratio
+    should not exceed the declared complexity class by more than the tolerance.
+    A quadratic regression doubles the exponent of a linear operation, so it fails clearly.
+    The sizes are chosen so that a measurement of the smaller size takes a few tens of milliseconds,
+    which keeps the ratio stable on a loaded machine. The fast queries are repeated in rounds for this.
+    """
+
+    def setUp(self):
+        remove_test_log()
+
+    def assert_complexity(self, complexity, prepare, run, size):
+        """
+        Compare the best running times of two sizes.
+        The two sizes are measured alternately, so a temporary load of the machine slows down both of them.
+        :param complexity: the name of the declared complexity class
+        :param prepare: function which creates the input of the given size, which is not measured
+        :param run: the measured function, which is called with the prepared input
+        :param size: the smaller size, the larger one is SIZE_RATIO times more
+        :return: None
+        """
+        small_time = None
+        large_time = None
+        for _ in range(REPEAT):
+            small_time = min_time(small_time, self.measure(prepare, run, size))
+            large_time = min_time(large_time, self.measure(prepare, run, size * SIZE_RATIO))
+        exponent = math.log(max(large_time, 1e-9) / max(small_time, 1e-9)) / math.log(SIZE_RATIO)
+        message = '{} growth expected, the time changed from {:.6f} s to {:.6f} s (exponent {:.2f})'.format(
+            complexity, small_time, large_time, exponent)
+        self.assertLessEqual(exponent, COMPLEXITY_EXPONENTS[complexity] + EXPONENT_TOLERANCE, message)
+
+    def measure(self, prepare, run, size):
+        data = prepare(size)
+        gc.collect()
+        gc.disable()
+        try:
+            start_time = time.perf_counter()
+            run(data)
+            return time.perf_counter() - start_time
+        finally:
+            gc.enable()
+
+    def test_create_tags(self):
+        def run(size):
+            context = Context()
+            for tag_id in range(1, size + 1):
+                context.create_tag(tag_id, 'tag_{}'.format(tag_id))
+
+        self.assert_complexity('linear', lambda size: size, run, 5000)
+
+    def test_update_tags(self):
+        def prepare(size):
+            context = Context()
+            for tag_id in range(1, size + 1):
+                context.create_tag(tag_id, 'tag_{}'.format(tag_id))
+            return context
+
+        def run(context):
+            for tag_id in range(1, context.count_tags() + 1):
+                context.update_tag(tag_id, 'renamed_{}'.format(tag_id))
+
+        self.assert_complexity('linear', prepare, run, 5000)
+
+    def test_find_tag_id(self):
+        def prepare(size):
+            context = Context()
+            for tag_id in range(1, size + 1):
+                context.create_tag(tag_id, 'tag_{}'.format(tag_id))
+            return context
+
+        def run(context):
+            for index in range(LOOKUP_COUNT):
+                context.find_tag_id('tag_{}'.format(index % 2000 + 1))
+
+        self.assert_complexity('constant', prepare, run, 2000)
+
+    def test_replay(self):
+        def prepare(size):
+            remove_test_log()
+            logger = Logger(TEST_LOG_PATH)
+            for index in range(1, size + 1):
+                logger.save_operation({
+                    'method': 'create_document', 'id': index, 'name': 'doc_{}.txt'.format(index),
+                    'type': 'txt', 'path': 'doc_{}.txt'.format(index)})
+                logger.save_operation({'method': 'create_tag', 'id': index, 'name': 'tag_{}'.format(index)})
+            for index in range(1, size + 1):
+                logger.save_operation({'method': 'create_relation', 'document_id': index, 'tag_id': (index % 10) + 1})
+            return TEST_LOG_PATH
+
+        self.assert_complexity('linear', prepare, Database, 500)
+
+    def test_destroy_documents(self):
+        def prepare(size):
+            database = Database(path=TEST_LOG_PATH)
+            database._logger.disable_logging()
+            for tag_index in range(10):
+                database.create_tag(name='tag_{}'.format(tag_index))
+            for document_index in range(size):
+                document = database.create_document(name='doc.txt', type='txt', path='doc.txt')
+                for tag_id in range(1, 4):
+                    database.create_relation(document_id=document.id, tag_id=(document_index + tag_id) % 10 + 1)
+            return database
+
+        def run(database):
+            for document_id in range(1, database.count_documents() + 1):
+                database.destroy_document(id=document_id)
+
+        self.assert_complexity('linear', prepare, run, 1000)
+
+    def test_select_documents(self):
+        def prepare(size):
+            context = Context()
+            for document_id in range(1, size + 1):
+                context.create_document(document_id, 'doc.txt', 'txt', 'doc.txt')
+            return Scope(context), size
+
+        def run(data):
+            scope, size = data
+            for _ in range(SELECTION_ROUNDS):
+                for document_id in range(1, size + 1):
+                    scope.toggle_document_selection(document_id)
+                for document_id in range(1, size + 1):
+                    scope.deselect_document(document_id)
+
+        self.assert_complexity('linear', prepare, run, 4000)
+
+    def test_deselect_documents(self):
+        def prepare(size):
+            context = Context()
+            for document_id in range(1, size + 1):
+                context.create_document(document_id, 'doc.txt', 'txt', 'doc.txt')
+            scopes = []
+            for _ in range(DESELECTION_SCOPES):
+                scope = Scope(context)
+                for document_id in range(1, size + 1):
+                    scope.select_document(document_id)
+                scopes.append(scope)
+            return scopes, size
+
+        def run(data):
+            scopes, size = data
+            for scope in scopes:
+                for document_id in range(1, size + 1):
+                    scope.deselect_document(document_id)
+
+        self.assert_complexity('linear', prepare, run, 16000)
+
+    def test_concept_only_document_ids(self):
+        def prepare(size):
+            context = Context()
+            context.create_tag(1, 'common')
+            for document_id in range(1, size + 1):
+                context.create_document(document_id, 'doc.txt', 'txt', 'doc.txt')
+                context.create_relation(document_id, 1)
+            scope = Scope(context)
+            scope.add_tag(1)
+            for document_id in range(1, size + 1, 2):
+                scope.select_document(document_id)
+            return scope
+
+        def run(scope):
+            for _ in range(QUERY_ROUNDS):
+                scope.get_concept_only_document_ids()
+
+        self.assert_complexity('linear', prepare, run, 5000)
+
+    def test_path_index(self):
+        def prepare(size):
+            return ['dir_{}/sub_{}/file_{}.txt'.format(index % 50, index % 7, index) for index in range(size)]
+
+        def run(paths):
+            index = PathIndex(paths)
+            for path in paths[::2]:
+                index.remove(path)
+
+        self.assert_complexity('linear', prepare, run, 5000)
@@ -1,19 +1,24 @@
 import unittest
 
-from grimoire.context import Context
+from grimoire.context import Context, estimate_size
+from grimoire.documenttable import DocumentTable
+from grimoire.sqlitecontext import SQLiteContext
 
 
 class ContextTest(unittest.TestCase):
     """Unittest for the context class"""
 
+    def create_context(self):
+        return Context()
+
     def test_empty_database(self):
-        context = Context()
+        context = self.create_context()
         self.assertEqual(context.count_documents(), 0)
         self.assertEqual(context.count_tags(), 0)
         self.assertEqual(context.count_relations(), 0)
 
     def test_document_creation(self):
-        context = Context()
+        context = self.create_context()
         context.create_document(1, 'first.txt', 'txt', '/tmp/first.txt')
         self.assertEqual(context.count_documents(), 1)
         document = context.get_document(1)
@@ -22,25 +27,34 @@ class ContextTest(unittest.TestCase):
         self.assertEqual(document.type, 'txt')
         self.assertEqual(document.path, '/tmp/first.txt')
 
+    def test_get_documents(self):
+        context = self.create_context()
+        for document_id in range(1, 4):
+            context.create_document(document_id, 'doc_{}.txt'.format(document_id), 'txt', '/tmp/doc.txt')
+        self.assertEqual([document.name for document in context.get_documents([3, 1])], ['doc_3.txt', 'doc_1.txt'])
+        self.assertEqual(context.get_documents([]), [])
+        with self.assertRaises(ValueError):
+            _ = context.get_documents([1, 4])
+
     def test_missing_document(self):
-        context = Context()
+        context = self.create_context()
         context.create_document(1, 'first.txt', 'txt', '/tmp/first.txt')
         with self.assertRaises(ValueError):
             _ = context.get_document(2)
 
     def test_invalid_document_creation(self):
-        context = Context()
+        context = self.create_context()
         context.create_document(1, 'first.txt', 'txt', '/tmp/first.txt')
         with self.assertRaises(ValueError):
             context.create_document(1, 'second.txt', 'txt', '/tmp/second.txt')
 
     def test_find_all_documents_from_empty_database(self):
-        context = Context()
+        context = self.create_context()
         documents = context.find_documents([])
         self.assertEqual(documents, [])
 
     def test_find_all_documents(self):
-        context = Context()
+        context = self.create_context()
         context.create_document(1, 'first.txt', 'txt', '/tmp/first.txt')
         context.create_document(2, 'second.txt', 'txt', '/tmp/second.txt')
         documents = context.find_documents([])
@@ -55,7 +69,7 @@ class ContextTest(unittest.TestCase):
         self.assertEqual(documents[1].path, '/tmp/second.txt')
 
     def test_update_document_name(self):
-        context = Context()
+        context = self.create_context()
         context.create_document(1, 'first.txt', 'txt', '/tmp/first.txt')
         context.update_document(1, name='second.txt')
         document = context.get_document(1)
@@ -65,7 +79,7 @@ class ContextTest(unittest.TestCase):
         self.assertEqual(document.path, '/tmp/first.txt')
 
     def test_update_document_type(self):
-        context = Context()
+        context = self.create_context()
         context.create_document(1, 'first.txt', 'txt', '/tmp/first.txt')
         context.update_document(1, type='csv')
         document = context.get_document(1)
@@ -75,7 +89,7 @@ class ContextTest(unittest.TestCase):
         self.assertEqual(document.path, '/tmp/first.txt')
 
     def test_update_document_path(self):
-        context = Context()
+        context = self.create_context()
         context.create_document(1, 'first.txt', 'txt', '/tmp/first.txt')
         context.update_document(1, path='/tmp/here/first.txt')
         document = context.get_document(1)
@@ -85,7 +99,7 @@ class ContextTest(unittest.TestCase):
         self.assertEqual(document.path, '/tmp/here/first.txt')
 
     def test_update_document(self):
-        context = Context()
+        context = self.create_context()
         context.create_document(1, 'first.txt', 'txt', '/tmp/first.txt')
         context.update_document(1, 'second.csv', 'csv', '/tmp/second.csv')
         document = context.get_document(1)
@@ -94,27 +108,96 @@ class ContextTest(unittest.TestCase):
         self.assertEqual(document.type, 'csv')
         self.assertEqual(document.path, '/tmp/second.csv')
 
+    def test_unchanged_document_update(self):
+        context = self.create_context()
+        context.create_document(1, 'first.txt', 'txt', '/tmp/first.txt')
+        document = context.get_document(1)
+        context.update_document(1, name='first.txt')
+        self.assertIs(context.get_document(1), document)
+
+    def test_interned_document_types(self):
+        context = self.create_context()
+        context.create_document(1, 'first.txt', ''.join(['t', 'xt']), '/tmp/first.txt')
+        context.create_document(2, 'second.txt', ''.join(['tx', 't']), '/tmp/second.txt')
+        self.assertIs(context.get_document(1).type, context.get_document(2).type)
+        with self.assertRaises(AttributeError):
+            context.get_document(1).extra = 'value'
+
+    def test_memory_stats(self):
+        context = self.create_context()
+        empty_stats = context.memory_stats()
+        for document_id in range(1, 101):
+            context.create_document(document_id, 'doc_{}.txt'.format(document_id), 'txt', '/tmp/doc.txt')
+        context.create_tag(1, 'book')
+        for document_id in range(1, 101):
+            context.create_relation(document_id, 1)
+        stats = context.memory_stats(sample_size=10)
+        self.assertEqual(stats['total'], sum(size for part, size in stats.items() if part != 'total'))
+        for part in ['documents', 'document_strings', 'tags', 'tag_strings', 'relations']:
+            self.assertGreater(stats[part], empty_stats[part])
+
+    def test_snapshot(self):
+        context = self.create_context()
+        for document_id in range(1, 4):
+            context.create_document(document_id, 'doc_{}.txt'.format(document_id), 'txt', '/tmp/doc.txt')
+        context.create_tag(1, 'book')
+        context.create_tag(2, 'paper')
+        context.create_relation(1, 1)
+        context.create_relation(2, 1)
+        snapshot = context.snapshot()
+        context.create_relation(3, 1)
+        context.destroy_relation(1, 1)
+        context.update_document(2, name='renamed.txt')
+        context.destroy_document(2)
+        context.update_tag(2, 'article')
+        context.create_tag(3, 'python')
+        self.assertEqual(snapshot.find_document_ids([1]), [1, 2])
+        self.assertEqual(snapshot.get_document_tag_ids(1), {1})
+        self.assertEqual(snapshot.get_document(2).name, 'doc_2.txt')
+        self.assertEqual(snapshot.find_tag_id('paper'), 2)
+        self.assertFalse(snapshot.has_tag(3))
+        self.assertEqual((snapshot.count_documents(), snapshot.count_tags(), snapshot.count_relations()), (3, 2, 2))
+        self.assertEqual(context.find_document_ids([1]), [3])
+        self.assertEqual(context.count_relations(), 1)
+        self.assertIs(snapshot.snapshot(), snapshot)
+
+    def test_read_only_snapshot(self):
+        context = self.create_context()
+        context.create_document(1, 'first.txt', 'txt', '/tmp/first.txt')
+        context.create_tag(1, 'book')
+        snapshot = context.snapshot()
+        with self.assertRaises(ValueError):
+            snapshot.create_document(2, 'second.txt', 'txt', '/tmp/second.txt')
+        with self.assertRaises(ValueError):
+            snapshot.update_tag(1, 'paper')
+        with self.assertRaises(ValueError):
+            snapshot.create_relation(1, 1)
+        with self.assertRaises(ValueError):
+            snapshot.destroy_document(1)
+        self.assertEqual(context.count_relations(), 0)
+        self.assertTrue(snapshot.has_document(1))
+
     def test_update_missing_document(self):
-        context = Context()
+        context = self.create_context()
         context.create_document(1, 'first.txt', 'txt', '/tmp/first.txt')
         with self.assertRaises(ValueError):
             context.update_document(2, path='/tmp/nowhere.txt', type='missing')
 
     def test_remove_document(self):
-        context = Context()
+        context = self.create_context()
         context.create_document(1, 'first.txt', 'txt', '/tmp/first.txt')
         context.destroy_document(1)
         with self.assertRaises(ValueError):
             _ = context.get_document(1)
 
     def test_remove_missing_document(self):
-        context = Context()
+        context = self.create_context()
         context.create_document(1, 'first.txt', 'txt', '/tmp/first.txt')
         with self.assertRaises(ValueError):
             context.destroy_document(2)
 
     def test_reuse_document_identifier(self):
-        context = Context()
+        context = self.create_context()
         context.create_document(1, 'first.txt', 'txt', '/tmp/first.txt')
         context.destroy_document(1)
         context.create_document(1, 'other.dat', 'data', '/tmp/other.dat')
@@ -125,7 +208,7 @@ class ContextTest(unittest.TestCase):
         self.assertEqual(document.path, '/tmp/other.dat')
 
     def test_document_counting(self):
-        context = Context()
+        context = self.create_context()
         self.assertEqual(context.count_documents(), 0)
         context.create_document(1, 'first.txt', 'txt', '/tmp/first.txt')
         self.assertEqual(context.count_documents(), 1)
@@ -141,7 +224,7 @@ class ContextTest(unittest.TestCase):
         self.assertEqual(context.count_documents(), 0)
 
     def test_tag_creation(self):
-        context = Context()
+        context = self.create_context()
         context.create_tag(1, 'python')
         self.assertEqual(context.count_tags(), 1)
         tag = context.get_tag(1)
@@ -149,24 +232,24 @@ class ContextTest(unittest.TestCase):
         self.assertEqual(tag.name, 'python')
 
     def test_missing_tag(self):
-        context = Context()
+        context = self.create_context()
         context.create_tag(1, 'python')
         with self.assertRaises(ValueError):
             _ = context.get_tag(2)
 
     def test_invalid_tag_creation(self):
-        context = Context()
+        context = self.create_context()
         context.create_tag(1, 'python')
         with self.assertRaises(ValueError):
             context.create_tag(1, 'rust')
 
     def test_find_all_tags_from_empty_database(self):
-        context = Context()
+        context = self.create_context()
         tags = context.find_tags([])
         self.assertEqual(tags, [])
 
     def test_find_all_tags(self):
-        context = Context()
+        context = self.create_context()
         context.create_tag(1, 'python')
         context.create_tag(2, 'rust')
         tags = context.find_tags([])
@@ -177,7 +260,7 @@ class ContextTest(unittest.TestCase):
         self.assertEqual(tags[1].name, 'rust')
 
     def test_update_tag(self):
-        context = Context()
+        context = self.create_context()
         context.create_tag(1, 'python')
         context.update_tag(1, 'lua')
         tag = context.get_tag(1)
@@ -185,26 +268,26 @@ class ContextTest(unittest.TestCase):
         self.assertEqual(tag.name, 'lua')
 
     def test_update_missing_tag(self):
-        context = Context()
+        context = self.create_context()
         context.create_tag(1, 'python')
         with self.assertRaises(ValueError):
             context.update_tag(2, 'lua')
 
     def test_remove_tag(self):
-        context = Context()
+        context = self.create_context()
         context.create_tag(1, 'python')
         context.destroy_tag(1)
         with self.assertRaises(ValueError):
             _ = context.get_tag(1)
 
     def test_remove_missing_tag(self):
-        context = Context()
+        context = self.create_context()
         context.create_tag(1, 'python')
         with self.assertRaises(ValueError):
             context.destroy_tag(2)
 
     def test_reuse_tag_identifier(self):
-        context = Context()
+        context = self.create_context()
         context.create_tag(1, 'python')
         context.destroy_tag(1)
         context.create_tag(1, 'rust')
@@ -213,7 +296,7 @@ class ContextTest(unittest.TestCase):
         self.assertEqual(tag.name, 'rust')
 
     def test_tag_counting(self):
-        context = Context()
+        context = self.create_context()
         self.assertEqual(context.count_tags(), 0)
         context.create_tag(2, 'rust')
         self.assertEqual(context.count_tags(), 1)
@@ -229,20 +312,20 @@ class ContextTest(unittest.TestCase):
         self.assertEqual(context.count_tags(), 0)
 
     def test_unique_tag_name_on_creation(self):
-        context = Context()
+        context = self.create_context()
         context.create_tag(1, 'python')
         with self.assertRaises(ValueError):
             context.create_tag(2, 'python')
 
     def test_unique_tag_name_on_update(self):
-        context = Context()
+        context = self.create_context()
         context.create_tag(1, 'python')
         context.create_tag(2, 'rust')
         with self.assertRaises(ValueError):
             context.update_tag(2, 'python')
 
     def test_find_tag_id(self):
-        context = Context()
+        context = self.create_context()
         context.create_tag(1, 'python')
         context.create_tag(2, 'rust')
         context.create_tag(3, 'lua')
@@ -251,7 +334,7 @@ class ContextTest(unittest.TestCase):
         self.assertEqual(context.find_tag_id('python'), 1)
 
     def test_find_id_of_missing_tag(self):
-        context = Context()
+        context = self.create_context()
         context.create_tag(1, 'python')
         context.create_tag(2, 'rust')
         context.create_tag(3, 'lua')
@@ -259,7 +342,7 @@ class ContextTest(unittest.TestCase):
             _ = context.find_tag_id('java')
 
     def test_create_relations(self):
-        context = Context()
+        context = self.create_context()
         context.create_document(1, 'python.pdf', 'pdf', '/tmp/python.pdf')
         context.create_document(2, 'rust.pdf', 'pdf', '/tmp/rust.pdf')
         context.create_document(3, 'lua.pdf', 'pdf', '/tmp/lua.pdf')
@@ -274,19 +357,19 @@ class ContextTest(unittest.TestCase):
         self.assertEqual(context.find_tag_ids([3]), [1])
 
     def test_create_relation_with_invalid_document(self):
-        context = Context()
+        context = self.create_context()
         context.create_tag(1, 'book')
         with self.assertRaises(ValueError):
             context.create_relation(1, 1)
 
     def test_create_relation_with_invalid_tag(self):
-        context = Context()
+        context = self.create_context()
         context.create_document(1, 'python.pdf', 'pdf', '/tmp/python.pdf')
         with self.assertRaises(ValueError):
             context.create_relation(1, 1)
 
     def test_remove_relations(self):
-        context = Context()
+        context = self.create_context()
         context.create_document(1, 'python.pdf', 'pdf', '/tmp/python.pdf')
         context.create_document(2, 'rust.pdf', 'pdf', '/tmp/rust.pdf')
         context.create_document(3, 'lua.pdf', 'pdf', '/tmp/lua.pdf')
@@ -303,14 +386,14 @@ class ContextTest(unittest.TestCase):
         self.assertEqual(context.count_relations(), 0)
 
     def test_remove_missing_relation(self):
-        context = Context()
+        context = self.create_context()
         context.create_tag(1, 'book')
         context.create_document(1, 'python.pdf', 'pdf', '/tmp/python.pdf')
         with self.assertRaises(ValueError):
             context.destroy_relation(1, 1)
 
     def test_remove_relations_with_document(self):
-        context = Context()
+        context = self.create_context()
         context.create_document(1, 'python.pdf', 'pdf', '/tmp/python.pdf')
         context.create_document(2, 'rust.pdf', 'pdf', '/tmp/rust.pdf')
         context.create_document(3, 'lua.pdf', 'pdf', '/tmp/lua.pdf')
@@ -326,7 +409,7 @@ class ContextTest(unittest.TestCase):
         self.assertEqual(context.count_relations(), 0)
 
     def test_remove_relations_with_tag(self):
-        context = Context()
+        context = self.create_context()
         context.create_document(1, 'python.pdf', 'pdf', '/tmp/python.pdf')
         context.create_document(2, 'rust.pdf', 'pdf', '/tmp/rust.pdf')
         context.create_document(3, 'lua.pdf', 'pdf', '/tmp/lua.pdf')
@@ -338,7 +421,7 @@ class ContextTest(unittest.TestCase):
         self.assertEqual(context.count_relations(), 0)
 
     def test_multiple_tags_and_documents(self):
-        context = Context()
+        context = self.create_context()
         context.create_document(1, 'python.pdf', 'pdf', '/tmp/python.pdf')
         context.create_document(2, 'tkinter.pdf', 'pdf', '/tmp/tkinter.pdf')
         context.create_document(3, 'lua.pdf', 'pdf', '/tmp/lua.pdf')
@@ -366,3 +449,95 @@ class ContextTest(unittest.TestCase):
         self.assertEqual(tag_ids, [5])
         tag_ids = context.find_tag_ids([3, 4])
         self.assertEqual(tag_ids, [])
+
+    def test_explain_document_query(self):
+        context = self.create_context()
+        for document_id in range(1, 11):
+            context.create_document(document_id, 'doc.txt', 'txt', '/tmp/doc_{}.txt'.format(document_id))
+        context.create_tag(1, 'common')
+        context.create_tag(2, 'rare')
+        for document_id in range(1, 11):
+            context.create_relation(document_id, 1)
+        context.create_relation(7, 2)
+        plan = context.explain([1, 2])
+        self.assertEqual([step.key for step in plan.steps], [2, 1])
+        self.assertEqual([step.actual_count for step in plan.steps], [1, 1])
+        self.assertAlmostEqual(plan.calc_estimated_count(), 1.0)
+        self.assertEqual(context.find_document_ids([1, 2]), [7])
+        self.assertEqual(context.find_document_ids([1, 3]), [])
+        self.assertTrue(context.explain([1, 3]).is_empty())
+
+    def test_rank_documents(self):
+        context = self.create_context()
+        for document_id in range(1, 6):
+            context.create_document(document_id, 'doc.txt', 'txt', '/tmp/doc_{}.txt'.format(document_id))
+        for tag_id, name in enumerate(['common', 'python', 'rare'], 1):
+            context.create_tag(tag_id, name)
+        relations = [(1, 1), (2, 1), (3, 1), (4, 1), (1, 2), (2, 2), (3, 2), (5, 3)]
+        for document_id, tag_id in relations:
+            context.create_relation(document_id, tag_id)
+        ranked_ids = context.rank_document_ids([1, 2, 3])
+        self.assertEqual(ranked_ids, [(1, 2.0), (2, 2.0), (3, 2.0), (4, 1.0), (5, 1.0)])
+        self.assertEqual(context.rank_document_ids([1, 2, 3], limit=2), [(1, 2.0), (2, 2.0)])
+        weighted_ids = context.rank_document_ids([1, 3], limit=1, weighted=True)
+        self.assertEqual(weighted_ids[0][0], 5)
+        self.assertEqual(context.rank_document_ids([4]), [])
+
+
+class DocumentTableContextTest(ContextTest):
+    """Unittest for the context with columnar document storage"""
+
+    def create_context(self):
+        return Context(document_table=DocumentTable())
+
+    def test_unchanged_document_update(self):
+        context = self.create_context()
+        context.create_document(1, 'first.txt', 'txt', '/tmp/first.txt')
+        context.update_document(1, name='first.txt')
+        document = context.get_document(1)
+        self.assertEqual((document.name, document.type, document.path), ('first.txt', 'txt', '/tmp/first.txt'))
+
+
+class SQLiteContextTest(ContextTest):
+    """Unittest for the context stored in SQLite"""
+
+    def create_context(self):
+        return SQLiteContext(':memory:')
+
+    def test_memory_stats(self):
+        context = self.create_context()
+        for document_id in range(1, 101):
+            context.create_document(document_id, 'doc_{}.txt'.format(document_id), 'txt', '/tmp/doc.txt')
+        stats = context.memory_stats()
+        self.assertGreater(stats['database_file'], 0)
+        self.assertEqual(stats['total'], stats['page_cache'])
+        self.assertLessEqual(stats['page_cache'], stats['database_file'])
+
+    def test_snapshot(self):
+        with self.assertRaises(ValueError):
+            self.create_context().snapshot()
+
+    def test_read_only_snapshot(self):
+        self.skipTest('The SQLite context does not support snapshots.')
+
+    def test_unchanged_document_update(self):
+        context = self.create_context()
+        context.create_document(1, 'first.txt', 'txt', '/tmp/first.txt')
+        context.update_document(1, name='first.txt')
+        document = context.get_document(1)
+        self.assertEqual((document.name, document.type, document.path), ('first.txt', 'txt', '/tmp/first.txt'))
+
+
+class EstimateSizeTest(unittest.TestCase):
+    """Unittest for the sampled size estimation"""
+
+    def test_empty_values(self):
+        self.assertEqual(estimate_size([], 0, len), 0)
+
+    def test_whole_sample(self):
+        values = ['a' * length for length in range(10)]
+        self.assertEqual(estimate_size(values, len(values), len, sample_size=10), 45)
+
+    def test_partial_sample(self):
+        values = ['ab'] * 1000
+        self.assertEqual(estimate_size(values, len(values), len, sample_size=7), 2000)
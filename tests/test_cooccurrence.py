@@ -0,0 +1,92 @@
+import unittest
+
+from grimoire.cooccurrence import Cooccurrence
+
+
+class CooccurrenceTest(unittest.TestCase):
+    """Unittest for the co-occurrence matrix"""
+
+    def test_empty_matrix(self):
+        cooccurrence = Cooccurrence()
+        self.assertEqual(cooccurrence.count_pairs(), 0)
+        self.assertEqual(cooccurrence.count(1, 2), 0)
+        self.assertEqual(cooccurrence.find_top_tag_ids([1]), [])
+        self.assertTrue(cooccurrence.is_exact())
+
+    def test_incremental_counting(self):
+        cooccurrence = Cooccurrence()
+        cooccurrence.add_tag(1, set())
+        cooccurrence.add_tag(2, {1})
+        cooccurrence.add_tag(3, {1, 2})
+        self.assertEqual(cooccurrence.count_pairs(), 3)
+        self.assertEqual(cooccurrence.count(1, 2), 1)
+        self.assertEqual(cooccurrence.count(2, 1), 1)
+        self.assertEqual(cooccurrence.count(3, 1), 1)
+        cooccurrence.add_tag(2, {1})
+        self.assertEqual(cooccurrence.count(1, 2), 2)
+        cooccurrence.remove_tag(2, {1})
+        self.assertEqual(cooccurrence.count(1, 2), 1)
+        cooccurrence.remove_tag(3, {1, 2})
+        self.assertEqual(cooccurrence.count(1, 3), 0)
+        self.assertEqual(cooccurrence.count_pairs(), 1)
+
+    def test_rebuild(self):
+        cooccurrence = Cooccurrence()
+        cooccurrence.rebuild([{1, 2}, {1, 2, 3}, {3}])
+        self.assertEqual(cooccurrence.count(1, 2), 2)
+        self.assertEqual(cooccurrence.count(2, 3), 1)
+        self.assertEqual(cooccurrence.count(1, 3), 1)
+        self.assertEqual(cooccurrence.count_pairs(), 3)
+
+    def test_remove_document(self):
+        cooccurrence = Cooccurrence()
+        cooccurrence.rebuild([{1, 2, 3}, {1, 2}])
+        cooccurrence.remove_document({1, 2, 3})
+        self.assertEqual(cooccurrence.count(1, 2), 1)
+        self.assertEqual(cooccurrence.count(1, 3), 0)
+        self.assertEqual(cooccurrence.count_pairs(), 1)
+
+    def test_drop_tag(self):
+        cooccurrence = Cooccurrence()
+        cooccurrence.rebuild([{1, 2, 3}, {1, 2}])
+        cooccurrence.drop_tag(1)
+        self.assertEqual(cooccurrence.count(1, 2), 0)
+        self.assertEqual(cooccurrence.count(2, 3), 1)
+        self.assertEqual(cooccurrence.count_pairs(), 1)
+
+    def test_snapshot(self):
+        cooccurrence = Cooccurrence()
+        cooccurrence.rebuild([{1, 2, 3}, {1, 2}])
+        snapshot = cooccurrence.snapshot()
+        cooccurrence.add_tag(4, {1, 2})
+        cooccurrence.remove_tag(3, {1, 2})
+        cooccurrence.drop_tag(2)
+        self.assertEqual(snapshot.count(1, 2), 2)
+        self.assertEqual(snapshot.count(1, 3), 1)
+        self.assertEqual(snapshot.count(1, 4), 0)
+        self.assertEqual(snapshot.count_pairs(), 3)
+        self.assertEqual(cooccurrence.count(1, 4), 1)
+        self.assertEqual(cooccurrence.count(1, 2), 0)
+        with self.assertRaises(ValueError):
+            snapshot.add_tag(5, {1})
+
+    def test_top_tags(self):
+        cooccurrence = Cooccurrence()
+        cooccurrence.rebuild([{1, 2}, {1, 2}, {1, 3}, {1, 2, 4}, {2, 4}])
+        self.assertEqual(cooccurrence.find_top_tag_ids([1]), [(2, 3), (3, 1), (4, 1)])
+        self.assertEqual(cooccurrence.find_top_tag_ids([1], limit=1), [(2, 3)])
+        self.assertEqual(cooccurrence.find_top_tag_ids([1, 2]), [(4, 3), (3, 1)])
+
+    def test_bounded_memory(self):
+        cooccurrence = Cooccurrence(max_pairs=10)
+        cooccurrence.rebuild([{1, 2}, {1, 2}, {1, 2}])
+        for tag_id in range(3, 20):
+            cooccurrence.add_tag(tag_id, {tag_id + 100})
+        self.assertLessEqual(cooccurrence.count_pairs(), 10)
+        self.assertFalse(cooccurrence.is_exact())
+        self.assertEqual(cooccurrence.count(1, 2), 3)
+        self.assertGreater(cooccurrence.calc_memory_usage(), 0)
+
+    def test_invalid_limit(self):
+        with self.assertRaises(ValueError):
+            _ = Cooccurrence(max_pairs=0)
@@ -2,8 +2,13 @@ import os
 import unittest
 
 from grimoire.database import Database
+from grimoire.documenttable import DocumentTable
+from grimoire.scope import Scope
+from grimoire.sqlitecontext import migrate_log
+from grimoire.sqlitedatabase import SQLiteDatabase
 
 TEST_LOG_PATH = '/tmp/grimoire_test.log'
+TEST_DATABASE_PATH = '/tmp/grimoire_test.db'
 
 
 class DatabaseTest(unittest.TestCase):
@@ -15,14 +20,17 @@ class DatabaseTest(unittest.TestCase):
         except OSError:
             pass
 
+    def create_database(self, **arguments):
+        return Database(path=TEST_LOG_PATH, **arguments)
+
     def test_empty_database(self):
-        database = Database(path=TEST_LOG_PATH)
+        database = self.create_database()
         self.assertEqual(database.count_documents(), 0)
         self.assertEqual(database.count_tags(), 0)
         self.assertEqual(database.count_relations(), 0)
 
     def test_document_id_creation(self):
-        database = Database(path=TEST_LOG_PATH)
+        database = self.create_database()
         existing_ids = set()
         for _ in range(1000):
             document_id = database.generate_document_id()
@@ -30,9 +38,278 @@ class DatabaseTest(unittest.TestCase):
             existing_ids.add(document_id)
 
     def test_tag_id_creation(self):
-        database = Database(path=TEST_LOG_PATH)
+        database = self.create_database()
         existing_ids = set()
         for _ in range(1000):
             tag_id = database.generate_tag_id()
             self.assertNotIn(tag_id, existing_ids)
             existing_ids.add(tag_id)
+
+    def test_cooccurrence_tracking(self):
+        database = self.create_database()
+        for name in ['first.txt', 'second.txt', 'third.txt']:
+            database.create_document(name=name, type='txt', path=name)
+        for name in ['book', 'python', 'rust']:
+            database.create_tag(name=name)
+        for document_id, tag_id in [(1, 1), (1, 2), (2, 1), (2, 2), (3, 1), (3, 3)]:
+            database.create_relation(document_id=document_id, tag_id=tag_id)
+        database.create_relation(document_id=1, tag_id=2)
+        self.assertEqual(database.count_cooccurrences(1, 2), 2)
+        self.assertEqual(database.count_cooccurrences(1, 3), 1)
+        self.assertEqual(database.find_cooccurring_tag_ids([1]), [(2, 2), (3, 1)])
+        database.destroy_relation(document_id=2, tag_id=1)
+        self.assertEqual(database.count_cooccurrences(1, 2), 1)
+        database.destroy_document(id=3)
+        self.assertEqual(database.count_cooccurrences(1, 3), 0)
+        database.destroy_tag(id=2)
+        self.assertEqual(database.find_cooccurring_tag_ids([1]), [])
+
+    def test_cooccurrence_restoration(self):
+        database = self.create_database()
+        for name in ['first.txt', 'second.txt']:
+            database.create_document(name=name, type='txt', path=name)
+        for name in ['book', 'python']:
+            database.create_tag(name=name)
+        for document_id, tag_id in [(1, 1), (1, 2), (2, 1), (2, 2)]:
+            database.create_relation(document_id=document_id, tag_id=tag_id)
+        restored_database = self.create_database()
+        self.assertEqual(restored_database.count_cooccurrences(1, 2), 2)
+        stats = restored_database.get_cooccurrence_stats()
+        self.assertEqual(stats['pairs'], 1)
+        self.assertTrue(stats['exact'])
+        self.assertGreater(stats['bytes'], 0)
+
+    def test_find_close_tags(self):
+        database = self.create_database()
+        for name in ['machine-learning', 'python', 'pyton-tutorial', 'rust']:
+            database.create_tag(name=name)
+        self.assertEqual(database.find_close_tags('machine-learnign'), ['machine-learning'])
+        self.assertEqual(database.find_close_tags('pyhton', max_distance=2), ['python'])
+        database.create_tag(name='trust')
+        self.assertEqual(database.find_close_tags('rust'), ['rust', 'trust'])
+        database.update_tag(id=4, name='rusty')
+        self.assertEqual(database.find_close_tags('rust'), ['rusty', 'trust'])
+        database.destroy_tag(id=5)
+        self.assertEqual(database.find_close_tags('rust'), ['rusty'])
+        self.assertEqual(database.find_close_tags('java'), [])
+        for max_distance in [-1, 3]:
+            with self.assertRaises(ValueError):
+                database.find_close_tags('rust', max_distance=max_distance)
+
+    def test_load_progress(self):
+        database = self.create_database()
+        for name in ['book', 'python']:
+            database.create_tag(name=name)
+        reports = []
+        restored_database = self.create_database(progress=lambda read_size, total_size: reports.append((read_size, total_size)))
+        self.assertEqual(restored_database.count_tags(), 2)
+        self.assertEqual(len(reports), 1)
+        self.assertEqual(reports[-1][0], reports[-1][1])
+        self.assertGreater(reports[-1][1], 0)
+
+    def test_document_table_storage(self):
+        database = self.create_database(document_table=DocumentTable())
+        database.create_document(name='first.txt', type='txt', path='docs/first.txt')
+        database.create_document(name='second.txt', type='txt', path='docs/second.txt')
+        database.update_document(id=2, path='other/second.txt')
+        database.destroy_document(id=1)
+        restored_database = self.create_database(document_table=DocumentTable())
+        self.assertEqual(restored_database.count_documents(), 1)
+        self.assertEqual(restored_database.get_document(2).path, 'other/second.txt')
+        self.assertEqual(restored_database.collect_document_paths(), {'other/second.txt'})
+
+    def test_no_id_reuse_after_restart(self):
+        database = self.create_database()
+        for name in ['first.txt', 'second.txt']:
+            database.create_document(name=name, type='txt', path=name)
+        database.create_tag(name='book')
+        database.create_tag(name='python')
+        database.destroy_document(id=2)
+        database.destroy_tag(id=2)
+        restored_database = self.create_database()
+        self.assertEqual(restored_database.get_id_counters(), (2, 2))
+        self.assertEqual(restored_database.create_document(name='third.txt', type='txt', path='third.txt').id, 3)
+        self.assertEqual(restored_database.create_tag(name='rust').id, 3)
+        restored_database.create_relation(document_id=3, tag_id=3)
+        second_restored_database = self.create_database()
+        self.assertEqual(second_restored_database.get_document(3).name, 'third.txt')
+        self.assertTrue(second_restored_database.has_relation(3, 3))
+
+    def test_replay_logged_ids(self):
+        with open(TEST_LOG_PATH, 'w') as log_file:
+            log_file.write('{"method": "create_document", "id": 5, "name": "a.txt", "type": "txt", "path": "a.txt"}\n')
+            log_file.write('{"method": "create_document", "id": 9, "name": "b.txt", "type": "txt", "path": "b.txt"}\n')
+            log_file.write('{"method": "create_tag", "id": 7, "name": "book"}\n')
+            log_file.write('{"method": "create_relation", "document_id": 9, "tag_id": 7}\n')
+        database = self.create_database()
+        self.assertEqual(database.find_document_ids([7]), [9])
+        self.assertEqual(database.get_id_counters(), (9, 7))
+        self.assertEqual(database.create_document(name='c.txt', type='txt', path='c.txt').id, 10)
+
+    def test_memory_stats(self):
+        database = self.create_database()
+        for name in ['book', 'paper', 'python']:
+            database.create_tag(name=name)
+        document = database.create_document(name='a.pdf', type='pdf', path='a.pdf')
+        database.create_relation(document_id=document.id, tag_id=1)
+        database.create_relation(document_id=document.id, tag_id=2)
+        stats = database.memory_stats()
+        self.assertGreater(stats['cooccurrence'], 0)
+        self.assertEqual(stats['fuzzy_tag_index'], 0)
+        database.find_close_tags('boot')
+        stats = database.memory_stats()
+        self.assertGreater(stats['fuzzy_tag_index'], 0)
+        self.assertGreaterEqual(stats['total'], stats['cooccurrence'] + stats['fuzzy_tag_index'])
+
+    def test_snapshot(self):
+        database = self.create_database()
+        tag = database.create_tag(name='book')
+        document = database.create_document(name='a.pdf', type='pdf', path='a.pdf')
+        database.create_relation(document_id=document.id, tag_id=tag.id)
+        snapshot = database.snapshot()
+        database.destroy_tag(id=tag.id)
+        self.assertEqual(snapshot.find_document_ids([tag.id]), [document.id])
+        self.assertEqual([tag.name for tag in snapshot.find_tags([document.id])], ['book'])
+        self.assertEqual(database.find_tag_ids([document.id]), [])
+        with self.assertRaises(ValueError):
+            snapshot.create_tag(2, 'paper')
+        with self.assertRaises(ValueError):
+            snapshot.create_document(name='b.pdf', type='pdf', path='b.pdf')
+        with self.assertRaises(ValueError):
+            snapshot.compact_log()
+
+    def test_snapshot_suggestions(self):
+        database = self.create_database()
+        for name in ['alpha', 'alps', 'beta']:
+            database.create_tag(name=name)
+        document = database.create_document(name='a.pdf', type='pdf', path='a.pdf')
+        database.create_relation(document_id=document.id, tag_id=1)
+        database.create_relation(document_id=document.id, tag_id=3)
+        snapshot = database.snapshot()
+        database.update_tag(id=1, name='gamma')
+        database.create_relation(document_id=document.id, tag_id=2)
+        self.assertEqual(Scope(snapshot).get_suggested_tags('alph'), ['alph', 'alpha', 'alps'])
+        self.assertEqual(database.find_close_tags('alph'), ['alps'])
+        self.assertEqual(snapshot.find_close_tags('alph', max_distance=2), ['alpha', 'alps'])
+        with self.assertRaises(ValueError):
+            snapshot.find_close_tags('alph', max_distance=3)
+        self.assertEqual(snapshot.count_cooccurrences(1, 3), 1)
+        self.assertEqual(snapshot.count_cooccurrences(2, 3), 0)
+        self.assertEqual(snapshot.find_cooccurring_tag_ids([3]), [(1, 1)])
+        self.assertEqual(database.count_cooccurrences(2, 3), 1)
+        self.assertEqual(snapshot.find_similar_tags('ALP'), ['alpha', 'alps'])
+
+    def test_compact_log(self):
+        database = self.create_database()
+        for name in ['first.txt', 'second.txt', 'third.txt']:
+            database.create_document(name=name, type='txt', path=name)
+        database.update_document(id=1, name='renamed.txt')
+        database.create_tag(name='book')
+        database.create_relation(document_id=1, tag_id=1)
+        database.create_relation(document_id=3, tag_id=1)
+        database.destroy_document(id=3)
+        database.compact_log()
+        with open(TEST_LOG_PATH) as log_file:
+            lines = log_file.readlines()
+        self.assertEqual(len(lines), 5)
+        self.assertIn('"restore_id_counters"', lines[0])
+        restored_database = self.create_database()
+        self.assertEqual(restored_database.get_id_counters(), (3, 1))
+        self.assertEqual(restored_database.get_document(1).name, 'renamed.txt')
+        self.assertEqual(restored_database.find_document_ids([1]), [1])
+        self.assertEqual(restored_database.create_document(name='fourth.txt', type='txt', path='fourth.txt').id, 4)
+
+
+class SQLiteDatabaseTest(DatabaseTest):
+    """Unittest for the database stored in SQLite"""
+
+    def setUp(self):
+        super(SQLiteDatabaseTest, self).setUp()
+        for suffix in ['', '-wal', '-shm']:
+            try:
+                os.remove(TEST_DATABASE_PATH + suffix)
+            except OSError:
+                pass
+
+    def create_database(self, **arguments):
+        return SQLiteDatabase(path=TEST_DATABASE_PATH, **arguments)
+
+    def test_load_progress(self):
+        self.skipTest('The SQLite database is not replayed from a log.')
+
+    def test_document_table_storage(self):
+        self.skipTest('The SQLite database stores the documents in its own table.')
+
+    def test_snapshot(self):
+        with self.assertRaises(ValueError):
+            self.create_database().snapshot()
+
+    def test_snapshot_suggestions(self):
+        self.skipTest('The SQLite database does not support snapshots.')
+
+    def test_replay_logged_ids(self):
+        with open(TEST_LOG_PATH, 'w') as log_file:
+            log_file.write('{"method": "create_document", "id": 5, "name": "a.txt", "type": "txt", "path": "a.txt"}\n')
+            log_file.write('{"method": "create_document", "id": 9, "name": "b.txt", "type": "txt", "path": "b.txt"}\n')
+            log_file.write('{"method": "destroy_document", "id": 9}\n')
+            log_file.write('{"method": "create_tag", "id": 7, "name": "book"}\n')
+            log_file.write('{"method": "create_tag", "id": 8, "name": "python"}\n')
+            log_file.write('{"method": "create_relation", "document_id": 5, "tag_id": 7}\n')
+            log_file.write('{"method": "create_relation", "document_id": 5, "tag_id": 8}\n')
+            log_file.write('{"method": "restore_id_counters", "last_document_id": 3, "last_tag_id": 12}\n')
+        migrate_log(TEST_LOG_PATH, TEST_DATABASE_PATH).close()
+        database = self.create_database()
+        self.assertEqual(database.find_document_ids([7]), [5])
+        self.assertEqual(database.get_id_counters(), (9, 12))
+        self.assertEqual(database.create_document(name='c.txt', type='txt', path='c.txt').id, 10)
+        self.assertEqual(database.count_cooccurrences(7, 8), 1)
+
+    def test_compact_log(self):
+        database = self.create_database()
+        for name in ['first.txt', 'second.txt', 'third.txt']:
+            database.create_document(name=name, type='txt', path=name)
+        database.create_tag(name='book')
+        database.create_relation(document_id=1, tag_id=1)
+        database.destroy_document(id=3)
+        database.compact_log()
+        restored_database = self.create_database()
+        self.assertEqual(restored_database.get_id_counters(), (3, 1))
+        self.assertEqual(restored_database.find_document_ids([1]), [1])
+        self.assertEqual(restored_database.create_document(name='fourth.txt', type='txt', path='fourth.txt').id, 4)
+
+    def test_batch_rollback(self):
+        database = self.create_database()
+        database.create_document(name='first.txt', type='txt', path='first.txt')
+        with self.assertRaises(ValueError):
+            with database.batch():
+                database.create_document(name='second.txt', type='txt', path='second.txt')
+                database.create_relation(document_id=2, tag_id=1)
+        self.assertEqual(database.count_documents(), 1)
+        self.assertEqual(self.create_database().count_documents(), 1)
+
+    def test_batch_rollback_of_derived_indexes(self):
+        database = self.create_database()
+        database.create_tag(name='book')
+        database.create_tag(name='paper')
+        document = database.create_document(name='first.txt', type='txt', path='first.txt')
+        database.create_relation(document_id=document.id, tag_id=1)
+        self.assertEqual(database.find_close_tags('boo'), ['book'])
+        with self.assertRaises(ValueError):
+            with database.batch():
+                database.create_tag(name='boot')
+                database.create_relation(document_id=document.id, tag_id=2)
+                database.create_relation(document_id=document.id, tag_id=9)
+        self.assertEqual(database.count_cooccurrences(1, 2), 0)
+        self.assertEqual(database.find_close_tags('boo'), ['book'])
+        self.assertEqual((database.count_tags(), database.count_relations()), (2, 1))
+        self.assertEqual(database.create_tag(name='boot').id, 3)
+
+    def test_rejected_operation_outside_batch(self):
+        database = self.create_database()
+        database.create_tag(name='book')
+        with self.assertRaises(ValueError):
+            database.create_relation(document_id=1, tag_id=1)
+        with self.assertRaises(ValueError):
+            database.create_tag(name='book')
+        self.assertEqual((database.count_tags(), database.count_relations()), (1, 0))
+        self.assertEqual(database.find_close_tags('boo'), ['book'])
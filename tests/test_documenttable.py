@@ -0,0 +1,113 @@
+import unittest
+
+from grimoire.document import Document
+from grimoire.documenttable import DocumentTable, StringTable
+
+
+class StringTableTest(unittest.TestCase):
+    """Unittest for the string table"""
+
+    def test_add_and_get(self):
+        table = StringTable()
+        self.assertEqual(table.add('first'), 0)
+        self.assertEqual(table.add(''), 1)
+        self.assertEqual(table.add('árvíztűrő'), 2)
+        self.assertEqual(len(table), 3)
+        self.assertEqual(table.get(0), 'first')
+        self.assertEqual(table.get(1), '')
+        self.assertEqual(table.get(2), 'árvíztűrő')
+        self.assertEqual(table.get_all(), ['first', '', 'árvíztűrő'])
+
+    def test_empty_table(self):
+        table = StringTable()
+        self.assertEqual(len(table), 0)
+        self.assertEqual(table.get_all(), [])
+
+
+class DocumentTableTest(unittest.TestCase):
+    """Unittest for the columnar document table"""
+
+    def test_empty_table(self):
+        table = DocumentTable()
+        self.assertEqual(len(table), 0)
+        self.assertEqual(list(table), [])
+        self.assertNotIn(1, table)
+        self.assertEqual(table.collect_paths(), [])
+
+    def test_store_documents(self):
+        table = DocumentTable()
+        table[2] = Document(2, 'second.pdf', 'pdf', 'books/second.pdf')
+        table[1] = Document(1, 'first.txt', 'txt', 'first.txt')
+        table[5] = Document(5, 'note', 'url', '/tmp/notes/note_5.url')
+        self.assertEqual(len(table), 3)
+        self.assertEqual(list(table), [1, 2, 5])
+        self.assertIn(5, table)
+        self.assertNotIn(3, table)
+        self.assertNotIn('5', table)
+        document = table[5]
+        self.assertEqual((document.id, document.name, document.type, document.path),
+                         (5, 'note', 'url', '/tmp/notes/note_5.url'))
+        self.assertEqual(table.collect_paths(), ['first.txt', 'books/second.pdf', '/tmp/notes/note_5.url'])
+        self.assertEqual([id for id, _ in table.items()], [1, 2, 5])
+
+    def test_missing_document(self):
+        table = DocumentTable()
+        with self.assertRaises(KeyError):
+            _ = table[1]
+        with self.assertRaises(KeyError):
+            table.pop(1)
+
+    def test_invalid_identifier(self):
+        table = DocumentTable()
+        with self.assertRaises(ValueError):
+            table[-1] = Document(-1, 'first.txt', 'txt', 'first.txt')
+        with self.assertRaises(ValueError):
+            table['a'] = Document('a', 'first.txt', 'txt', 'first.txt')
+        with self.assertRaises(ValueError):
+            table[1] = Document(2, 'first.txt', 'txt', 'first.txt')
+
+    def test_update_and_remove(self):
+        table = DocumentTable()
+        table[1] = Document(1, 'first.txt', 'txt', 'docs/first.txt')
+        table[2] = Document(2, 'second.txt', 'txt', 'docs/second.txt')
+        table[1] = Document(1, 'renamed.md', 'md', 'other/first.txt')
+        self.assertEqual(len(table), 2)
+        self.assertEqual(table[1].name, 'renamed.md')
+        self.assertEqual(table[1].path, 'other/first.txt')
+        removed_document = table.pop(2)
+        self.assertEqual(removed_document.name, 'second.txt')
+        self.assertEqual(len(table), 1)
+        self.assertEqual(table.collect_paths(), ['other/first.txt'])
+
+    def test_cached_paths(self):
+        table = DocumentTable()
+        table[1] = Document(1, 'first.txt', 'txt', 'docs/first.txt')
+        table[2] = Document(2, 'second.txt', 'txt', 'docs/second.txt')
+        self.assertEqual(table.collect_paths(), ['docs/first.txt', 'docs/second.txt'])
+        snapshot = table.snapshot()
+        table[1] = Document(1, 'first.txt', 'txt', 'other/first.txt')
+        table[4] = Document(4, 'fourth.txt', 'txt', 'fourth.txt')
+        table.pop(2)
+        self.assertEqual(table.collect_paths(), ['other/first.txt', 'fourth.txt'])
+        self.assertEqual(snapshot.collect_paths(), ['docs/first.txt', 'docs/second.txt'])
+        table[2] = Document(2, 'second.txt', 'txt', 'docs/second.txt')
+        self.assertEqual(table.collect_paths(), ['other/first.txt', 'docs/second.txt', 'fourth.txt'])
+
+    def test_compaction(self):
+        table = DocumentTable()
+        for index in range(3000):
+            table[1] = Document(1, 'name_{}'.format(index), 'txt', 'dir/file_{}'.format(index))
+        table[2] = Document(2, 'second.txt', 'txt', 'dir/second.txt')
+        self.assertLess(len(table._strings), 2 * 1024 + 10)
+        self.assertEqual(table[1].name, 'name_2999')
+        self.assertEqual(table[1].path, 'dir/file_2999')
+        self.assertEqual(table[2].path, 'dir/second.txt')
+
+    def test_shared_directories_and_types(self):
+        table = DocumentTable()
+        for id in range(1, 101):
+            table[id] = Document(id, 'doc_{}.pdf'.format(id), 'pdf', 'library/books/doc_{}.pdf'.format(id))
+        self.assertEqual(table._prefixes, ['', 'library/books/'])
+        self.assertEqual(table._types, ['pdf'])
+        self.assertEqual(len(table._strings), 100)
+        self.assertGreater(table.calc_memory_usage(), 0)
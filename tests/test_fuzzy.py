@@ -0,0 +1,90 @@
+import unittest
+
+from grimoire.fuzzy import SymmetricDeleteIndex, calc_edit_distance
+
+
+class EditDistanceTest(unittest.TestCase):
+    """Unittest for the edit distance calculation"""
+
+    def test_equal_strings(self):
+        self.assertEqual(calc_edit_distance('', ''), 0)
+        self.assertEqual(calc_edit_distance('python', 'python'), 0)
+
+    def test_single_edits(self):
+        self.assertEqual(calc_edit_distance('python', 'pyton'), 1)
+        self.assertEqual(calc_edit_distance('python', 'pythons'), 1)
+        self.assertEqual(calc_edit_distance('python', 'pithon'), 1)
+        self.assertEqual(calc_edit_distance('', 'abc'), 3)
+
+    def test_transposition(self):
+        self.assertEqual(calc_edit_distance('machine-learnign', 'machine-learning'), 1)
+        self.assertEqual(calc_edit_distance('ab', 'ba'), 1)
+
+    def test_multiple_edits(self):
+        self.assertEqual(calc_edit_distance('kitten', 'sitting'), 3)
+        self.assertEqual(calc_edit_distance('rust', 'lua'), 3)
+
+    def test_bounded_distance(self):
+        self.assertEqual(calc_edit_distance('kitten', 'sitting', max_distance=1), 2)
+        self.assertEqual(calc_edit_distance('a', 'abcdef', max_distance=2), 3)
+        self.assertEqual(calc_edit_distance('kitten', 'sitten', max_distance=1), 1)
+
+
+class SymmetricDeleteIndexTest(unittest.TestCase):
+    """Unittest for the symmetric delete index"""
+
+    def setUp(self):
+        self._names = ['machine-learning', 'machine-vision', 'python', 'pytorch', 'rust', 'lua', 'trust']
+        self._index = SymmetricDeleteIndex(max_distance=2)
+        for name in self._names:
+            self._index.add(name)
+
+    def test_exact_match(self):
+        self.assertEqual(self._index.search('python', 0), [(0, 'python')])
+        self.assertEqual(self._index.search('java', 0), [])
+
+    def test_close_matches(self):
+        self.assertEqual(self._index.search('machine-learnign', 1), [(1, 'machine-learning')])
+        self.assertEqual(self._index.search('rust', 1), [(0, 'rust'), (1, 'trust')])
+        self.assertEqual(self._index.search('pyhton', 2), [(1, 'python')])
+
+    def test_long_names_after_prefix(self):
+        self.assertEqual(self._index.search('machine-visoin', 1), [(1, 'machine-vision')])
+        self.assertEqual(self._index.search('machine-vision-x', 2), [(2, 'machine-vision')])
+
+    def test_removal(self):
+        self._index.remove('trust')
+        self.assertEqual(self._index.search('rust', 1), [(0, 'rust')])
+        self.assertNotIn('trust', self._index)
+        self.assertEqual(len(self._index), 6)
+        with self.assertRaises(ValueError):
+            self._index.remove('trust')
+        self._index.remove('rust')
+        self.assertEqual(self._index.search('rust', 1), [])
+
+    def test_snapshot(self):
+        snapshot = self._index.snapshot()
+        self._index.remove('trust')
+        self._index.add('rusty')
+        self.assertEqual(snapshot.search('rust', 1), [(0, 'rust'), (1, 'trust')])
+        self.assertEqual(self._index.search('rust', 1), [(0, 'rust'), (1, 'rusty')])
+        self.assertEqual(len(snapshot), 7)
+        with self.assertRaises(ValueError):
+            snapshot.add('java')
+
+    def test_duplicated_insertion(self):
+        self._index.add('python')
+        self.assertEqual(len(self._index), 7)
+        self._index.remove('python')
+        self.assertEqual(self._index.search('python', 1), [])
+
+    def test_distance_limit(self):
+        index = SymmetricDeleteIndex(max_distance=1)
+        with self.assertRaises(ValueError):
+            _ = index.search('python', 2)
+        with self.assertRaises(ValueError):
+            _ = SymmetricDeleteIndex(max_distance=2, prefix_length=2)
+
+    def test_memory_usage(self):
+        self.assertGreater(self._index.count_variants(), len(self._names))
+        self.assertGreater(self._index.calc_memory_usage(), 0)
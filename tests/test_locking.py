@@ -0,0 +1,255 @@
+import os
+import threading
+import time
+import unittest
+
+from grimoire.database import Database
+from grimoire.locking import ReadWriteLock, ThreadSafeDatabase, is_write_method
+from grimoire.scope import Scope
+
+TEST_LOG_PATH = '/tmp/grimoire_test.log'
+
+WRITER_COUNT = 4
+READER_COUNT = 4
+DOCUMENTS_PER_WRITER = 100
+TAG_COUNT = 5
+WAIT_TIMEOUT = 5
+
+
+class ReadWriteLockTest(unittest.TestCase):
+    """Unittest for the reader/writer lock"""
+
+    def setUp(self):
+        self._lock = ReadWriteLock()
+
+    def test_concurrent_readers(self):
+        barrier = threading.Barrier(3, timeout=WAIT_TIMEOUT)
+        errors = []
+
+        def read():
+            try:
+                with self._lock.read():
+                    barrier.wait()
+            except threading.BrokenBarrierError as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=read) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_exclusive_writer(self):
+        events = []
+        self._lock.acquire_write()
+
+        def read():
+            with self._lock.read():
+                events.append('read')
+
+        thread = threading.Thread(target=read)
+        thread.start()
+        time.sleep(0.05)
+        events.append('write')
+        self._lock.release_write()
+        thread.join(WAIT_TIMEOUT)
+        self.assertEqual(events, ['write', 'read'])
+
+    def test_waiting_writer_is_preferred(self):
+        events = []
+        self._lock.acquire_read()
+        writer_waits = threading.Event()
+
+        def write():
+            writer_waits.set()
+            with self._lock.write():
+                events.append('write')
+
+        def read():
+            with self._lock.read():
+                events.append('read')
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        writer_waits.wait(WAIT_TIMEOUT)
+        time.sleep(0.05)
+        reader = threading.Thread(target=read)
+        reader.start()
+        time.sleep(0.05)
+        self.assertEqual(events, [])
+        self._lock.release_read()
+        writer.join(WAIT_TIMEOUT)
+        reader.join(WAIT_TIMEOUT)
+        self.assertEqual(events, ['write', 'read'])
+
+    def test_reentrancy(self):
+        with self._lock.write():
+            with self._lock.write():
+                with self._lock.read():
+                    pass
+        with self._lock.read():
+            with self._lock.read():
+                pass
+        with self._lock.write():
+            pass
+
+    def test_nested_read_with_waiting_writer(self):
+        events = []
+        self._lock.acquire_read()
+
+        def write():
+            with self._lock.write():
+                events.append('write')
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        time.sleep(0.05)
+        with self._lock.read():
+            events.append('nested read')
+        self.assertEqual(events, ['nested read'])
+        self._lock.release_read()
+        writer.join(WAIT_TIMEOUT)
+        self.assertEqual(events, ['nested read', 'write'])
+
+    def test_upgrade(self):
+        with self._lock.read():
+            with self.assertRaises(RuntimeError):
+                self._lock.acquire_write()
+
+    def test_release_without_lock(self):
+        with self.assertRaises(RuntimeError):
+            self._lock.release_read()
+        with self.assertRaises(RuntimeError):
+            self._lock.release_write()
+
+
+class ThreadSafeDatabaseTest(unittest.TestCase):
+    """Unittest for the thread-safe database wrapper"""
+
+    def setUp(self):
+        if os.path.exists(TEST_LOG_PATH):
+            os.remove(TEST_LOG_PATH)
+        self._database = ThreadSafeDatabase(Database(path=TEST_LOG_PATH))
+
+    def test_write_methods(self):
+        for name in ['create_document', 'update_tag', 'destroy_relation', 'restore_id_counters', 'compact_log', 'snapshot']:
+            self.assertTrue(is_write_method(name))
+        for name in ['get_document', 'find_document_ids', 'count_tags', 'has_relation', 'memory_stats']:
+            self.assertFalse(is_write_method(name))
+
+    def test_delegation(self):
+        document = self._database.create_document(name='a.txt', type='txt', path='a.txt')
+        tag = self._database.create_tag(name='book')
+        self._database.create_relation(document_id=document.id, tag_id=tag.id)
+        self.assertEqual(self._database.find_document_ids([tag.id]), [document.id])
+        self.assertEqual(self._database.count_relations(), 1)
+        with self.assertRaises(ValueError):
+            self._database.get_document(9)
+        self.assertEqual(self._database.get_document.__name__, 'get_document')
+
+    def test_copied_sets(self):
+        document = self._database.create_document(name='a.txt', type='txt', path='a.txt')
+        tag = self._database.create_tag(name='book')
+        tag_ids = self._database.get_document_tag_ids(document.id)
+        self._database.create_relation(document_id=document.id, tag_id=tag.id)
+        self.assertEqual(tag_ids, set())
+
+    def test_scope(self):
+        scope = Scope(self._database)
+        document = scope.create_document('a.txt', 'txt', 'a.txt')
+        scope.toggle_document_selection(document.id)
+        tag = scope.create_tag('book')
+        self.assertEqual(self._database.find_tag_ids([document.id]), [tag.id])
+
+    def test_snapshot_readers(self):
+        for index in range(TAG_COUNT):
+            self._database.create_tag(name='tag_{}'.format(index))
+        stop = threading.Event()
+        errors = []
+
+        def write():
+            try:
+                for index in range(WRITER_COUNT * DOCUMENTS_PER_WRITER):
+                    name = 'doc_{}.txt'.format(index)
+                    document = self._database.create_document(name=name, type='txt', path=name)
+                    self._database.create_relation(document_id=document.id, tag_id=index % TAG_COUNT + 1)
+                    if index % 7 == 0:
+                        self._database.destroy_document(id=document.id)
+            except Exception as error:
+                errors.append(error)
+
+        def read():
+            try:
+                while not stop.is_set():
+                    snapshot = self._database.snapshot()
+                    relation_count = snapshot.count_relations()
+                    document_count = snapshot.count_documents()
+                    for _ in range(3):
+                        tag_document_ids = [snapshot.find_document_ids([tag_id]) for tag_id in range(1, TAG_COUNT + 1)]
+                        self.assertEqual(sum(len(document_ids) for document_ids in tag_document_ids), relation_count)
+                        self.assertEqual(len(snapshot.get_all_document_ids()), document_count)
+            except Exception as error:
+                errors.append(error)
+
+        writer = threading.Thread(target=write)
+        readers = [threading.Thread(target=read) for _ in range(READER_COUNT)]
+        for thread in readers + [writer]:
+            thread.start()
+        writer.join()
+        stop.set()
+        for thread in readers:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_stress(self):
+        for index in range(TAG_COUNT):
+            self._database.create_tag(name='tag_{}'.format(index))
+        stop = threading.Event()
+        errors = []
+
+        def write(writer_index):
+            try:
+                for index in range(DOCUMENTS_PER_WRITER):
+                    name = 'doc_{}_{}.txt'.format(writer_index, index)
+                    document = self._database.create_document(name=name, type='txt', path=name)
+                    tag_id = index % TAG_COUNT + 1
+                    self._database.create_relation(document_id=document.id, tag_id=tag_id)
+                    if index % 3 == 0:
+                        self._database.destroy_relation(document_id=document.id, tag_id=tag_id)
+                    if index % 7 == 0:
+                        self._database.destroy_document(id=document.id)
+            except Exception as error:
+                errors.append(error)
+
+        def read():
+            try:
+                while not stop.is_set():
+                    for tag_id in range(1, TAG_COUNT + 1):
+                        for document_id in self._database.find_document_ids([tag_id]):
+                            self.assertIn(tag_id, self._database.get_document_tag_ids(document_id))
+                    with self._database.read_lock():
+                        self.assertEqual(
+                            self._database.count_relations(),
+                            sum(len(self._database.get_tag_document_ids(tag_id)) for tag_id in range(1, TAG_COUNT + 1))
+                        )
+                    self._database.find_close_tags('tag_1')
+            except Exception as error:
+                errors.append(error)
+
+        writers = [threading.Thread(target=write, args=(index,)) for index in range(WRITER_COUNT)]
+        readers = [threading.Thread(target=read) for _ in range(READER_COUNT)]
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        stop.set()
+        for thread in readers:
+            thread.join()
+        self.assertEqual(errors, [])
+        destroyed_count = WRITER_COUNT * len(range(0, DOCUMENTS_PER_WRITER, 7))
+        self.assertEqual(self._database.count_documents(), WRITER_COUNT * DOCUMENTS_PER_WRITER - destroyed_count)
+        restored_database = Database(path=TEST_LOG_PATH)
+        self.assertEqual(restored_database.get_all_document_ids(), self._database.get_all_document_ids())
+        for tag_id in range(1, TAG_COUNT + 1):
+            self.assertEqual(restored_database.find_document_ids([tag_id]), self._database.find_document_ids([tag_id]))
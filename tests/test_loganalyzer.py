@@ -0,0 +1,131 @@
+import json
+import os
+import unittest
+
+from grimoire.database import Database
+from grimoire.loganalyzer import LogAnalyzer, format_report
+
+TEST_LOG_PATH = '/tmp/grimoire_test.log'
+
+
+def create_sample_log():
+    """
+    Create a log with updated and destroyed documents, tags and relations.
+    :return: None
+    """
+    if os.path.exists(TEST_LOG_PATH):
+        os.remove(TEST_LOG_PATH)
+    database = Database(path=TEST_LOG_PATH)
+    for index in range(1, 6):
+        database.create_document(name='doc_{}.txt'.format(index), type='txt', path='doc_{}.txt'.format(index))
+    for name in ['book', 'paper', 'draft']:
+        database.create_tag(name=name)
+    for document_id in range(1, 6):
+        database.create_relation(document_id=document_id, tag_id=1)
+    database.create_relation(document_id=1, tag_id=2)
+    database.create_relation(document_id=2, tag_id=3)
+    database.create_relation(document_id=3, tag_id=3)
+    database.update_document(id=4, name='renamed.txt', type='txt', path='renamed.txt')
+    database.update_tag(id=2, name='article')
+    database.destroy_relation(document_id=5, tag_id=1)
+    database.destroy_document(id=1)
+    database.destroy_tag(id=3)
+
+
+class LogAnalyzerTest(unittest.TestCase):
+    """Unittest for the log analyzer"""
+
+    def setUp(self):
+        create_sample_log()
+        self._analyzer = LogAnalyzer()
+        self._analyzer.analyze_file(TEST_LOG_PATH)
+
+    def test_methods(self):
+        report = self._analyzer.get_report()
+        self.assertEqual(report['records'], 21)
+        self.assertEqual(report['bytes'], os.path.getsize(TEST_LOG_PATH))
+        self.assertEqual(
+            {method: statistics['records'] for method, statistics in report['methods'].items()},
+            {
+                'create_document': 5, 'create_tag': 3, 'create_relation': 8, 'update_document': 1,
+                'update_tag': 1, 'destroy_relation': 1, 'destroy_document': 1, 'destroy_tag': 1
+            }
+        )
+
+    def test_periods(self):
+        periods = self._analyzer.get_report()['periods']
+        self.assertEqual(sum(period['records'] for period in periods), 21)
+        self.assertEqual(len(periods[0]['period']), 10)
+
+    def test_live_state(self):
+        self.assertEqual(self._analyzer.get_report()['live'], {'documents': 4, 'tags': 2, 'relations': 3})
+
+    def test_dead_records(self):
+        self.assertEqual(self._analyzer.count_dead_records(), {
+            'create_document': 1, 'create_tag': 1, 'create_relation': 5, 'update_document': 1,
+            'update_tag': 1, 'destroy_relation': 1, 'destroy_document': 1, 'destroy_tag': 1
+        })
+
+    def test_compaction(self):
+        compaction = self._analyzer.estimate_compaction()
+        database = Database(path=TEST_LOG_PATH)
+        database.compact_log()
+        with open(TEST_LOG_PATH) as log_file:
+            compacted_records = len(log_file.readlines())
+        self.assertEqual(compaction['compacted_records'], compacted_records)
+        self.assertEqual(compaction['saved_records'], 21 - compacted_records)
+        self.assertAlmostEqual(compaction['compacted_bytes'], os.path.getsize(TEST_LOG_PATH), delta=100)
+
+    def test_compacted_log(self):
+        Database(path=TEST_LOG_PATH).compact_log()
+        analyzer = LogAnalyzer()
+        analyzer.analyze_file(TEST_LOG_PATH)
+        self.assertEqual(sum(analyzer.count_dead_records().values()), 0)
+        self.assertEqual(analyzer.estimate_compaction()['saved_records'], 0)
+
+    def test_heaviest_records(self):
+        analyzer = LogAnalyzer(heaviest_record_count=1)
+        analyzer.analyze_file(TEST_LOG_PATH)
+        self.assertEqual(
+            [(record['line'], record['method'], record['removed_relations'])
+             for record in analyzer.get_report()['heaviest_records']],
+            [(20, 'destroy_document', 2)]
+        )
+        self.assertEqual(
+            [(record['method'], record['removed_relations'])
+             for record in self._analyzer.get_report()['heaviest_records']],
+            [('destroy_tag', 2), ('destroy_document', 2)]
+        )
+
+    def test_without_liveness(self):
+        analyzer = LogAnalyzer(track_liveness=False)
+        analyzer.analyze_file(TEST_LOG_PATH)
+        report = analyzer.get_report()
+        self.assertEqual(report['records'], 21)
+        self.assertNotIn('dead_records', report)
+        self.assertNotIn('heaviest_records', report)
+
+    def test_duplicated_relation(self):
+        analyzer = LogAnalyzer()
+        analyzer.analyze_line(json.dumps({'method': 'create_document', 'id': 1, 'name': 'a', 'type': 't', 'path': 'a'}))
+        analyzer.analyze_line(json.dumps({'method': 'create_tag', 'id': 1, 'name': 'a'}))
+        for _ in range(2):
+            analyzer.analyze_line(json.dumps({'method': 'create_relation', 'document_id': 1, 'tag_id': 1}))
+        self.assertEqual(analyzer.get_report()['live']['relations'], 1)
+        self.assertEqual(analyzer.count_dead_records()['create_relation'], 1)
+
+    def test_invalid_records(self):
+        with self.assertRaises(ValueError):
+            self._analyzer.analyze_line('{"id": 1}')
+        with self.assertRaises(ValueError):
+            self._analyzer.analyze_line('not json')
+
+    def test_invalid_period(self):
+        with self.assertRaises(ValueError):
+            LogAnalyzer(period='week')
+
+    def test_format_report(self):
+        text = format_report(self._analyzer.get_report())
+        self.assertIn('create_relation', text)
+        self.assertIn('compaction:', text)
+        self.assertIn('heaviest records:', text)
@@ -233,3 +233,32 @@ class LoggerTest(unittest.TestCase):
         tag = context.get_tag(123)
         self.assertEqual(tag.id, 123)
         self.assertEqual(tag.name, 'lua')
+
+    def test_restore_progress(self):
+        logger = Logger(path=TEST_LOG_PATH)
+        for tag_id in range(1, 4):
+            logger.save_operation({'method': 'create_tag', 'id': tag_id, 'name': 'tag{}'.format(tag_id)})
+        reports = []
+        logger.restore_context(Context(), progress=lambda read_size, total_size: reports.append((read_size, total_size)))
+        total_size = os.path.getsize(TEST_LOG_PATH)
+        self.assertEqual(reports, [(total_size, total_size)])
+
+    def test_empty_restore_progress(self):
+        logger = Logger(path=TEST_LOG_PATH)
+        reports = []
+        logger.restore_context(Context(), progress=lambda read_size, total_size: reports.append((read_size, total_size)))
+        self.assertEqual(reports, [(0, 0)])
+
+    def test_rewrite(self):
+        logger = Logger(path=TEST_LOG_PATH)
+        for tag_id in range(1, 4):
+            logger.save_operation({'method': 'create_tag', 'id': tag_id, 'name': 'tag{}'.format(tag_id)})
+        logger.rewrite([
+            {'method': 'restore_id_counters', 'last_document_id': 0, 'last_tag_id': 3},
+            {'method': 'create_tag', 'id': 2, 'name': 'tag2'}
+        ])
+        context = Context()
+        logger.restore_context(context)
+        self.assertEqual(context.count_tags(), 1)
+        self.assertEqual(context.get_tag(2).name, 'tag2')
+        self.assertFalse(os.path.exists(TEST_LOG_PATH + '.tmp'))
@@ -0,0 +1,133 @@
+import json
+import os
+import unittest
+
+from grimoire.database import Database
+from grimoire.metrics import LATENCY_BUCKETS, Histogram, Metrics
+from grimoire.scope import Scope
+from grimoire.tracing import Tracer
+
+TEST_LOG_PATH = '/tmp/grimoire_test.log'
+TEST_METRICS_PATH = '/tmp/grimoire_test_metrics'
+
+
+class HistogramTest(unittest.TestCase):
+    """Unittest for the histogram"""
+
+    def test_empty_histogram(self):
+        histogram = Histogram([1, 10])
+        self.assertEqual(histogram.count, 0)
+        self.assertEqual(histogram.sum, 0)
+        self.assertEqual(histogram.get_cumulative_counts(), [(1, 0), (10, 0), (float('inf'), 0)])
+
+    def test_observe(self):
+        histogram = Histogram([1, 10])
+        for value in [0, 1, 2, 10, 11, 100]:
+            histogram.observe(value)
+        self.assertEqual(histogram.count, 6)
+        self.assertEqual(histogram.sum, 124)
+        self.assertEqual(histogram.get_cumulative_counts(), [(1, 2), (10, 4), (float('inf'), 6)])
+
+    def test_to_dict(self):
+        histogram = Histogram([1])
+        histogram.observe(2)
+        self.assertEqual(histogram.to_dict(), {'sum': 2, 'count': 1, 'buckets': [['1', 0], ['+Inf', 1]]})
+
+
+class MetricsTest(unittest.TestCase):
+    """Unittest for the method metrics"""
+
+    def setUp(self):
+        for path in [TEST_LOG_PATH, TEST_METRICS_PATH]:
+            if os.path.exists(path):
+                os.remove(path)
+        self._database = Database(path=TEST_LOG_PATH)
+        self._database.create_tag(name='book')
+        for name in ['a.pdf', 'b.pdf', 'c.pdf']:
+            document = self._database.create_document(name=name, type='pdf', path=name)
+            self._database.create_relation(document_id=document.id, tag_id=1)
+        self._scope = Scope(self._database)
+        self._metrics = Metrics()
+        self._metrics.instrument(self._database, 'database')
+        self._metrics.instrument(self._scope, 'scope')
+
+    def tearDown(self):
+        if os.path.exists(TEST_METRICS_PATH):
+            os.remove(TEST_METRICS_PATH)
+
+    def test_call_counts(self):
+        self._scope.add_tag(1)
+        self._scope.get_concept_only_document_ids()
+        self._scope.get_concept_only_document_ids()
+        self.assertEqual(self._metrics.get_call_count('scope', 'add_tag'), 1)
+        self.assertEqual(self._metrics.get_call_count('scope', 'get_concept_only_document_ids'), 2)
+        self.assertEqual(self._metrics.get_call_count('database', 'find_document_ids'), 2)
+        self.assertEqual(self._metrics.get_call_count('database', 'create_tag'), 0)
+
+    def test_failed_calls(self):
+        with self.assertRaises(ValueError):
+            self._scope.add_tag(9)
+        self.assertEqual(self._metrics.get_call_count('scope', 'add_tag'), 1)
+
+    def test_to_dict(self):
+        self._database.find_document_ids([1])
+        self._database.get_tag(1)
+        metrics = self._metrics.to_dict()
+        self.assertIn('find_document_ids', metrics['database'])
+        self.assertNotIn('create_tag', metrics['database'])
+        find_metrics = metrics['database']['find_document_ids']
+        self.assertEqual(find_metrics['calls'], 1)
+        self.assertGreaterEqual(find_metrics['total_seconds'], 0)
+        self.assertEqual(len(find_metrics['latency_seconds']['buckets']), len(LATENCY_BUCKETS) + 1)
+        self.assertEqual(find_metrics['result_size']['sum'], 3)
+        self.assertNotIn('result_size', metrics['database']['get_tag'])
+
+    def test_uninstrument(self):
+        self._database.get_tag(1)
+        self._metrics.uninstrument(self._database)
+        self._database.get_tag(1)
+        self.assertEqual(self._metrics.get_call_count('database', 'get_tag'), 1)
+        self.assertNotIn('get_tag', self._database.__dict__)
+
+    def test_uninstrument_stacked(self):
+        tracer = Tracer(enabled=True)
+        tracer.instrument(self._database, 'database')
+        self._metrics.uninstrument(self._database)
+        self._database.get_tag(1)
+        self.assertEqual(self._metrics.get_call_count('database', 'get_tag'), 0)
+        self.assertIn('database.get_tag', [event['name'] for event in tracer.get_events()])
+        tracer.uninstrument(self._database)
+        self.assertNotIn('get_tag', self._database.__dict__)
+
+    def test_instrument_twice(self):
+        self._metrics.instrument(self._database, 'database')
+        self._database.get_tag(1)
+        self.assertEqual(self._metrics.get_call_count('database', 'get_tag'), 1)
+
+    def test_reset(self):
+        self._database.get_tag(1)
+        self._metrics.reset()
+        self.assertEqual(self._metrics.to_dict(), {})
+
+    def test_other_instances(self):
+        scope = Scope(self._database)
+        scope.add_tag(1)
+        self.assertEqual(self._metrics.get_call_count('scope', 'add_tag'), 0)
+
+    def test_save_json(self):
+        self._database.find_tag_ids([1])
+        self._metrics.save_json(TEST_METRICS_PATH)
+        with open(TEST_METRICS_PATH) as metrics_file:
+            self.assertEqual(json.load(metrics_file), self._metrics.to_dict())
+
+    def test_save_prometheus(self):
+        self._database.find_document_ids([1])
+        self._metrics.save_prometheus(TEST_METRICS_PATH)
+        with open(TEST_METRICS_PATH) as metrics_file:
+            lines = metrics_file.read().splitlines()
+        self.assertIn('# TYPE grimoire_call_duration_seconds histogram', lines)
+        self.assertIn('grimoire_call_duration_seconds_count{object="database",method="find_document_ids"} 1', lines)
+        self.assertIn(
+            'grimoire_call_duration_seconds_bucket{object="database",method="find_document_ids",le="+Inf"} 1', lines)
+        self.assertIn('grimoire_result_size_bucket{object="database",method="find_document_ids",le="10"} 1', lines)
+        self.assertIn('grimoire_result_size_sum{object="database",method="find_document_ids"} 3', lines)
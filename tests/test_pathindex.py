@@ -0,0 +1,57 @@
+import unittest
+
+from grimoire.pathindex import PathIndex
+
+
+class PathIndexTest(unittest.TestCase):
+    """Unittest for the path index"""
+
+    def setUp(self):
+        self._paths = [
+            'note.txt',
+            'images/a.png',
+            'images/b.png',
+            'images/2020/c.png',
+            'drop/x.pdf',
+            'drop/deep/down/y.pdf'
+        ]
+        self._index = PathIndex(self._paths)
+
+    def test_counts(self):
+        self.assertEqual(len(self._index), 6)
+        self.assertEqual(self._index.count_files(), 6)
+        self.assertEqual(self._index.count_files('images'), 3)
+        self.assertEqual(self._index.count_files('drop/deep'), 1)
+        self.assertEqual(self._index.count_files('missing'), 0)
+        self.assertEqual(self._index.count_direct_files('images'), 2)
+
+    def test_listing(self):
+        self.assertEqual(self._index.list_directories(), [('drop', 2), ('images', 3)])
+        self.assertEqual(self._index.list_files(), ['note.txt'])
+        self.assertEqual(self._index.list_directories('images'), [('images/2020', 1)])
+        self.assertEqual(self._index.list_files('images'), ['images/a.png', 'images/b.png'])
+        self.assertEqual(self._index.list_files('images', offset=1, limit=1), ['images/b.png'])
+        self.assertEqual(self._index.list_directories('drop/deep'), [('drop/deep/down', 1)])
+        with self.assertRaises(ValueError):
+            _ = self._index.list_files('missing')
+
+    def test_membership(self):
+        self.assertIn('images/2020/c.png', self._index)
+        self.assertNotIn('images/2020', self._index)
+        self.assertTrue(self._index.has_directory('images/2020'))
+        self.assertFalse(self._index.has_directory('images/2021'))
+
+    def test_duplicated_path(self):
+        self._index.add('images/a.png')
+        self.assertEqual(self._index.count_files('images'), 3)
+
+    def test_removal(self):
+        self._index.remove('drop/deep/down/y.pdf')
+        self.assertFalse(self._index.has_directory('drop/deep'))
+        self.assertEqual(self._index.list_directories('drop'), [])
+        self.assertEqual(self._index.count_files('drop'), 1)
+        self._index.remove('drop/x.pdf')
+        self.assertEqual(self._index.list_directories(), [('images', 3)])
+        self.assertEqual(len(self._index), 4)
+        with self.assertRaises(ValueError):
+            self._index.remove('drop/x.pdf')
@@ -0,0 +1,68 @@
+import unittest
+
+from grimoire.planner import QueryPlanner
+
+
+class QueryPlannerTest(unittest.TestCase):
+    """Unittest for the posting intersection planner"""
+
+    def setUp(self):
+        self._postings = {
+            'common': set(range(100)),
+            'medium': set(range(0, 100, 5)),
+            'rare': {10, 20, 33},
+            'empty': set()
+        }
+
+    def test_selectivity_order(self):
+        planner = QueryPlanner(self._postings, 100)
+        plan = planner.create_plan(['common', 'medium', 'rare'])
+        self.assertEqual([step.key for step in plan.steps], ['rare', 'medium', 'common'])
+        self.assertEqual(plan.execute(), {10, 20})
+
+    def test_estimated_counts(self):
+        planner = QueryPlanner(self._postings, 100)
+        plan = planner.create_plan(['common', 'medium'])
+        self.assertAlmostEqual(plan.steps[0].estimated_count, 20.0)
+        self.assertAlmostEqual(plan.steps[1].estimated_count, 20.0)
+        self.assertAlmostEqual(plan.calc_estimated_count(), 20.0)
+
+    def test_empty_detection(self):
+        planner = QueryPlanner(self._postings, 100)
+        plan = planner.create_plan(['common', 'empty'])
+        self.assertTrue(plan.is_empty())
+        self.assertEqual(plan.execute(measure=True), set())
+        self.assertIsNone(plan.steps[1].actual_count)
+        plan = planner.create_plan(['common', 'missing'])
+        self.assertTrue(plan.is_empty())
+        self.assertEqual(plan.execute(), set())
+
+    def test_early_stop(self):
+        postings = {'a': {1, 2}, 'b': {3, 4, 5}, 'c': set(range(10))}
+        plan = QueryPlanner(postings, 10).create_plan(['a', 'b', 'c'])
+        self.assertFalse(plan.is_empty())
+        self.assertEqual(plan.execute(measure=True), set())
+        self.assertEqual(plan.steps[1].actual_count, 0)
+        self.assertIsNone(plan.steps[2].actual_count)
+
+    def test_no_steps(self):
+        plan = QueryPlanner(self._postings, 100).create_plan([])
+        self.assertIsNone(plan.execute())
+        self.assertEqual(plan.calc_estimated_count(), 100)
+
+    def test_measured_plan(self):
+        plan = QueryPlanner(self._postings, 100).create_plan(['common', 'rare'])
+        result = plan.execute(measure=True)
+        self.assertEqual(result, {10, 20, 33})
+        for step in plan.steps:
+            self.assertEqual(step.actual_count, 3)
+            self.assertGreaterEqual(step.elapsed_time, 0.0)
+        description = plan.format()
+        self.assertIn('rare', description)
+        self.assertIn('common', description)
+
+    def test_postings_are_not_modified(self):
+        plan = QueryPlanner(self._postings, 100).create_plan(['medium', 'rare'])
+        _ = plan.execute()
+        self.assertEqual(self._postings['rare'], {10, 20, 33})
+        self.assertEqual(len(self._postings['medium']), 20)
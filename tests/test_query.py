@@ -0,0 +1,113 @@
+import unittest
+
+from grimoire.context import Context
+from grimoire.query import AndQuery, NotQuery, OrQuery, TagIdQuery, TagQuery, parse_query
+
+
+def create_sample_context():
+    """
+    Create a sample context for query tests.
+    :return: a `Context` object
+    """
+    context = Context()
+    for document_id in range(1, 7):
+        context.create_document(document_id, 'doc_{}.pdf'.format(document_id), 'pdf', '/tmp/doc_{}.pdf'.format(document_id))
+    for tag_id, name in enumerate(['paper', 'preprint', 'ml', 'read', 'and'], 1):
+        context.create_tag(tag_id, name)
+    relations = [
+        (1, 1), (1, 3),
+        (2, 2), (2, 3), (2, 4),
+        (3, 1), (3, 3), (3, 4),
+        (4, 2),
+        (5, 3), (5, 5)
+    ]
+    for document_id, tag_id in relations:
+        context.create_relation(document_id, tag_id)
+    return context
+
+
+class QueryTest(unittest.TestCase):
+    """Unittest for the boolean queries"""
+
+    def setUp(self):
+        self._context = create_sample_context()
+
+    def find(self, text):
+        return self._context.find_document_ids_by_query(parse_query(text))
+
+    def test_single_tag(self):
+        self.assertEqual(self.find('ml'), [1, 2, 3, 5])
+
+    def test_conjunction(self):
+        self.assertEqual(self.find('paper AND ml'), [1, 3])
+
+    def test_disjunction(self):
+        self.assertEqual(self.find('paper OR preprint'), [1, 2, 3, 4])
+
+    def test_negation(self):
+        self.assertEqual(self.find('NOT ml'), [4, 6])
+        self.assertEqual(self.find('NOT NOT ml'), [1, 2, 3, 5])
+
+    def test_grouping(self):
+        self.assertEqual(self.find('(paper OR preprint) AND ml AND NOT read'), [1])
+        self.assertEqual(self.find('paper OR preprint AND ml'), [1, 2, 3])
+        self.assertEqual(self.find('(paper OR preprint) AND ml'), [1, 2, 3])
+
+    def test_only_negated_conjunction(self):
+        self.assertEqual(self.find('NOT ml AND NOT preprint'), [6])
+
+    def test_quoted_tag_name(self):
+        self.assertEqual(self.find('"and" AND ml'), [5])
+        self.assertEqual(self.find('and AND ml'), [5])
+
+    def test_empty_short_circuit(self):
+        self.assertEqual(self.find('paper AND preprint AND ml'), [])
+
+    def test_unknown_tag(self):
+        with self.assertRaises(ValueError):
+            _ = self.find('missing')
+
+    def test_syntax_errors(self):
+        for text in ['', 'ml AND', '(ml', 'ml)', 'AND ml', 'ml ml', '"ml', 'NOT']:
+            with self.assertRaises(ValueError):
+                _ = parse_query(text)
+
+    def test_query_structure(self):
+        query = parse_query('(paper OR preprint) AND ml AND NOT read')
+        self.assertIsInstance(query, AndQuery)
+        self.assertEqual(len(query.operands), 3)
+        self.assertIsInstance(query.operands[0], OrQuery)
+        self.assertIsInstance(query.operands[2], NotQuery)
+        self.assertEqual(query.collect_tag_names(), {'paper', 'preprint', 'ml', 'read'})
+        self.assertEqual(query.calc_depth(), 3)
+
+    def test_flattening(self):
+        query = parse_query('a AND (b AND (c AND d))')
+        self.assertEqual(len(query.operands), 4)
+        query = AndQuery([TagQuery('a'), AndQuery([TagQuery('b'), TagQuery('c')])])
+        self.assertEqual(len(query.operands), 3)
+
+    def test_formatting(self):
+        for text in ['(paper OR preprint) AND ml AND NOT read', 'NOT (a OR b)', 'and OR "two words" OR "NOT"']:
+            self.assertEqual(str(parse_query(text)), text)
+
+    def test_tag_identifier_query(self):
+        query = AndQuery([parse_query('paper OR preprint'), TagIdQuery(4)])
+        self.assertEqual(self._context.find_document_ids_by_query(query), [2, 3])
+
+    def test_tag_name_resolution(self):
+        query = parse_query('(paper OR preprint) AND NOT read')
+        resolved_query = query.resolve_tag_names(self._context)
+        self.assertEqual(str(resolved_query), '(#1 OR #2) AND NOT #4')
+        self.assertEqual(resolved_query.collect_tag_ids(), {1, 2, 4})
+        self.assertEqual(resolved_query.collect_tag_names(), set())
+        self._context.update_tag(1, 'article')
+        self.assertEqual(self._context.find_document_ids_by_query(resolved_query), [1, 4])
+        self.assertEqual(str(resolved_query.restore_tag_names(self._context)), '(article OR preprint) AND NOT read')
+        with self.assertRaises(ValueError):
+            _ = parse_query('paper').resolve_tag_names(self._context)
+
+    def test_evaluation_keeps_postings(self):
+        _ = self.find('ml AND NOT read')
+        _ = self.find('ml OR paper')
+        self.assertEqual(self.find('ml'), [1, 2, 3, 5])
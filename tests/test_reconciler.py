@@ -0,0 +1,122 @@
+import random
+import unittest
+
+from grimoire.reconciler import TreeviewReconciler
+
+
+class FakeTreeview(object):
+    """Records the top level items like a ttk.Treeview"""
+
+    def __init__(self):
+        self.children = []
+        self.items = {}
+        self.calls = []
+
+    def insert(self, parent, index, iid, text, values, tags):
+        self.calls.append('insert')
+        self.items[iid] = {'text': text, 'values': values, 'tags': tags}
+        self.children.insert(index, iid)
+
+    def delete(self, *iids):
+        self.calls.append('delete')
+        for iid in iids:
+            self.children.remove(iid)
+            del self.items[iid]
+
+    def detach(self, *iids):
+        self.calls.append('detach')
+        for iid in iids:
+            self.children.remove(iid)
+
+    def move(self, iid, parent, index):
+        self.calls.append('move')
+        if iid in self.children:
+            self.children.remove(iid)
+        self.children.insert(index, iid)
+
+    def item(self, iid, **changes):
+        self.calls.append('item')
+        self.items[iid].update(changes)
+
+
+def create_rows(names, tags=None):
+    tags = tags or {}
+    return [{'iid': name, 'text': name.upper(), 'values': [name], 'tags': [tags.get(name, 'plain')]} for name in names]
+
+
+class TreeviewReconcilerTest(unittest.TestCase):
+    """Unittest for the Treeview reconciler"""
+
+    def setUp(self):
+        self._view = FakeTreeview()
+        self._reconciler = TreeviewReconciler(self._view)
+
+    def assertShows(self, rows):
+        self.assertEqual(self._view.children, [str(row['iid']) for row in rows])
+        for row in rows:
+            item = self._view.items[str(row['iid'])]
+            self.assertEqual(item['text'], row['text'])
+            self.assertEqual(tuple(item['values']), tuple(row['values']))
+            self.assertEqual(tuple(item['tags']), tuple(row['tags']))
+
+    def test_initial_rows(self):
+        rows = create_rows(['a', 'b', 'c'])
+        self.assertEqual(self._reconciler.update(rows), 3)
+        self.assertShows(rows)
+
+    def test_unchanged_rows(self):
+        rows = create_rows(['a', 'b', 'c'])
+        self._reconciler.update(rows)
+        self.assertEqual(self._reconciler.update(rows), 0)
+
+    def test_single_insertion(self):
+        self._reconciler.update(create_rows(['a', 'b', 'c']))
+        rows = create_rows(['a', 'x', 'b', 'c'])
+        self.assertEqual(self._reconciler.update(rows), 1)
+        self.assertShows(rows)
+
+    def test_single_deletion(self):
+        self._reconciler.update(create_rows(['a', 'b', 'c']))
+        rows = create_rows(['a', 'c'])
+        self.assertEqual(self._reconciler.update(rows), 1)
+        self.assertShows(rows)
+
+    def test_tag_change(self):
+        self._reconciler.update(create_rows(['a', 'b', 'c']))
+        rows = create_rows(['a', 'b', 'c'], {'b': 'selected'})
+        self.assertEqual(self._reconciler.update(rows), 1)
+        self.assertEqual(self._view.calls[-1], 'item')
+        self.assertShows(rows)
+
+    def test_minimal_move(self):
+        self._reconciler.update(create_rows(['a', 'b', 'c', 'd', 'e']))
+        rows = create_rows(['b', 'c', 'd', 'e', 'a'])
+        self.assertEqual(self._reconciler.update(rows), 2)
+        self.assertEqual(self._view.calls[-2:], ['detach', 'move'])
+        self.assertShows(rows)
+
+    def test_integer_identifiers(self):
+        rows = [{'iid': 1, 'text': 'one'}, {'iid': 2, 'text': 'two'}]
+        self._reconciler.update(rows)
+        self.assertEqual(self._reconciler.get_iids(), ['1', '2'])
+        self.assertEqual(self._reconciler.update([{'iid': 2, 'text': 'two'}]), 1)
+
+    def test_duplicated_identifier(self):
+        with self.assertRaises(ValueError):
+            self._reconciler.update(create_rows(['a', 'a']))
+
+    def test_clear(self):
+        self._reconciler.update(create_rows(['a', 'b']))
+        self.assertEqual(self._reconciler.clear(), 1)
+        self.assertEqual(self._view.children, [])
+
+    def test_random_updates(self):
+        random_generator = random.Random(7)
+        names = ['row_{}'.format(index) for index in range(40)]
+        for _ in range(200):
+            selected_names = random_generator.sample(names, random_generator.randint(0, len(names)))
+            tags = {name: random_generator.choice(['plain', 'selected']) for name in selected_names}
+            rows = create_rows(selected_names, tags)
+            self._reconciler.update(rows)
+            self.assertShows(rows)
+        self.assertGreater(self._reconciler.call_count, 0)
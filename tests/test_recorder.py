@@ -0,0 +1,157 @@
+import os
+import unittest
+
+from grimoire.database import Database
+from grimoire.metrics import Metrics
+from grimoire.query import parse_query
+from grimoire.recorder import ScopeRecorder, calc_percentile, load_trace, replay_trace, summarize_latencies
+from grimoire.scope import Scope
+
+TEST_LOG_PATH = '/tmp/grimoire_test.log'
+TEST_TRACE_PATH = '/tmp/grimoire_test_trace.jsonl'
+
+
+def create_sample_database():
+    """
+    Create a sample database with four documents and two tags.
+    :return: a `Database` object
+    """
+    if os.path.exists(TEST_LOG_PATH):
+        os.remove(TEST_LOG_PATH)
+    database = Database(path=TEST_LOG_PATH)
+    for document_id in range(1, 5):
+        name = 'doc_{}.txt'.format(document_id)
+        database.create_document(name=name, type='txt', path=name)
+    database.create_tag(name='book')
+    database.create_tag(name='python')
+    for document_id in range(1, 5):
+        database.create_relation(document_id=document_id, tag_id=1)
+    database.create_relation(document_id=1, tag_id=2)
+    return database
+
+
+class ScopeRecorderTest(unittest.TestCase):
+    """Unittest for the scope recorder"""
+
+    def setUp(self):
+        if os.path.exists(TEST_TRACE_PATH):
+            os.remove(TEST_TRACE_PATH)
+        self._scope = Scope(create_sample_database())
+        self._recorder = ScopeRecorder()
+        self._recorder.attach(self._scope)
+
+    def tearDown(self):
+        self._recorder.close()
+        if os.path.exists(TEST_TRACE_PATH):
+            os.remove(TEST_TRACE_PATH)
+
+    def test_record_calls(self):
+        self._scope.add_tag(1)
+        self._scope.toggle_document_selection(3)
+        self._scope.get_suggested_tags('boo')
+        records = self._recorder.get_records()
+        self.assertEqual([record['method'] for record in records],
+                         ['add_tag', 'toggle_document_selection', 'get_suggested_tags'])
+        self.assertEqual(records[0]['arguments'], {'tag_id': 1})
+        self.assertEqual(records[1]['arguments'], {'document_id': 3})
+        self.assertEqual(records[2]['arguments'], {'tag_name_input': 'boo'})
+        for record in records:
+            self.assertGreaterEqual(record['elapsed'], 0)
+            self.assertNotIn('error', record)
+        self.assertLessEqual(records[0]['time'], records[1]['time'])
+
+    def test_record_outer_calls_only(self):
+        self._scope.add_tag(1)
+        self._scope.get_concept_only_document_ids()
+        self.assertEqual([record['method'] for record in self._recorder.get_records()],
+                         ['add_tag', 'get_concept_only_document_ids'])
+
+    def test_record_error(self):
+        with self.assertRaises(ValueError):
+            self._scope.add_tag(9)
+        records = self._recorder.get_records()
+        self.assertEqual(len(records), 1)
+        self.assertIn('error', records[0])
+
+    def test_record_query(self):
+        self._scope.set_concept_query(parse_query('book AND python'))
+        self.assertIsInstance(self._recorder.get_records()[0]['arguments']['query'], str)
+
+    def test_detach(self):
+        self._scope.add_tag(1)
+        self._recorder.detach(self._scope)
+        self._scope.add_tag(2)
+        self.assertEqual(len(self._recorder.get_records()), 1)
+
+    def test_detach_keeps_other_wrappers(self):
+        metrics = Metrics()
+        metrics.instrument(self._scope, 'scope')
+        self._recorder.detach(self._scope)
+        self._scope.add_tag(1)
+        self.assertEqual(self._recorder.get_records(), [])
+        self.assertEqual(metrics.get_call_count('scope', 'add_tag'), 1)
+
+    def test_copy_is_not_recorded(self):
+        self._scope.copy().add_tag(1)
+        self.assertEqual(self._recorder.get_records(), [])
+
+    def test_trace_file(self):
+        recorder = ScopeRecorder(TEST_TRACE_PATH)
+        scope = Scope(create_sample_database())
+        recorder.attach(scope)
+        scope.add_tag(1)
+        scope.select_document(2)
+        self.assertEqual(load_trace(TEST_TRACE_PATH), recorder.get_records())
+        recorder.close()
+
+
+class ReplayTest(unittest.TestCase):
+    """Unittest for the replay of the traces"""
+
+    def test_replay(self):
+        scope = Scope(create_sample_database())
+        recorder = ScopeRecorder()
+        recorder.attach(scope)
+        scope.add_tag(1)
+        scope.toggle_document_selection(2)
+        scope.toggle_document_selection(2)
+        scope.get_concept_only_document_ids()
+        scope.set_concept_query(parse_query('book AND NOT python'))
+        results = replay_trace(recorder.get_records(), create_sample_database())
+        self.assertEqual(sorted(results.keys()),
+                         ['add_tag', 'get_concept_only_document_ids', 'set_concept_query', 'toggle_document_selection'])
+        self.assertEqual(len(results['toggle_document_selection']['elapsed_times']), 2)
+        self.assertEqual(results['add_tag']['errors'], 0)
+
+    def test_replay_errors(self):
+        records = [
+            {'method': 'add_tag', 'arguments': {'tag_id': 1}},
+            {'method': 'add_tag', 'arguments': {'tag_id': 7}}
+        ]
+        results = replay_trace(records, create_sample_database())
+        self.assertEqual(len(results['add_tag']['elapsed_times']), 2)
+        self.assertEqual(results['add_tag']['errors'], 1)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            replay_trace([{'method': 'copy', 'arguments': {}}], create_sample_database())
+
+    def test_summarize_latencies(self):
+        results = {'add_tag': {'elapsed_times': [0.001 * i for i in range(1, 101)], 'errors': 2}}
+        summary = summarize_latencies(results)['add_tag']
+        self.assertEqual(summary['count'], 100)
+        self.assertEqual(summary['errors'], 2)
+        self.assertAlmostEqual(summary['p50_ms'], 50)
+        self.assertAlmostEqual(summary['p90_ms'], 90)
+        self.assertAlmostEqual(summary['p99_ms'], 99)
+        self.assertAlmostEqual(summary['max_ms'], 100)
+
+    def test_percentile(self):
+        self.assertEqual(calc_percentile([3, 1, 2], 0), 1)
+        self.assertEqual(calc_percentile([3, 1, 2], 50), 2)
+        self.assertEqual(calc_percentile([3, 1, 2], 100), 3)
+        self.assertEqual(calc_percentile([5], 99), 5)
+        with self.assertRaises(ValueError):
+            calc_percentile([], 50)
+        with self.assertRaises(ValueError):
+            calc_percentile([1], 101)
@@ -242,3 +242,19 @@ class RepositoryTest(unittest.TestCase):
         repository = Repository(database, storage)
         with self.assertRaises(ValueError):
             _ = repository.untrack_document(1234)
+
+    def test_chunked_untracked_files(self):
+        database = Database(TEST_LOG_PATH)
+        storage = Storage(TEST_ROOT_PATH)
+        paths = ['file_{}.txt'.format(i) for i in range(10)]
+        for path in paths:
+            touch(TEST_ROOT_PATH + path)
+        repository = Repository(database, storage)
+        repository.track_file('file_3.txt')
+        repository.track_file('file_7.txt')
+        chunks = list(repository.iterate_untracked_file_paths(chunk_size=4))
+        self.assertEqual([scanned_count for _, scanned_count in chunks], [4, 8, 10])
+        untracked_file_paths = {path for chunk, _ in chunks for path in chunk}
+        self.assertEqual(untracked_file_paths, set(paths) - {'file_3.txt', 'file_7.txt'})
+        chunks = list(repository.iterate_untracked_file_paths(document_paths=set(), chunk_size=4))
+        self.assertEqual(sum(len(chunk) for chunk, _ in chunks), 10)
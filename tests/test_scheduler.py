@@ -0,0 +1,109 @@
+import unittest
+
+from grimoire.scheduler import RenderScheduler, RenderState
+
+
+class CountingSource(object):
+    """Counts the queries for the render state"""
+
+    def __init__(self):
+        self.query_count = 0
+
+    def get_items(self, prefix=''):
+        self.query_count += 1
+        return [prefix + 'a', prefix + 'b']
+
+    def has_items(self):
+        return True
+
+    def remove_items(self):
+        pass
+
+
+class FakeEventLoop(object):
+    """Collects the idle callbacks"""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def after_idle(self, callback):
+        self.callbacks.append(callback)
+
+    def run_idle_callbacks(self):
+        callbacks = self.callbacks
+        self.callbacks = []
+        for callback in callbacks:
+            callback()
+
+
+class RenderStateTest(unittest.TestCase):
+    """Unittest for the render state"""
+
+    def test_shared_queries(self):
+        source = CountingSource()
+        state = RenderState(source)
+        self.assertEqual(state.get_items(), ['a', 'b'])
+        self.assertEqual(state.get_items(), ['a', 'b'])
+        self.assertEqual(source.query_count, 1)
+        self.assertEqual(state.get_items('x'), ['xa', 'xb'])
+        self.assertEqual(source.query_count, 2)
+        self.assertTrue(state.has_items())
+
+    def test_no_modifications(self):
+        state = RenderState(CountingSource())
+        with self.assertRaises(AttributeError):
+            state.remove_items()
+
+
+class RenderSchedulerTest(unittest.TestCase):
+    """Unittest for the render scheduler"""
+
+    def setUp(self):
+        self._source = CountingSource()
+        self._event_loop = FakeEventLoop()
+        self._scheduler = RenderScheduler(self._event_loop.after_idle, self._source)
+        self._renders = []
+        for name in ['tags', 'documents', 'files']:
+            self._scheduler.register(name, self.create_renderer(name))
+
+    def create_renderer(self, name):
+        def render(state):
+            _ = state.get_items()
+            self._renders.append(name)
+        return render
+
+    def test_coalesced_renders(self):
+        self._scheduler.mark_dirty('tags', 'documents')
+        self._scheduler.mark_dirty('documents')
+        self._scheduler.mark_dirty('tags')
+        self.assertEqual(len(self._event_loop.callbacks), 1)
+        self.assertTrue(self._scheduler.is_dirty('tags'))
+        self.assertEqual(self._renders, [])
+        self._event_loop.run_idle_callbacks()
+        self.assertEqual(self._renders, ['tags', 'documents'])
+        self.assertEqual(self._source.query_count, 1)
+        self.assertFalse(self._scheduler.is_dirty('tags'))
+        self.assertEqual(self._scheduler.render_count, 2)
+
+    def test_registration_order(self):
+        self._scheduler.mark_dirty('files', 'tags')
+        self._event_loop.run_idle_callbacks()
+        self.assertEqual(self._renders, ['tags', 'files'])
+
+    def test_all_views(self):
+        self._scheduler.mark_dirty()
+        self._event_loop.run_idle_callbacks()
+        self.assertEqual(self._renders, ['tags', 'documents', 'files'])
+
+    def test_next_event_loop_turn(self):
+        self._scheduler.mark_dirty('tags')
+        self._event_loop.run_idle_callbacks()
+        self._scheduler.mark_dirty('tags')
+        self.assertEqual(len(self._event_loop.callbacks), 1)
+        self._event_loop.run_idle_callbacks()
+        self.assertEqual(self._renders, ['tags', 'tags'])
+        self.assertEqual(self._source.query_count, 2)
+
+    def test_unknown_view(self):
+        with self.assertRaises(ValueError):
+            self._scheduler.mark_dirty('missing')
@@ -2,7 +2,8 @@ import os
 import unittest
 
 from grimoire.database import Database
-from grimoire.scope import Scope
+from grimoire.scheduler import RenderState
+from grimoire.scope import Scope, calc_document_rows
 
 TEST_LOG_PATH = '/tmp/grimoire_test.log'
 
@@ -847,3 +848,113 @@ class ScopeTest(unittest.TestCase):
             scope.destroy_tag(tag_id)
             with self.assertRaises(ValueError):
                 scope.destroy_tag(tag_id)
+
+    def test_concept_query(self):
+        scope = Scope(database=self._database)
+        scope.set_concept_query('(python OR lua) AND NOT gui')
+        self.assertEqual(scope.get_concept_document_ids(), [1, 3, 4])
+        scope.add_tag(1)
+        self.assertEqual(scope.get_concept_document_ids(), [1, 3])
+        self.assertEqual([document.id for document in scope.get_concept_documents()], [1, 3])
+        scope.select_document(3)
+        self.assertEqual(scope.get_concept_only_document_ids(), [1])
+        scope.clear_concept_query()
+        self.assertIsNone(scope.get_concept_query())
+        self.assertEqual(set(scope.get_concept_document_ids()), {1, 2, 3, 5})
+
+    def test_concept_query_after_tag_changes(self):
+        scope = Scope(database=self._database)
+        scope.set_concept_query('(python OR lua) AND NOT gui')
+        self._database.update_tag(id=2, name='python3')
+        self.assertEqual(scope.get_concept_document_ids(), [1, 3, 4])
+        self.assertEqual(str(scope.get_concept_query()), '(python3 OR lua) AND NOT gui')
+        scope.add_tag(1)
+        scope.destroy_tag(1)
+        self.assertEqual(scope.get_concept_tag_ids(), [])
+        self.assertEqual(scope.get_concept_document_ids(), [1, 3, 4])
+        scope.destroy_tag(5)
+        self.assertIsNone(scope.get_concept_query())
+        self.assertEqual(scope.get_concept_document_ids(), list(range(1, 9)))
+
+    def test_invalid_concept_query(self):
+        scope = Scope(database=self._database)
+        with self.assertRaises(ValueError):
+            scope.set_concept_query('python AND')
+        with self.assertRaises(ValueError):
+            scope.set_concept_query('python AND java')
+        self.assertIsNone(scope.get_concept_query())
+
+    def test_ranked_documents(self):
+        scope = Scope(database=self._database)
+        scope.add_tag(2)
+        scope.add_tag(4)
+        self.assertEqual(scope.get_concept_document_ids(), [])
+        ranked_documents = scope.get_fallback_documents()
+        self.assertEqual({document.id for document, _ in ranked_documents}, {1, 3, 4, 5, 6})
+        self.assertEqual(len(scope.get_fallback_documents(limit=2)), 2)
+        scope.select_document(1)
+        ranked_documents = scope.get_ranked_documents()
+        self.assertNotIn(1, [document.id for document, _ in ranked_documents])
+
+    def test_no_fallback_for_matching_concept(self):
+        scope = Scope(database=self._database)
+        scope.add_tag(1)
+        scope.add_tag(2)
+        self.assertEqual(scope.get_fallback_documents(), [])
+        scope.remove_tag(1)
+        self.assertEqual(scope.get_fallback_documents(), [])
+
+    def test_document_rows(self):
+        scope = Scope(database=self._database)
+        scope.add_tag(2)
+        scope.add_tag(4)
+        scope.select_document(1)
+        scope_state = RenderState(scope)
+        document_ids, row_tags = calc_document_rows(scope_state, 2)
+        self.assertEqual(document_ids[0], 1)
+        self.assertEqual(len(document_ids), 3)
+        self.assertEqual(row_tags[1], 'selected')
+        self.assertEqual([row_tags[document_id] for document_id in document_ids[1:]], ['partial', 'partial'])
+        self.assertEqual(scope_state.get_listed_document_ids(), [1])
+
+    def test_suggested_tags(self):
+        scope = Scope(database=self._database)
+        self.assertEqual(scope.get_suggested_tags(''), [])
+        self.assertEqual(scope.get_suggested_tags('pyhton'), ['pyhton', 'python'])
+        self.assertEqual(scope.get_suggested_tags('python'), ['python'])
+        self.assertEqual(scope.find_close_tag_names('gu'), ['gui'])
+
+    def test_scope_copy(self):
+        scope = Scope(database=self._database)
+        scope.add_tag(1)
+        scope.select_document(2)
+        scope_copy = scope.copy()
+        scope.add_tag(3)
+        scope.deselect_all_documents()
+        self.assertEqual(scope_copy.get_concept_tag_ids(), [1])
+        self.assertEqual(scope_copy.get_selection_document_ids(), [2])
+        self.assertEqual(set(scope_copy.get_concept_only_document_ids()), {1, 3, 5})
+
+    def test_scope_copy_on_snapshot(self):
+        scope = Scope(database=self._database)
+        scope.add_tag(1)
+        scope_copy = scope.copy(self._database.snapshot())
+        self._database.destroy_relation(document_id=1, tag_id=1)
+        self.assertEqual(scope_copy.get_concept_document_ids(), [1, 2, 3, 5])
+        self.assertEqual(scope.get_concept_document_ids(), [2, 3, 5])
+        self.assertEqual(scope_copy.get_suggested_tags('pyhton'), ['pyhton', 'python'])
+        with self.assertRaises(ValueError):
+            scope_copy.create_tag('java')
+
+    def test_document_pages(self):
+        scope = Scope(database=self._database)
+        scope.add_tag(1)
+        scope.select_document(5)
+        scope.select_document(2)
+        document_ids = scope.get_listed_document_ids()
+        self.assertEqual(document_ids, [5, 2, 1, 3])
+        self.assertEqual([document.id for document in scope.get_documents(document_ids[:3])], [5, 2, 1])
+        self.assertEqual([document.id for document in scope.get_documents(document_ids[3:6])], [3])
+        self.assertEqual(scope.get_documents(document_ids[10:13]), [])
+        with self.assertRaises(ValueError):
+            _ = scope.get_documents([1, 9])
@@ -70,3 +70,13 @@ class StorageTest(unittest.TestCase):
         storage = Storage(path=TEST_ROOT_PATH)
         result_paths = storage.collect_file_paths()
         self.assertEqual(set(result_paths), set(paths))
+
+    def test_chunked_file_paths(self):
+        os.makedirs(TEST_ROOT_PATH + 'images')
+        paths = ['sample_{}.txt'.format(i) for i in range(7)] + ['images/image_{}.png'.format(i) for i in range(5)]
+        for path in paths:
+            touch(TEST_ROOT_PATH + path)
+        storage = Storage(path=TEST_ROOT_PATH)
+        chunks = list(storage.iterate_file_paths(chunk_size=5))
+        self.assertEqual([len(chunk) for chunk in chunks], [5, 5, 2])
+        self.assertEqual({path for chunk in chunks for path in chunk}, set(paths))
@@ -0,0 +1,130 @@
+import json
+import os
+import threading
+import unittest
+
+from grimoire.database import Database
+from grimoire.metrics import Metrics
+from grimoire.scope import Scope
+from grimoire.tracing import Tracer
+
+TEST_LOG_PATH = '/tmp/grimoire_test.log'
+TEST_TRACE_PATH = '/tmp/grimoire_test_trace.json'
+
+
+class TracerTest(unittest.TestCase):
+    """Unittest for the span tracer"""
+
+    def setUp(self):
+        for path in [TEST_LOG_PATH, TEST_TRACE_PATH]:
+            if os.path.exists(path):
+                os.remove(path)
+        self._tracer = Tracer(enabled=True)
+
+    def tearDown(self):
+        if os.path.exists(TEST_TRACE_PATH):
+            os.remove(TEST_TRACE_PATH)
+
+    def test_invalid_capacity(self):
+        with self.assertRaises(ValueError):
+            Tracer(capacity=0)
+
+    def test_span(self):
+        with self._tracer.span('render', 'treeview', rows=3):
+            pass
+        events = self._tracer.get_events()
+        self.assertEqual(len(events), 1)
+        event = events[0]
+        self.assertEqual(event['name'], 'render')
+        self.assertEqual(event['cat'], 'treeview')
+        self.assertEqual(event['ph'], 'X')
+        self.assertEqual(event['args'], {'rows': 3})
+        self.assertEqual(event['pid'], os.getpid())
+        self.assertEqual(event['tid'], threading.get_ident())
+        self.assertGreaterEqual(event['ts'], 0)
+        self.assertGreaterEqual(event['dur'], 0)
+
+    def test_nested_spans(self):
+        with self._tracer.span('outer'):
+            with self._tracer.span('inner'):
+                pass
+        inner, outer = self._tracer.get_events()
+        self.assertEqual((inner['name'], outer['name']), ('inner', 'outer'))
+        self.assertLessEqual(outer['ts'], inner['ts'])
+        self.assertGreaterEqual(outer['ts'] + outer['dur'], inner['ts'] + inner['dur'])
+
+    def test_span_on_error(self):
+        with self.assertRaises(ValueError):
+            with self._tracer.span('failing'):
+                raise ValueError('Failed!')
+        self.assertEqual(len(self._tracer.get_events()), 1)
+
+    def test_disabled(self):
+        tracer = Tracer()
+        self.assertFalse(tracer.enabled)
+        with tracer.span('render'):
+            pass
+        tracer.enable()
+        with tracer.span('render'):
+            pass
+        tracer.disable()
+        with tracer.span('render'):
+            pass
+        self.assertEqual(len(tracer.get_events()), 1)
+
+    def test_ring_buffer(self):
+        tracer = Tracer(capacity=3, enabled=True)
+        for index in range(5):
+            with tracer.span('span_{}'.format(index)):
+                pass
+        self.assertEqual([event['name'] for event in tracer.get_events()], ['span_2', 'span_3', 'span_4'])
+        tracer.clear()
+        self.assertEqual(tracer.get_events(), [])
+
+    def test_traced(self):
+        @self._tracer.traced()
+        def select_document(document_id):
+            return document_id * 2
+
+        self.assertEqual(select_document(3), 6)
+        self.assertEqual(select_document.__name__, 'select_document')
+        event = self._tracer.get_events()[0]
+        self.assertEqual((event['name'], event['cat']), ('select_document', 'handler'))
+
+    def test_instrument(self):
+        database = Database(path=TEST_LOG_PATH)
+        scope = Scope(database)
+        self._tracer.instrument(database, 'database')
+        self._tracer.instrument(scope, 'scope')
+        database.create_tag(name='book')
+        scope.add_tag(1)
+        names = [event['name'] for event in self._tracer.get_events()]
+        self.assertIn('database.create_tag', names)
+        self.assertIn('database.save_operation', names)
+        self.assertIn('scope.add_tag', names)
+        self.assertIn('database.get_tag', names)
+        self._tracer.uninstrument(scope)
+        self._tracer.clear()
+        scope.remove_tag(1)
+        self.assertNotIn('scope.remove_tag', [event['name'] for event in self._tracer.get_events()])
+
+    def test_uninstrument_inner_layer(self):
+        database = Database(path=TEST_LOG_PATH)
+        metrics = Metrics()
+        self._tracer.instrument(database, 'database')
+        metrics.instrument(database, 'database')
+        self._tracer.uninstrument(database)
+        database.create_tag(name='book')
+        self.assertEqual(self._tracer.get_events(), [])
+        self.assertEqual(metrics.get_call_count('database', 'create_tag'), 1)
+        metrics.uninstrument(database)
+        self.assertNotIn('create_tag', database.__dict__)
+
+    def test_save(self):
+        with self._tracer.span('render'):
+            pass
+        self._tracer.save(TEST_TRACE_PATH)
+        with open(TEST_TRACE_PATH) as trace_file:
+            trace = json.load(trace_file)
+        self.assertEqual(trace['displayTimeUnit'], 'ms')
+        self.assertEqual(trace['traceEvents'], self._tracer.get_events())
@@ -0,0 +1,102 @@
+import threading
+import time
+import unittest
+
+from grimoire.worker import BackgroundWorker
+
+TIMEOUT = 5.0
+
+
+def wait_for(worker, condition):
+    """
+    Dispatch the messages of the worker until the condition holds.
+    :return: True, when the condition has become true before the timeout
+    """
+    deadline = time.monotonic() + TIMEOUT
+    while time.monotonic() < deadline:
+        worker.dispatch()
+        if condition():
+            return True
+        time.sleep(0.001)
+    return False
+
+
+class BackgroundWorkerTest(unittest.TestCase):
+    """Unittest for the background worker"""
+
+    def test_result(self):
+        worker = BackgroundWorker()
+        results = []
+        worker.submit(lambda job, a, b: a + b, 1, 2, on_done=results.append)
+        self.assertTrue(wait_for(worker, lambda: results))
+        self.assertEqual(results, [3])
+
+    def test_callbacks_on_dispatching_thread(self):
+        worker = BackgroundWorker()
+        threads = []
+        worker.submit(lambda job: threading.current_thread(), on_done=threads.append)
+        self.assertTrue(wait_for(worker, lambda: threads))
+        self.assertIsNot(threads[0], threading.current_thread())
+        callback_threads = []
+        worker.submit(lambda job: None, on_done=lambda _: callback_threads.append(threading.current_thread()))
+        self.assertTrue(wait_for(worker, lambda: callback_threads))
+        self.assertIs(callback_threads[0], threading.current_thread())
+
+    def test_error(self):
+        worker = BackgroundWorker()
+        errors = []
+
+        def fail(job):
+            raise ValueError('failed')
+
+        worker.submit(fail, on_error=errors.append)
+        self.assertTrue(wait_for(worker, lambda: errors))
+        self.assertIsInstance(errors[0], ValueError)
+
+    def test_stale_results_are_dropped(self):
+        worker = BackgroundWorker()
+        started = threading.Event()
+        release = threading.Event()
+        results = []
+
+        def slow(job, value):
+            started.set()
+            release.wait(TIMEOUT)
+            return value
+
+        first_job = worker.submit(slow, 'first', on_done=results.append)
+        self.assertTrue(started.wait(TIMEOUT))
+        worker.submit(lambda job, value: value, 'second', on_done=results.append)
+        self.assertTrue(first_job.is_cancelled())
+        release.set()
+        self.assertTrue(wait_for(worker, lambda: results))
+        self.assertTrue(wait_for(worker, lambda: not worker.is_busy()))
+        worker.dispatch()
+        self.assertEqual(results, ['second'])
+
+    def test_partial_results(self):
+        worker = BackgroundWorker()
+        partials = []
+        results = []
+
+        def stream(job):
+            for index in range(3):
+                job.publish(index)
+            return 'done'
+
+        worker.submit(stream, on_partial=partials.append, on_done=results.append)
+        self.assertTrue(wait_for(worker, lambda: results))
+        self.assertEqual(partials, [0, 1, 2])
+
+    def test_cancel(self):
+        worker = BackgroundWorker()
+        release = threading.Event()
+        results = []
+        job = worker.submit(lambda job: release.wait(TIMEOUT), on_done=results.append)
+        worker.cancel()
+        self.assertTrue(job.is_cancelled())
+        release.set()
+        self.assertTrue(wait_for(worker, lambda: not worker.is_busy()))
+        time.sleep(0.01)
+        worker.dispatch()
+        self.assertEqual(results, [])